@@ -0,0 +1,312 @@
+import asyncio
+import functools
+import numpy as np
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from twitter.GeneratorService import GeneratorService
+from twitter.functions import TweetValid
+
+
+def running_loop():
+    """
+    Returns the event loop of the running coroutine
+    (asyncio.get_running_loop, that is only
+    in Python >= 3.7).
+
+    :rtype: asyncio.AbstractEventLoop
+    """
+    if hasattr(asyncio, "get_running_loop"):
+        return asyncio.get_running_loop()
+    return asyncio.get_event_loop()
+
+
+async def gather_tasks(tasks):
+    """
+    Waits for all the tasks (or coroutines) of "tasks", e.g. the
+    ones of several bots, and returns their results. If one of
+    them fails (or the wait is cancelled) the other tasks are
+    cancelled and the error is raised.
+
+    :type tasks: list of asyncio.Task or coroutine
+    :rtype: list
+    """
+    tasks = [asyncio.ensure_future(task) for task in tasks]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+class AsyncBot():
+    """
+    Asyncio interface of the Bot "bot": the methods are coroutines,
+    so one event loop can drive many bots (e.g., one for each
+    account, see the "keys" of Bot) at the same time.
+    The blocking calls (the model and the twitter API) run in
+    the executor "executor" (default: the one of the event loop)
+    and the pauses are timed tasks of the event loop ("schedule"),
+    not sleeps. The twitter API is used only through "bot" (so
+    this module does not need the keys of the Bot until
+    "create" is called).
+    "generator" is the GeneratorService used to generate
+    the tweets. The bots can share one (a BatchingGeneratorService
+    merges the requests of all of them), by default the bot
+    has its own service with the generator of "bot".
+    To run several bots use the function "gather_tasks".
+
+    :type bot: Bot
+    :type generator: None or GeneratorService
+    :type executor: None or concurrent.futures.Executor
+    """
+    def __init__(self, bot, generator=None, executor=None):
+        self.bot = bot
+        self.generator = generator
+        self.executor = executor
+
+    @classmethod
+    async def create(cls, *args, generator=None, executor=None, **kwargs):
+        """
+        Creates the Bot (the arguments of Bot) in the executor
+        and returns its AsyncBot.
+
+        :type generator: None or GeneratorService
+        :type executor: None or concurrent.futures.Executor
+        :rtype: AsyncBot
+        """
+        try:
+            from Bot import Bot
+        except ImportError:
+            from agent.Bot import Bot
+        loop = running_loop()
+        bot = await loop.run_in_executor(executor,
+                                         functools.partial(Bot,
+                                                           *args,
+                                                           **kwargs))
+        return cls(bot, generator, executor)
+
+    async def call(self, function, *args, **kwargs):
+        """
+        Runs the blocking call function(*args, **kwargs)
+        in the executor and returns its result.
+
+        :type function: function
+        """
+        loop = running_loop()
+        return await loop.run_in_executor(self.executor,
+                                          functools.partial(function,
+                                                            *args,
+                                                            **kwargs))
+
+    def schedule(self, delay, function, *args, **kwargs):
+        """
+        Runs the coroutine function(*args, **kwargs) after "delay"
+        seconds as a task of the event loop and returns the task.
+        The coroutine is created only when the delay is over, so
+        a task cancelled before it leaves nothing to await.
+
+        :type delay: float
+        :type function: coroutine function
+        :rtype: asyncio.Task
+        """
+        async def delayed():
+            await asyncio.sleep(delay)
+            return await function(*args, **kwargs)
+        return asyncio.ensure_future(delayed())
+
+    def get_generator(self):
+        """
+        Returns the GeneratorService of the bot (it is
+        created in the first call).
+
+        :rtype: GeneratorService
+        """
+        if self.generator is None:
+            self.generator = GeneratorService(self.bot.get_generator())
+        return self.generator
+
+    async def generate_tweets(self,
+                              number_of_tweets=1,
+                              starting_text='<eos>',
+                              hashtag_list=[],
+                              decoding="sample",
+                              num_candidates=10):
+        """
+        Generates the tweets in the executor (same arguments as
+        the method "generate_tweet_list" of the generators).
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        generator = self.get_generator()
+        return await self.call(generator.generate_tweet_list,
+                               number_of_tweets,
+                               starting_text,
+                               hashtag_list,
+                               decoding,
+                               num_candidates)
+
+    async def post(self, tweet, delay=0):
+        """
+        Posts "tweet" after "delay" seconds.
+
+        :type tweet: str
+        :type delay: float
+        """
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self.call(self.bot.api.update_status, tweet)
+
+    async def engage_tweet(self, tweet, retweet=False):
+        """
+        Likes "tweet", follows its user and, with
+        "retweet", retweets it (the method "engage_tweet"
+        of Bot). It returns False if the twitter API
+        refuses one of them.
+
+        :type tweet: tweepy.Status
+        :type retweet: boolean
+        :rtype: boolean
+        """
+        return await self.call(self.bot.engage_tweet, tweet, retweet)
+
+    async def engage(self,
+                     hashtag=None,
+                     num_tweets_to_see=51,
+                     minutes_paused=2):
+        """
+        Async version of the engagement of the method
+        "post_from_txt" of Bot: the bot likes the tweets with
+        "hashtag" (default: one of the hashtags of "hashtag_search"
+        of the bot), follows their users and retweets one of every
+        25 tweets, one tweet every "minutes_paused" minutes
+        (each one is a timed task, if one fails the others are
+        cancelled). It returns the number of tweets that the
+        bot engaged with.
+
+        :type hashtag: None or str
+        :type num_tweets_to_see: int
+        :type minutes_paused: int
+        :rtype: int
+        """
+        if hashtag is None:
+            choice = np.random.choice(len(self.bot.hashtag_search), 1)[0]
+            hashtag = self.bot.hashtag_search[choice]
+        print("\ncurrent hashtag is {}".format(hashtag))
+        tweets = await self.call(self.bot.search, hashtag, num_tweets_to_see)
+        seconds_pause = minutes_paused * 60
+        tasks = [self.schedule(count * seconds_pause,
+                               self.engage_tweet,
+                               tweet,
+                               count % 25 == 0)
+                 for count, tweet in enumerate(tweets)]
+        if tasks == []:
+            return 0
+        done = await gather_tasks(tasks)
+        return sum(done)
+
+    async def post_from_txt(self,
+                            text_path,
+                            minutes_paused=2,
+                            num_tweets_to_see=51):
+        """
+        Async version of the method "post_from_txt" of Bot:
+        each tweet of the txt "text_path" is posted and
+        then the bot engages with tweets of one of its
+        hashtags (see "engage").
+
+        :type text_path: str
+        :type minutes_paused: int
+        :type num_tweets_to_see: int
+        """
+        with open(text_path) as file:
+            tweets = [tweet for tweet in file if TweetValid(tweet)]
+        for i, tweet in enumerate(tweets):
+            print("Posting {0} from {1}".format(i, len(tweets)))
+            await self.post(tweet)
+            await self.engage(num_tweets_to_see=num_tweets_to_see,
+                              minutes_paused=minutes_paused)
+
+    async def write_tweet(self,
+                          first_part='<eos>',
+                          num_hashtags=5,
+                          publish=True,
+                          decoding="best_of",
+                          num_candidates=10):
+        """
+        Writes (and posts, with "publish") one tweet that starts
+        with "first_part" and ends with "num_hashtags" of the trending
+        hashtags (as the method "write" of Bot).
+
+        :type first_part: str
+        :type num_hashtags: int
+        :type publish: boolean
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: str
+        """
+        trends = await self.call(self.bot.api.trends_place, 1)
+        TrendsNames = [trend['name'] for trend in trends[0]['trends']]
+        hashtags = [words for words in TrendsNames if words[0] == "#"]
+        if len(hashtags) < num_hashtags:
+            num_hashtags = max(len(hashtags) - 1, 1)
+        if len(hashtags) > 0:
+            choice = np.random.choice(len(hashtags), num_hashtags)
+            my_hashtags = [hashtags[i] for i in choice]
+        else:
+            my_hashtags = []
+        tweet = (await self.generate_tweets(starting_text=first_part,
+                                            hashtag_list=my_hashtags,
+                                            decoding=decoding,
+                                            num_candidates=num_candidates))[0]
+        print("\nThe tweet is:\n", tweet)
+        if publish:
+            await self.post(tweet)
+        return tweet
+
+    async def write(self,
+                    num_tweets,
+                    first_part='<eos>',
+                    num_hashtags=5,
+                    minutes_pause=60,
+                    publish=True,
+                    decoding="best_of",
+                    num_candidates=10):
+        """
+        Async version of the method "write" of Bot: the tweet i
+        is written and posted after i * "minutes_pause" minutes
+        (each one is a timed task, see "write_tweet", if one
+        fails the others are cancelled). It returns the tweets.
+
+        :type num_tweets: int
+        :type first_part: str
+        :type num_hashtags: int
+        :type minutes_pause: int
+        :type publish: boolean
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        seconds_pause = minutes_pause * 60
+        tasks = [self.schedule(i * seconds_pause,
+                               self.write_tweet,
+                               first_part,
+                               num_hashtags,
+                               publish,
+                               decoding,
+                               num_candidates)
+                 for i in range(num_tweets)]
+        if tasks == []:
+            return []
+        return await gather_tasks(tasks)
@@ -21,7 +21,9 @@ parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
 from utils import get_real_friends, get_date, get_date_and_time
-from twitter.TweetGenerator import TweetGenerator
+from twitter.GeneratorService import warm_generator
+from twitter.GeneratorClient import GeneratorClient
+from twitter.CandidatePool import CandidatePool
 from twitter.functions import TweetValid
 from text_processing.functions import file_len
 
@@ -36,6 +38,8 @@ class Bot():
     and "AccessTokenSecret". For more info on how to get
     the value of these variables go watch this video on
     youtube https://www.youtube.com/watch?v=M7MqML2ZVOY
+    To use another account, pass its "keys": (ConsumerKey,
+    ConsumerSecret, AccessToken, AccessTokenSecret).
 
     :type corpus: str
     :type friends: list of str
@@ -43,6 +47,8 @@ class Bot():
     :type black_list: list
     :type local: str
     :type hashtag_search: None or list
+    :type generator_socket: None or str
+    :type keys: None or tuple of str
     """
     def __init__(self,
                  corpus,
@@ -50,13 +56,20 @@ class Bot():
                  commentary="None",
                  black_list=[],
                  local="world",
-                 hashtag_search=None):
+                 hashtag_search=None,
+                 generator_socket=None,
+                 keys=None):
+        if keys is None:
+            keys = (ConsumerKey, ConsumerSecret, AccessToken, AccessTokenSecret)
+        self.keys = keys
         self.black_list = black_list
+        self.generator_socket = generator_socket
+        self.generator = None
         self.local = local
         self.friends = friends
         self.corpus = corpus
-        auth = tweepy.OAuthHandler(ConsumerKey, ConsumerSecret)
-        auth.set_access_token(AccessToken, AccessTokenSecret)
+        auth = tweepy.OAuthHandler(self.keys[0], self.keys[1])
+        auth.set_access_token(self.keys[2], self.keys[3])
         self.api = tweepy.API(auth)
         entry = [("Date", [get_date()]),
                  ("Followers", [len(self.api.followers_ids())]),
@@ -69,6 +82,24 @@ class Bot():
         else:
             self.hashtag_search = hashtag_search + self.get_trends(self.local)
 
+    def get_generator(self):
+        """
+        Method that returns the tweet generator of the bot.
+        It is created only once and kept warm for all the tweets.
+        If the bot has a "generator_socket" the tweets come from
+        the GeneratorService that serves this socket (GeneratorClient),
+        otherwise the generator is the one of "warm_generator".
+
+        :rtype: GeneratorClient or NumpyTweetGenerator or TweetGenerator
+        """
+        if self.generator is None:
+            if self.generator_socket is not None:
+                self.generator = GeneratorClient(self.generator_socket)
+            else:
+                self.generator = warm_generator(self.corpus,
+                                                black_list=self.black_list)
+        return self.generator
+
     def clear_follow(self,
                      Realfriends=get_real_friends()):
         """
@@ -120,10 +151,7 @@ class Bot():
         session_string = "https://api.twitter.com/1.1/trends/place.json?id="
         local_id = self.get_local_identifier()[local]
         session_string += local_id
-        session = OAuth1Session(ConsumerKey,
-                                ConsumerSecret,
-                                AccessToken,
-                                AccessTokenSecret)
+        session = OAuth1Session(*self.keys)
         response = session.get(session_string)
         if response.__dict__['status_code'] == 200:
             local_trends = json.loads(response.text)[0]["trends"]
@@ -133,25 +161,62 @@ class Bot():
             hashtags = []
         return hashtags
 
+    def search(self, hashtag, num_tweets):
+        """
+        Method that returns (at most) "num_tweets"
+        tweets with the hashtag "hashtag".
+
+        :type hashtag: str
+        :type num_tweets: int
+        :rtype: list of tweepy.Status
+        """
+        return list(tweepy.Cursor(self.api.search,
+                                  q=hashtag).items(num_tweets))
+
+    def engage_tweet(self, tweet, retweet=False):
+        """
+        Method to like "tweet", follow its user and, with
+        "retweet", retweet it. It returns False if the
+        twitter API refuses one of them.
+
+        :type tweet: tweepy.Status
+        :type retweet: boolean
+        :rtype: boolean
+        """
+        try:
+            tweet.favorite()
+            tweet.user.follow()
+            if retweet:
+                tweet.retweet()
+        except tweepy.TweepError as e:
+            print(e.reason)
+            return False
+        return True
+
     def curator_writer(self,
                        num_tweets,
                        show_tweets=10,
-                       num_hashtags=5):
+                       num_hashtags=5,
+                       pre_generate=True):
         """
         Method to write "num_tweets" tweets. Here I use a loop
         to get an input to the user to choose one tweet.
         At the end of the loop the method write a txt file with
         all the tweets. We use the trending hashtags and the bot's
-        frieds to compose the tweet.
+        frieds to compose the tweet. With "pre_generate" the
+        tweets are generated in the background while the user
+        reads (see CandidatePool).
 
         :type num_tweets: int
         :type num_hashtags: int
+        :type pre_generate: boolean
         :rtype: str
         """
         saved_tweets = []
-        tg = TweetGenerator(text_path=self.corpus,
-                            black_list=self.black_list,
-                            train=False)
+        if pre_generate:
+            tg = CandidatePool(self.get_generator(), size=show_tweets)
+        else:
+            tg = self.get_generator()
         while len(saved_tweets) < num_tweets:
             print(('=-=' * 5))
             print("You have {} saved tweets so far.".format(len(saved_tweets)))
@@ -194,6 +259,8 @@ class Bot():
                     break
             if user_choice >= 0:
                 saved_tweets.append(tweets[user_choice])
+        if pre_generate:
+            tg.stop()
         draft_folder = os.path.join(os.getcwd(), "twitter_draft")
         filename = os.path.join(draft_folder, get_date_and_time() + ".txt")
         if not os.path.exists(draft_folder):
@@ -263,23 +330,28 @@ class Bot():
               first_part='<eos>',
               num_hashtags=5,
               minutes_pause=60,
-              publish=True):
+              publish=True,
+              decoding="best_of",
+              num_candidates=10):
         """
         Method to write "num_tweets" tweets, using the string
         "first part" as the begining of the tweet and
         using "num_hashtags"  hashtags
         Each tweet is posted after a pause of
         "minutes_pause" minutes (default is one hour).
+        Since nobody chooses the tweets, by default each tweet
+        is the most likely of "num_candidates" tweets
+        (see the "decoding" of "generate_tweet_list").
 
         :type num_tweets: int
         :type num_hashtags: int
         :type minutes_pause: int
         :type publish: boolean
+        :type decoding: str
+        :type num_candidates: int
         """
         seconds_pause = minutes_pause * 60
-        tg = TweetGenerator(text_path=self.corpus,
-                            black_list=self.black_list,
-                            train=False)
+        tg = self.get_generator()
         for i in range(num_tweets):
             trends = self.api.trends_place(1)[0]['trends']
             TrendsNames = [trend['name'] for trend in trends]
@@ -290,7 +362,9 @@ class Bot():
             choice = np.random.choice(len(hashtags), num_hashtags)
             my_hashtags = [hashtags[i] for i in choice]
             tweet = tg.generate_tweet_list(starting_text=first_part,
-                                           hashtag_list=my_hashtags)[0]
+                                           hashtag_list=my_hashtags,
+                                           decoding=decoding,
+                                           num_candidates=num_candidates)[0]
             print("\nThe {} tweet is:\n".format(i), tweet)
             if publish:
                 self.api.update_status(tweet)
@@ -0,0 +1,121 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+from copy import deepcopy
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from text_processing.BatchSource import BatchSource
+
+
+def train_speed(data, config, num_batches):
+    """
+    Number of train tokens per second of the model for "config"
+    measured on "num_batches" batches (after 3 warm up steps).
+
+    :type data: DataHolder
+    :type config: Config
+    :type num_batches: int
+    :rtype: float
+    """
+    model = RNNLanguageModel(config, data)
+    batches = list(BatchSource(data.encoded_train,
+                               config.batch_size,
+                               config.num_steps))[:num_batches + 3]
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        state = sess.run(model.initial_state)
+        for step, (x, y) in enumerate(batches):
+            if step == 3:
+                start = time.time()
+            feed = {model.input_placeholder: x,
+                    model.labels_placeholder: y,
+                    model.initial_state: state,
+                    model.dropout_placeholder: config.dropout}
+            state, _ = sess.run([model.final_state, model.train_op],
+                                feed_dict=feed)
+        wall_clock = time.time() - start
+    num_tokens = (len(batches) - 3) * config.batch_size * config.num_steps
+    return num_tokens / wall_clock
+
+
+def generation_speed(data, config, num_tokens):
+    """
+    Number of tokens per second of the generation loop
+    (one token, one step and the distribution of the next token
+    for each session.run) of the model for "config".
+
+    :type data: DataHolder
+    :type config: Config
+    :type num_tokens: int
+    :rtype: float
+    """
+    gen_config = deepcopy(config)
+    gen_config.batch_size = gen_config.num_steps = 1
+    model = RNNLanguageModel(gen_config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        state = sess.run(model.initial_state)
+        token = 0
+        start = time.time()
+        for _ in range(num_tokens):
+            feed = {model.input_placeholder: [[token]],
+                    model.initial_state: state,
+                    model.dropout_placeholder: 1.0}
+            state, y_pred = sess.run([model.final_state,
+                                      model.next_prediction],
+                                     feed_dict=feed)
+            token = int(y_pred[0].argmax())
+        wall_clock = time.time() - start
+    return num_tokens / wall_clock
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "SafatleCorpus.txt"),
+                        help="corpus to train on (default=SafatleCorpus.txt)")
+    parser.add_argument("-n",
+                        "--num_batches",
+                        type=int,
+                        default=30,
+                        help="number of measured train steps (default=30)")
+    parser.add_argument("-g",
+                        "--num_tokens",
+                        type=int,
+                        default=300,
+                        help="number of generated tokens (default=300)")
+    parser.add_argument("-c",
+                        "--cutoffs",
+                        type=int,
+                        nargs="+",
+                        default=[2000, 10000],
+                        help="limits of the clusters (default=2000 10000)")
+    user_args = parser.parse_args()
+
+    data = DataHolder(text_path=user_args.text_path, max_noums=-1)
+    print("vocab size: {}".format(len(data.vocab)))
+    line = "{:>8}: train {:.0f} tokens/s, generation {:.0f} tokens/s"
+    for output_layer in ["dense", "adaptive"]:
+        config = Config(rnn_mode="dynamic",
+                        output_layer=output_layer,
+                        cutoffs=user_args.cutoffs)
+        train = train_speed(data, config, user_args.num_batches)
+        generation = generation_speed(data, config, user_args.num_tokens)
+        print(line.format(output_layer, train, generation))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from twitter.TweetGenerator import TweetGenerator
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+
+
+def measure(generator, number_of_tweets, batch):
+    """
+    Time to generate "number_of_tweets" tweets with one engine
+    of "generator", one tweet after the other or all the
+    tweets in one batch.
+
+    :type generator: BaseGenerator
+    :type number_of_tweets: int
+    :type batch: boolean
+    :rtype: float
+    """
+    engine = generator.load_engine()
+    start = time.time()
+    if batch:
+        generator.__generate_tweet_batch_no_unk__(engine, number_of_tweets)
+    else:
+        for i in range(number_of_tweets):
+            generator.__generate_tweet_no_unk__(engine)
+    total_time = time.time() - start
+    engine.close()
+    return total_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=10,
+                        help="number of tweets (default=10)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    tf_generator = TweetGenerator(text_path=user_args.text_path,
+                                  config=config)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, tf_generator.dataholder)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, tf_generator.dataholder)
+    np_generator = NumpyTweetGenerator(text_path=user_args.text_path,
+                                       export_path=export_path)
+    line = "{:>10}: one tweet {:.3f} s, {} sequential {:.3f} s, batch {:.3f} s"
+    n = user_args.number_of_tweets
+    for name, generator in [("tensorflow", tf_generator),
+                            ("numpy", np_generator)]:
+        print(line.format(name,
+                          measure(generator, 1, True),
+                          n,
+                          measure(generator, n, False),
+                          measure(generator, n, True)))
+
+
+if __name__ == "__main__":
+    main()
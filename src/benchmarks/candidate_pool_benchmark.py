@@ -0,0 +1,106 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import numpy as np
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+from twitter.CandidatePool import CandidatePool
+
+
+def curator_rounds(generator, rounds, show_tweets, reading_time):
+    """
+    Simulates the rounds of the curator: the user types
+    '<eos>' or one of two starting texts, gets "show_tweets"
+    tweets with two random hashtags and reads them for
+    "reading_time" seconds. It returns the time the user waited
+    for the tweets in each round (in milliseconds).
+
+    :type generator: CandidatePool or NumpyTweetGenerator
+    :type rounds: int
+    :type show_tweets: int
+    :type reading_time: float
+    :rtype: np array
+    """
+    rng = np.random.RandomState(0)
+    prefixes = ['<eos>', '<eos>', "i am", "we will"]
+    hashtags = ["#AI", "#MAGA", "#tensorflow", "#news", "#python"]
+    waits = []
+    for i in range(rounds):
+        starting_text = prefixes[rng.randint(len(prefixes))]
+        hashtag_list = [hashtags[j] for j in rng.choice(len(hashtags), 2)]
+        start = time.time()
+        generator.generate_tweet_list(number_of_tweets=show_tweets,
+                                      starting_text=starting_text,
+                                      hashtag_list=hashtag_list)
+        waits.append(1000 * (time.time() - start))
+        time.sleep(reading_time)
+    return np.array(waits)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-r",
+                        "--rounds",
+                        type=int,
+                        default=20,
+                        help="rounds of the curator (default=20)")
+    parser.add_argument("-s",
+                        "--show_tweets",
+                        type=int,
+                        default=10,
+                        help="tweets of each round (default=10)")
+    parser.add_argument("-t",
+                        "--reading_time",
+                        type=float,
+                        default=2.0,
+                        help="seconds reading each round (default=2)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    data = DataHolder(text_path=user_args.text_path)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    generator = NumpyTweetGenerator(text_path=user_args.text_path,
+                                    export_path=export_path)
+    line = "{:>10}: wait p50 {:6.1f} ms, mean {:6.1f} ms, max {:6.1f} ms"
+    waits = curator_rounds(generator,
+                           user_args.rounds,
+                           user_args.show_tweets,
+                           user_args.reading_time)
+    print(line.format("generator", np.median(waits), waits.mean(), waits.max()))
+    pool = CandidatePool(generator, size=user_args.show_tweets)
+    time.sleep(user_args.reading_time)
+    waits = curator_rounds(pool,
+                           user_args.rounds,
+                           user_args.show_tweets,
+                           user_args.reading_time)
+    pool.stop()
+    print(line.format("pool", np.median(waits), waits.mean(), waits.max()))
+    print("pool: {} tweets from the pool, {} generated on the spot".format(
+        pool.hits, pool.misses))
+
+
+if __name__ == "__main__":
+    main()
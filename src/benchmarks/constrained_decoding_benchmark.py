@@ -0,0 +1,132 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import numpy as np
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from tftools.sample_functions import sample_logits
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+from twitter.functions import TweetValid
+
+
+def checked_generation(generator, engine, number_of_tweets, CharSize=140):
+    """
+    The batch generation before the logits were masked: each
+    word is sampled and then checked (unk or in the black list,
+    replaced by a noum), and the whole tweet is joined to check
+    its size. It returns the tweets and the number
+    of words that were replaced.
+
+    :type generator: NumpyTweetGenerator
+    :type engine: NumpyEngine
+    :type number_of_tweets: int
+    :type CharSize: int
+    :rtype: (list of list of str, int)
+    """
+    vocab = generator.dataholder.vocab
+    all_noums = [word for word in generator.dataholder.get_noums()
+                 if word not in generator.black_list] or ["empty list"]
+    tweets = [["<eos>"] for i in range(number_of_tweets)]
+    logits, state = generator.prefix_cache.prime(engine,
+                                                 [vocab.encode("<eos>")])
+    logits = np.repeat(logits, number_of_tweets, axis=0)
+    state = np.repeat(state, number_of_tweets, axis=0)
+    active = np.arange(number_of_tweets)
+    replaced = 0
+    while active.size > 0:
+        next_words = sample_logits(logits)
+        keep = []
+        for row, i in enumerate(active):
+            next_word = vocab.decode(int(next_words[row]))
+            condit1 = next_word == generator.dataholder.unk_token
+            condit2 = next_word in generator.black_list
+            if condit1 or condit2:
+                replaced += 1
+                next_word = all_noums[np.random.choice(len(all_noums), 1)[0]]
+            tweet = tweets[i] + [next_word]
+            tweet_as_str = " ".join(tweet)
+            if len(tweet_as_str) == CharSize:
+                tweets[i] = tweet
+                continue
+            if not TweetValid(tweet_as_str, CharNumber=CharSize):
+                continue
+            tweets[i] = tweet
+            keep.append(row)
+        active = active[keep]
+        if active.size > 0:
+            logits, state = engine.step_logits(next_words[keep], state[keep])
+    return tweets, replaced
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=50,
+                        help="number of tweets of each list (default=50)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=10,
+                        help="number of lists (default=10)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    data = DataHolder(text_path=user_args.text_path)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    # the most frequent words are in the black list
+    frequent = [data.vocab.decode(index) for index in np.argsort(model.rank)]
+    generator = NumpyTweetGenerator(text_path=user_args.text_path,
+                                    export_path=export_path,
+                                    black_list=frequent[:50])
+    engine = generator.load_engine()
+    n = user_args.number_of_tweets
+    line = "{:>8}: {:.3f} s per list, {:.0f} words/s, {:.1f} characters" + \
+        " per tweet, {:.1f} replaced words per list"
+    results = {"checked": [0.0, 0, 0, 0], "masked": [0.0, 0, 0, 0]}
+    for i in range(user_args.repeat):
+        for name in ["checked", "masked"]:
+            start = time.time()
+            if name == "checked":
+                tweets, replaced = checked_generation(generator, engine, n)
+            else:
+                tweets = generator.__generate_tweet_batch_no_unk__(engine, n)
+                replaced = 0
+            results[name][0] += time.time() - start
+            results[name][1] += sum([len(tweet) - 1 for tweet in tweets])
+            results[name][2] += sum([len(" ".join(tweet)) for tweet in tweets])
+            results[name][3] += replaced
+    for name in ["checked", "masked"]:
+        total_time, num_words, num_chars, replaced = results[name]
+        print(line.format(name,
+                          total_time / user_args.repeat,
+                          num_words / total_time,
+                          num_chars / float(n * user_args.repeat),
+                          replaced / float(user_args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
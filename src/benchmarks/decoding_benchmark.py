@@ -0,0 +1,99 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import numpy as np
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+
+
+def measure(generator, decoding, num_candidates, repeat):
+    """
+    Generates "repeat" times one tweet with the decoding "decoding".
+    It returns the time per tweet, the number of rows
+    run by the engine per tweet (the compute cost) and the mean
+    log probability of the words of the chosen tweets.
+
+    :type generator: NumpyTweetGenerator
+    :type decoding: str
+    :type num_candidates: int
+    :type repeat: int
+    :rtype: (float, float, float)
+    """
+    engine = generator.engine
+    step_logits = engine.step_logits
+    rows = [0]
+
+    def counting_step(tokens, state):
+        rows[0] += len(tokens)
+        return step_logits(tokens, state)
+    engine.step_logits = counting_step
+    total_time = 0
+    scores = []
+    for i in range(repeat):
+        start = time.time()
+        generate = generator.__generate_tweet_batch_no_unk__
+        if decoding == "sample":
+            _, score = generate(engine, 1, with_scores=True)
+        elif decoding == "best_of":
+            _, score = generate(engine, num_candidates, with_scores=True)
+        else:
+            _, score = generator.__beam_search__(engine, num_candidates)
+        total_time += time.time() - start
+        scores.append(np.max(score))
+    engine.step_logits = step_logits
+    return total_time / repeat, rows[0] / float(repeat), np.mean(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--num_candidates",
+                        type=int,
+                        default=10,
+                        help="candidates of best_of / beam size (default=10)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=10,
+                        help="number of tweets (default=10)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    data = DataHolder(text_path=user_args.text_path)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    generator = NumpyTweetGenerator(text_path=user_args.text_path,
+                                    export_path=export_path)
+    line = "{:>8}: {:.3f} s per tweet, {:.0f} engine rows per tweet," + \
+        " mean log prob of the tweet {:.3f}"
+    for decoding in ["sample", "best_of", "beam"]:
+        print(line.format(decoding, *measure(generator,
+                                             decoding,
+                                             user_args.num_candidates,
+                                             user_args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
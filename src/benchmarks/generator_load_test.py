@@ -0,0 +1,175 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tempfile
+import shutil
+import threading
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from twitter.GeneratorClient import GeneratorClient
+
+
+def load_test(socket_path, concurrency, repeat, number_of_tweets):
+    """
+    Runs "concurrency" clients of the GeneratorService at
+    "socket_path" at the same time, each one makes "repeat" requests
+    of "number_of_tweets" tweets. It returns the latencies of the
+    requests (in milliseconds) and the number of tweets per second.
+
+    :type socket_path: str
+    :type concurrency: int
+    :type repeat: int
+    :type number_of_tweets: int
+    :rtype: (np array, float)
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def client_loop():
+        client = GeneratorClient(socket_path)
+        try:
+            for i in range(repeat):
+                start = time.time()
+                client.generate_tweet_list(number_of_tweets, "i am")
+                with lock:
+                    latencies.append(1000 * (time.time() - start))
+        finally:
+            client.close()
+    threads = [threading.Thread(target=client_loop)
+               for i in range(concurrency)]
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total_time = time.time() - start
+    num_tweets = concurrency * repeat * number_of_tweets
+    return np.array(latencies), num_tweets / total_time
+
+
+def local_service(text_path, max_batch, max_wait, socket_path):
+    """
+    Starts a GeneratorService (BatchingGeneratorService if
+    max_batch > 0) at "socket_path" with random weights.
+
+    :type text_path: str
+    :type max_batch: int
+    :type max_wait: float
+    :type socket_path: str
+    :rtype: GeneratorService
+    """
+    import tensorflow as tf
+    from tftools.Config import Config
+    from tftools.DataHolder import DataHolder
+    from tftools.RNNLanguageModel import RNNLanguageModel
+    from tftools.export_functions import export_checkpoint
+    from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+    from twitter.GeneratorService import GeneratorService
+    from twitter.BatchingGeneratorService import BatchingGeneratorService
+    config = Config()
+    data = DataHolder(text_path=text_path)
+    export_path = os.path.join(os.getcwd(), "checkpoints",
+                               "best_validation_numpy")
+    if not os.path.exists(export_path):
+        # a checkpoint of the training graph (random weights)
+        model = RNNLanguageModel(config, data)
+        with tf.Session(graph=model.graph) as sess:
+            tf.global_variables_initializer().run()
+            model.saver.save(sess, model.save_path)
+        export_path = export_checkpoint(config, data)
+    generator = NumpyTweetGenerator(text_path, export_path=export_path)
+    if max_batch > 0:
+        service = BatchingGeneratorService(generator, max_batch, max_wait)
+    else:
+        service = GeneratorService(generator)
+    service.start(socket_path)
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s",
+                        "--socket",
+                        type=str,
+                        default=None,
+                        help="socket of a running GeneratorService\
+                        (default=None, the test starts a plain and a\
+                        batching service with random weights)")
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-c",
+                        "--concurrency",
+                        type=int,
+                        nargs="+",
+                        default=[1, 2, 4, 8, 16],
+                        help="numbers of clients (default=1 2 4 8 16)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=2,
+                        help="tweets of each request (default=2)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=10,
+                        help="requests of each client (default=10)")
+    parser.add_argument("-b",
+                        "--max_batch",
+                        type=int,
+                        default=64,
+                        help="max_batch of the batching service (default=64)")
+    parser.add_argument("-w",
+                        "--max_wait",
+                        type=float,
+                        default=10,
+                        help="max_wait (ms) of the batching\
+                        service (default=10)")
+    user_args = parser.parse_args()
+
+    if user_args.socket is not None:
+        targets = [(user_args.socket, user_args.socket, None)]
+    else:
+        socket_folder = tempfile.mkdtemp()
+        targets = []
+        for name, max_batch in [("plain", 0),
+                                ("batching", user_args.max_batch)]:
+            socket_path = os.path.join(socket_folder, name + ".sock")
+            service = local_service(user_args.text_path,
+                                    max_batch,
+                                    user_args.max_wait / 1000.0,
+                                    socket_path)
+            targets.append((name, socket_path, service))
+    line = "{:>10} {:>3} clients: p50 {:7.1f} ms, p99 {:7.1f} ms," + \
+        " {:6.1f} tweets/s"
+    for name, socket_path, service in targets:
+        # warm up
+        GeneratorClient(socket_path).generate_tweet_list(1, "i am")
+        for concurrency in user_args.concurrency:
+            latencies, tweets_per_second = load_test(socket_path,
+                                                     concurrency,
+                                                     user_args.repeat,
+                                                     user_args.number_of_tweets)
+            print(line.format(name,
+                              concurrency,
+                              np.percentile(latencies, 50),
+                              np.percentile(latencies, 99),
+                              tweets_per_second))
+        if service is not None:
+            service.stop()
+    if user_args.socket is None:
+        shutil.rmtree(socket_folder)
+
+
+if __name__ == "__main__":
+    main()
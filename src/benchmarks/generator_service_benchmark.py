@@ -0,0 +1,107 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tempfile
+import shutil
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from twitter.TweetGenerator import TweetGenerator
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+from twitter.GeneratorService import GeneratorService
+from twitter.GeneratorClient import GeneratorClient
+
+
+def latency(generate, repeat):
+    """
+    Calls "generate" (one prompt) "repeat" times and returns
+    the mean latency in milliseconds.
+
+    :type generate: function
+    :type repeat: int
+    :rtype: float
+    """
+    start = time.time()
+    for i in range(repeat):
+        generate()
+    return 1000 * (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=10,
+                        help="tweets of each prompt (default=10)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=10,
+                        help="number of prompts (default=10)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    data = DataHolder(text_path=user_args.text_path)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    number = user_args.number_of_tweets
+    repeat = user_args.repeat
+
+    def cold():
+        # what each prompt paid before: new generator and new engine
+        tg = TweetGenerator(text_path=user_args.text_path, config=config)
+        tg.generate_tweet_list(number, "i am")
+        tg.close()
+    tf_generator = TweetGenerator(text_path=user_args.text_path, config=config)
+    tf_generator.generate_tweet_list(1, "i am")
+    np_service = GeneratorService(NumpyTweetGenerator(user_args.text_path,
+                                                      export_path=export_path))
+    socket_folder = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_folder, "generator.sock")
+    np_service.start(socket_path)
+    client = GeneratorClient(socket_path)
+    client.generate_tweet_list(1, "i am")
+    results = [("cold TweetGenerator", latency(cold, repeat)),
+               ("warm TweetGenerator",
+                latency(lambda: tf_generator.generate_tweet_list(number,
+                                                                 "i am"),
+                        repeat)),
+               ("warm service, in process",
+                latency(lambda: np_service.generate_tweet_list(number,
+                                                               "i am"),
+                        repeat)),
+               ("warm service, Unix socket",
+                latency(lambda: client.generate_tweet_list(number, "i am"),
+                        repeat))]
+    client.close()
+    np_service.stop()
+    shutil.rmtree(socket_folder)
+    for name, value in results:
+        print("{:>26}: {:.1f} ms per prompt ({} tweets)".format(name,
+                                                              value,
+                                                              number))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+from copy import deepcopy
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+
+
+def measure(data, config, inference, num_tokens):
+    """
+    Builds the generation model (batch_size = num_steps = 1),
+    restores the checkpoint and generates "num_tokens" tokens
+    (greedy). It returns the time to build the graph and
+    restore the variables, the number of ops of the
+    graph and the number of tokens per second.
+
+    :type data: DataHolder
+    :type config: Config
+    :type inference: boolean
+    :type num_tokens: int
+    :rtype: (float, int, float)
+    """
+    gen_config = deepcopy(config)
+    gen_config.batch_size = gen_config.num_steps = 1
+    start = time.time()
+    model = RNNLanguageModel(gen_config, data, inference=inference)
+    sess = tf.Session(graph=model.graph)
+    model.saver.restore(sess, model.save_path)
+    build_time = time.time() - start
+    num_ops = len(model.graph.get_operations())
+    state = sess.run(model.initial_state)
+    token = 0
+    start = time.time()
+    for _ in range(num_tokens):
+        feed = {model.input_placeholder: [[token]],
+                model.initial_state: state,
+                model.dropout_placeholder: 1.0}
+        state, y_pred = sess.run([model.final_state, model.next_prediction],
+                                 feed_dict=feed)
+        token = int(y_pred[0].argmax())
+    tokens_per_second = num_tokens / (time.time() - start)
+    sess.close()
+    return build_time, num_ops, tokens_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-g",
+                        "--num_tokens",
+                        type=int,
+                        default=500,
+                        help="number of generated tokens (default=500)")
+    user_args = parser.parse_args()
+
+    data = DataHolder(text_path=user_args.text_path, max_noums=-1)
+    config = Config()
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    line = "{:>9}: build + restore {:.2f} s, {:>4} ops, {:.0f} tokens/s"
+    for inference in [False, True]:
+        build_time, num_ops, speed = measure(data,
+                                             config,
+                                             inference,
+                                             user_args.num_tokens)
+        name = "inference" if inference else "full"
+        print(line.format(name, build_time, num_ops, speed))
+
+
+if __name__ == "__main__":
+    main()
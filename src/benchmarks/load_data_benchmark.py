@@ -0,0 +1,144 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import resource
+import multiprocessing
+import numpy as np
+from textblob import TextBlob
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.DataHolder import DataHolder
+from text_processing.Vocab import Vocab
+
+
+class LegacyLoader(DataHolder):
+    """
+    DataHolder with the old load_data: the train file is read
+    twice, every split is first stored in a list of ints and
+    the noums are extracted while the lines are read.
+    """
+    def read_line_eos_noums(self,
+                            path):
+        """
+        Generator.
+        Similar as the function read_line_eos from
+        the text_mani module. The only diference here
+        is that we keep track of all the noums.
+
+        :type path: str
+        """
+        for line in open(path):
+            if len(self.all_noums) <= self.max_noums:
+                blob = TextBlob(line)
+                noums = set(blob.noun_phrases)
+                self.all_noums = self.all_noums.union(noums)
+            for word in line.split():
+                yield word
+            yield '<eos>'
+
+    def load_data(self, debug):
+        self.all_noums = set([])
+        self.vocab = Vocab()
+        self.vocab.read_words(self.read_line_eos_noums(self.path_train))
+        self.encoded_train = np.array(
+            [self.vocab.encode(word)
+             for word in self.read_line_eos_noums(self.path_train)],
+            dtype=np.int32)
+        self.encoded_valid = np.array(
+            [self.vocab.encode(word)
+             for word in self.read_line_eos_noums(self.path_valid)],
+            dtype=np.int32)
+        self.encoded_test = np.array(
+            [self.vocab.encode(word)
+             for word in self.read_line_eos_noums(self.path_test)],
+            dtype=np.int32)
+        self.all_noums = list(self.all_noums)
+
+
+def current_rss():
+    """
+    Resident memory of this process in kB (Linux only),
+    falling back to the peak RSS on other systems.
+
+    :rtype: int
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(loader_name, text_path, max_noums, queue):
+    """
+    Runs one loader in a fresh process (with its noums) and sends
+    back the wall-clock time and the growth of the peak RSS (in MB).
+
+    :type loader_name: str
+    :type text_path: str
+    :type max_noums: int
+    :type queue: multiprocessing Queue
+    """
+    loader = {"legacy": LegacyLoader, "streaming": DataHolder}[loader_name]
+    rss_before = current_rss()
+    start = time.time()
+    data = loader(text_path=text_path, max_noums=max_noums, use_cache=False)
+    data.get_noums()
+    wall_clock = time.time() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((wall_clock, (rss_after - rss_before) / 1024.))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus to load (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--max_noums",
+                        type=int,
+                        default=100,
+                        help="max noums for the DataHolder (default=100)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=3,
+                        help="number of runs for each loader (default=3)")
+    user_args = parser.parse_args()
+
+    # creates the CLEAN*.txt files outside the measured runs
+    DataHolder(text_path=user_args.text_path, max_noums=-1, use_cache=False)
+    context = multiprocessing.get_context("spawn")
+    for loader_name in ["legacy", "streaming"]:
+        results = []
+        for _ in range(user_args.repeat):
+            queue = context.Queue()
+            process = context.Process(target=measure,
+                                      args=(loader_name,
+                                            user_args.text_path,
+                                            user_args.max_noums,
+                                            queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+        wall_clock = min(result[0] for result in results)
+        rss = min(result[1] for result in results)
+        print("{:>10}: {:.2f} s, peak RSS growth {:.1f} MB".format(loader_name,
+                                                                  wall_clock,
+                                                                  rss))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import multiprocessing
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.DataHolder import DataHolder
+from text_processing.BatchSource import BatchSource
+from text_processing.Prefetcher import Prefetcher
+
+
+def memory_status():
+    """
+    Resident memory of this process in kB (Linux only):
+    the total (VmRSS) and the part that is not backed
+    by a file (RssAnon). Memory-mapped pages are backed
+    by a file, so the kernel can drop them at any time.
+
+    :rtype: (int, int)
+    """
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ["VmRSS", "RssAnon"]:
+                status[name] = int(value.split()[0])
+    return status["VmRSS"], status["RssAnon"]
+
+
+def measure(mode, text_path, batch_size, num_steps, queue):
+    """
+    Loads the corpus in a fresh process ("memory": the encoded
+    data is kept in memory, "memmap": the encoded data is read
+    from the cache) and iterates one epoch of batches.
+    It sends back the wall-clock time of the epoch, the
+    dtype of the train data and the growth of the resident
+    memory (total and anonymous, in MB).
+
+    :type mode: str
+    :type text_path: str
+    :type batch_size: int
+    :type num_steps: int
+    :type queue: multiprocessing Queue
+    """
+    rss_before, anon_before = memory_status()
+    data = DataHolder(text_path=text_path,
+                      max_noums=-1,
+                      use_cache=mode == "memmap")
+    start = time.time()
+    batches = Prefetcher(BatchSource(data.encoded_train,
+                                     batch_size,
+                                     num_steps))
+    for x, y in batches:
+        pass
+    wall_clock = time.time() - start
+    rss_after, anon_after = memory_status()
+    queue.put((wall_clock,
+               data.encoded_train.dtype.name,
+               (rss_after - rss_before) / 1024.,
+               (anon_after - anon_before) / 1024.))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus to load (default=TrumpTweets.txt)")
+    parser.add_argument("-b",
+                        "--batch_size",
+                        type=int,
+                        default=64,
+                        help="batch size (default=64)")
+    parser.add_argument("-s",
+                        "--num_steps",
+                        type=int,
+                        default=20,
+                        help="number of steps (default=20)")
+    user_args = parser.parse_args()
+
+    # creates the CLEAN*.txt files and the cache outside the measured runs
+    DataHolder(text_path=user_args.text_path, max_noums=-1)
+    context = multiprocessing.get_context("spawn")
+    for mode in ["memory", "memmap"]:
+        queue = context.Queue()
+        process = context.Process(target=measure,
+                                  args=(mode,
+                                        user_args.text_path,
+                                        user_args.batch_size,
+                                        user_args.num_steps,
+                                        queue))
+        process.start()
+        wall_clock, dtype, rss, anon = queue.get()
+        process.join()
+        line = "{:>7} ({}): epoch {:.2f} s, RSS growth {:.1f} MB"
+        line += ", anonymous RSS growth {:.1f} MB"
+        print(line.format(mode, dtype, wall_clock, rss, anon))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import argparse
+import subprocess
+import sys
+import inspect
+import time
+import numpy as np
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.NumpyEngine import NumpyEngine
+from tftools.TFEngine import TFEngine
+from tftools.export_functions import export_checkpoint
+
+
+def import_time(module):
+    """
+    Time to start a new python process that imports
+    the module "module" (the import of the engine).
+
+    :type module: str
+    :rtype: float
+    """
+    start = time.time()
+    subprocess.check_call([sys.executable, "-c", "import " + module],
+                          cwd=parentdir)
+    return time.time() - start
+
+
+def measure(make_engine, num_tokens):
+    """
+    Loads the engine given by "make_engine" and generates
+    "num_tokens" tokens (greedy). It returns the time to load
+    the engine and the number of tokens per second.
+
+    :type make_engine: function
+    :type num_tokens: int
+    :rtype: (float, float)
+    """
+    start = time.time()
+    engine = make_engine()
+    load_time = time.time() - start
+    state = engine.zero_state(1)
+    token = 0
+    start = time.time()
+    for _ in range(num_tokens):
+        y_pred, state = engine.step([token], state)
+        token = int(np.argmax(y_pred[0]))
+    tokens_per_second = num_tokens / (time.time() - start)
+    engine.close()
+    return load_time, tokens_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-g",
+                        "--num_tokens",
+                        type=int,
+                        default=500,
+                        help="number of generated tokens (default=500)")
+    user_args = parser.parse_args()
+
+    data = DataHolder(text_path=user_args.text_path, max_noums=-1)
+    config = Config()
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    engines = [("tensorflow",
+                "tftools.TFEngine",
+                lambda: TFEngine(config, data)),
+               ("numpy",
+                "tftools.NumpyEngine",
+                lambda: NumpyEngine(export_path))]
+    line = "{:>10}: import {:.2f} s, load {:.2f} s, {:.0f} tokens/s"
+    for name, module, make_engine in engines:
+        load_time, speed = measure(make_engine, user_args.num_tokens)
+        print(line.format(name, import_time(module), load_time, speed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import multiprocessing
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.export_functions import export_checkpoint
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+from twitter.ParallelTweetGenerator import ParallelTweetGenerator
+
+
+def throughput(generator, number_of_tweets, repeat):
+    """
+    Generates "repeat" lists of "number_of_tweets" tweets
+    and returns the number of tweets per second.
+
+    :type generator: NumpyTweetGenerator or ParallelTweetGenerator
+    :type number_of_tweets: int
+    :type repeat: int
+    :rtype: float
+    """
+    start = time.time()
+    for i in range(repeat):
+        generator.generate_tweet_list(number_of_tweets, "i am")
+    return number_of_tweets * repeat / (time.time() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-w",
+                        "--workers",
+                        type=int,
+                        nargs="+",
+                        default=[1, 2, 4, 8],
+                        help="numbers of worker processes (default=1 2 4 8)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=64,
+                        help="tweets of each list (default=64)")
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=5,
+                        help="number of lists (default=5)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    data = DataHolder(text_path=user_args.text_path)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, data)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, data)
+    print("{} cores".format(multiprocessing.cpu_count()))
+    generator = NumpyTweetGenerator(user_args.text_path,
+                                    export_path=export_path)
+    base = throughput(generator,
+                      user_args.number_of_tweets,
+                      user_args.repeat)
+    print("one process: {:.1f} tweets/s".format(base))
+    line = "{:>2} workers: start {:.2f} s, {:.1f} tweets/s ({:.2f}x)"
+    for num_workers in user_args.workers:
+        start = time.time()
+        generator = ParallelTweetGenerator(user_args.text_path,
+                                           export_path=export_path,
+                                           num_workers=num_workers)
+        # the first list waits for the workers
+        generator.generate_tweet_list(num_workers, "i am")
+        start_time = time.time() - start
+        value = throughput(generator,
+                           user_args.number_of_tweets,
+                           user_args.repeat)
+        generator.close()
+        print(line.format(num_workers, start_time, value, value / base))
+
+
+if __name__ == "__main__":
+    main()
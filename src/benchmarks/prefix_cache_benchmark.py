@@ -0,0 +1,107 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.PrefixCache import PrefixCache
+from tftools.export_functions import export_checkpoint
+from twitter.TweetGenerator import TweetGenerator
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+
+
+def measure(generator, starting_text, num_requests, number_of_tweets, max_size):
+    """
+    Time of "num_requests" lists of "number_of_tweets" tweets
+    with the same starting text, with a prefix cache of
+    size "max_size" (with size 0 nothing is cached).
+    It returns the time per list and the time per list
+    spent in the steps of the engine.
+
+    :type generator: BaseGenerator
+    :type starting_text: str
+    :type num_requests: int
+    :type number_of_tweets: int
+    :type max_size: int
+    :rtype: (float, float)
+    """
+    generator.prefix_cache = PrefixCache(max_size=max_size)
+    engine = generator.load_engine()
+    step = engine.step_logits
+    step_time = [0.0]
+
+    def timed_step(tokens, state):
+        start = time.time()
+        result = step(tokens, state)
+        step_time[0] += time.time() - start
+        return result
+    engine.step_logits = timed_step
+    start = time.time()
+    for i in range(num_requests):
+        generator.__generate_tweet_batch_no_unk__(engine,
+                                                  number_of_tweets,
+                                                  starting_text)
+    total_time = time.time() - start
+    engine.step_logits = step
+    engine.close()
+    return total_time / num_requests, step_time[0] / num_requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus of the model (default=TrumpTweets.txt)")
+    parser.add_argument("-s",
+                        "--starting_text",
+                        type=str,
+                        default="i will make america great again and we will win",
+                        help="starting text of the tweets")
+    parser.add_argument("-r",
+                        "--num_requests",
+                        type=int,
+                        default=20,
+                        help="number of lists of tweets (default=20)")
+    parser.add_argument("-n",
+                        "--number_of_tweets",
+                        type=int,
+                        default=10,
+                        help="number of tweets of each list (default=10)")
+    user_args = parser.parse_args()
+
+    config = Config()
+    tf_generator = TweetGenerator(text_path=user_args.text_path,
+                                  config=config)
+    # a checkpoint of the training graph (random weights)
+    model = RNNLanguageModel(config, tf_generator.dataholder)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        model.saver.save(sess, model.save_path)
+    export_path = export_checkpoint(config, tf_generator.dataholder)
+    np_generator = NumpyTweetGenerator(text_path=user_args.text_path,
+                                       export_path=export_path)
+    line = "{:>10} {:>8}: {:.4f} s per list ({:.4f} s in engine steps)"
+    for name, generator in [("tensorflow", tf_generator),
+                            ("numpy", np_generator)]:
+        for cache_name, max_size in [("no cache", 0), ("cache", 128)]:
+            total, steps = measure(generator,
+                                   user_args.starting_text,
+                                   user_args.num_requests,
+                                   user_args.number_of_tweets,
+                                   max_size)
+            print(line.format(name, cache_name, total, steps))
+
+
+if __name__ == "__main__":
+    main()
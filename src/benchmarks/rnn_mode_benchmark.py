@@ -0,0 +1,87 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from text_processing.BatchSource import BatchSource
+
+
+def measure(data, config, num_batches):
+    """
+    Builds the model for "config" and runs "num_batches"
+    training steps (after 3 warm up steps).
+    It returns the time to build the graph, the number
+    of ops of the graph and the number of steps per second.
+
+    :type data: DataHolder
+    :type config: Config
+    :type num_batches: int
+    :rtype: (float, int, float)
+    """
+    start = time.time()
+    model = RNNLanguageModel(config, data)
+    build_time = time.time() - start
+    num_ops = len(model.graph.get_operations())
+    batches = list(BatchSource(data.encoded_train,
+                               config.batch_size,
+                               config.num_steps))[:num_batches + 3]
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        state = sess.run(model.initial_state)
+        for step, (x, y) in enumerate(batches):
+            if step == 3:
+                start = time.time()
+            feed = {model.input_placeholder: x,
+                    model.labels_placeholder: y,
+                    model.initial_state: state,
+                    model.dropout_placeholder: config.dropout}
+            state, _ = sess.run([model.final_state, model.train_op],
+                                feed_dict=feed)
+        steps_per_second = (len(batches) - 3) / (time.time() - start)
+    return build_time, num_ops, steps_per_second
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus to train on (default=TrumpTweets.txt)")
+    parser.add_argument("-s",
+                        "--num_steps",
+                        type=int,
+                        nargs="+",
+                        default=[14, 35, 70],
+                        help="values of num_steps (default=14 35 70)")
+    parser.add_argument("-n",
+                        "--num_batches",
+                        type=int,
+                        default=50,
+                        help="number of measured steps (default=50)")
+    user_args = parser.parse_args()
+
+    data = DataHolder(text_path=user_args.text_path, max_noums=-1)
+    line = "{:>7} num_steps={:>3}: build {:.2f} s, {:>5} ops, {:.1f} steps/s"
+    for num_steps in user_args.num_steps:
+        for rnn_mode in ["static", "dynamic"]:
+            config = Config(num_steps=num_steps, rnn_mode=rnn_mode)
+            build_time, num_ops, steps = measure(data,
+                                                 config,
+                                                 user_args.num_batches)
+            print(line.format(rnn_mode, num_steps, build_time, num_ops, steps))
+
+
+if __name__ == "__main__":
+    main()
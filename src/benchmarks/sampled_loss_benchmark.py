@@ -0,0 +1,91 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from tftools.train_functions import run_epoch
+from text_processing.BatchSource import BatchSource
+
+
+def measure(data, config, num_batches):
+    """
+    Trains the model for "config" on the first "num_batches"
+    batches of the train data (after 3 warm up steps) and
+    computes the exact perplexity of the valid data.
+    It returns the number of steps per second
+    and the valid perplexity.
+
+    :type data: DataHolder
+    :type config: Config
+    :type num_batches: int
+    :rtype: (float, float)
+    """
+    model = RNNLanguageModel(config, data)
+    batches = list(BatchSource(data.encoded_train,
+                               config.batch_size,
+                               config.num_steps))[:num_batches + 3]
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        state = sess.run(model.initial_state)
+        for step, (x, y) in enumerate(batches):
+            if step == 3:
+                start = time.time()
+            feed = {model.input_placeholder: x,
+                    model.labels_placeholder: y,
+                    model.initial_state: state,
+                    model.dropout_placeholder: config.dropout}
+            state, _ = sess.run([model.final_state, model.train_op],
+                                feed_dict=feed)
+        steps_per_second = (len(batches) - 3) / (time.time() - start)
+        valid_pp = run_epoch(model, sess, data.encoded_valid, verbose=0)
+    return steps_per_second, valid_pp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-p",
+                        "--text_path",
+                        type=str,
+                        default=os.path.join(parentdir,
+                                             "data",
+                                             "TrumpTweets.txt"),
+                        help="corpus to train on (default=TrumpTweets.txt)")
+    parser.add_argument("-n",
+                        "--num_batches",
+                        type=int,
+                        default=50,
+                        help="number of measured steps (default=50)")
+    parser.add_argument("-s",
+                        "--num_sampled",
+                        type=int,
+                        default=64,
+                        help="number of sampled words (default=64)")
+    parser.add_argument("-m",
+                        "--rnn_mode",
+                        type=str,
+                        default="dynamic",
+                        help="static or dynamic (default=dynamic)")
+    user_args = parser.parse_args()
+
+    data = DataHolder(text_path=user_args.text_path, max_noums=-1)
+    print("vocab size: {}".format(len(data.vocab)))
+    line = "{:>15}: {:.1f} steps/s, valid perplexity {:.1f}"
+    for loss in ["softmax", "sampled_softmax", "nce"]:
+        config = Config(loss=loss,
+                        num_sampled=user_args.num_sampled,
+                        rnn_mode=user_args.rnn_mode)
+        steps, valid_pp = measure(data, config, user_args.num_batches)
+        print(line.format(loss, steps, valid_pp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import argparse
+import sys
+import inspect
+import timeit
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.sample_functions import sample_logits
+
+
+def old_sample(input_array, temperature=1.0):
+    """
+    The function "sample" of utils before the module
+    sample_functions (it is used with the softmax of the model).
+
+    :type input_array: np array
+    :type temperature: float
+    :rtype: int
+    """
+    input_array = np.log(np.asarray(input_array, dtype=np.float64))
+    input_array = input_array / temperature
+    input_array = np.exp(input_array) / np.sum(np.exp(input_array))
+    return np.argmax(np.random.multinomial(1, input_array, 1))
+
+
+def softmax(logits):
+    """
+    Softmax of each row of "logits" (float32, as the model).
+
+    :type logits: np array
+    :rtype: np array
+    """
+    probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r",
+                        "--repeat",
+                        type=int,
+                        default=50,
+                        help="number of calls of each function (default=50)")
+    parser.add_argument("-b",
+                        "--batch_size",
+                        type=int,
+                        default=10,
+                        help="number of rows of a batch (default=10)")
+    user_args = parser.parse_args()
+    rng = np.random.RandomState(0)
+    # (name, function of the logits of one row or of a batch)
+    one_row = [("old sample", lambda x: old_sample(softmax(x)[0], 0.8)),
+               ("logits", lambda x: sample_logits(x[0], 0.8, rng=rng)),
+               ("top_k=40", lambda x: sample_logits(x[0], 0.8, top_k=40,
+                                                     rng=rng)),
+               ("top_p=0.9", lambda x: sample_logits(x[0], 0.8, top_p=0.9,
+                                                      rng=rng))]
+    batch = [("old sample", lambda x: [old_sample(row, 0.8)
+                                       for row in softmax(x)]),
+             ("logits", lambda x: sample_logits(x, 0.8, rng=rng)),
+             ("top_k=40", lambda x: sample_logits(x, 0.8, top_k=40, rng=rng)),
+             ("top_p=0.9", lambda x: sample_logits(x, 0.8, top_p=0.9,
+                                                    rng=rng))]
+    line = "V={:>6} {:>9} {:>10}: {:.3f} ms"
+    for vocab_size in [10000, 50000, 100000]:
+        logits = (rng.randn(user_args.batch_size, vocab_size) * 3)
+        logits = logits.astype(np.float32)
+        for rows, functions in [("1 row", one_row),
+                                ("{} rows".format(user_args.batch_size), batch)]:
+            for name, function in functions:
+                seconds = timeit.timeit(lambda: function(logits),
+                                        number=user_args.repeat)
+                print(line.format(vocab_size,
+                                  rows,
+                                  name,
+                                  1000 * seconds / user_args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import argparse
+import sys
+import inspect
+import time
+import numpy as np
+import tensorflow as tf
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.Config import Config
+from tftools.DataHolder import DataHolder
+from tftools.RNNLanguageModel import RNNLanguageModel
+from text_processing.functions import ptb_iterator
+
+
+def model_size(model):
+    """
+    Number of trainable parameters of the model.
+
+    :type model: RNNLanguageModel
+    :rtype: int
+    """
+    with model.graph.as_default():
+        shapes = [variable.get_shape().as_list()
+                  for variable in tf.trainable_variables()]
+    return int(sum(np.prod(shape) for shape in shapes))
+
+
+def train_speed(model, steps):
+    """
+    Tokens per second of "steps" training steps (after one
+    warm up step) on the train data of the model.
+
+    :type model: RNNLanguageModel
+    :type steps: int
+    :rtype: float
+    """
+    config = model.config
+    batches = ptb_iterator(model.encoded_train,
+                           config.batch_size,
+                           config.num_steps)
+    with tf.Session(graph=model.graph) as sess:
+        tf.global_variables_initializer().run()
+        state = sess.run(model.initial_state)
+        start = None
+        for step, (x, y) in enumerate(batches):
+            if step == 1:
+                start = time.time()
+            if step == steps + 1:
+                break
+            feed = {model.input_placeholder: x,
+                    model.labels_placeholder: y,
+                    model.initial_state: state,
+                    model.dropout_placeholder: config.dropout}
+            state, _ = sess.run([model.final_state, model.train_op],
+                                feed_dict=feed)
+        elapsed = time.time() - start
+    tokens = (step - 1) * config.batch_size * config.num_steps
+    return tokens / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-c",
+                        "--min_count",
+                        type=int,
+                        default=3,
+                        help="min count of the pruned vocab (default=3)")
+    parser.add_argument("-m",
+                        "--max_vocab",
+                        type=int,
+                        default=10000,
+                        help="max size of the pruned vocab (default=10000)")
+    parser.add_argument("-s",
+                        "--steps",
+                        type=int,
+                        default=100,
+                        help="number of training steps (default=100)")
+    user_args = parser.parse_args()
+
+    data_path = os.path.join(parentdir, "data")
+    corpora = [("PTB", data_path),
+               ("Trump", os.path.join(data_path, "TrumpTweets.txt")),
+               ("Safatle", os.path.join(data_path, "SafatleCorpus.txt"))]
+    settings = [("full", 1, None),
+                ("pruned", user_args.min_count, user_args.max_vocab)]
+    config = Config()
+    for corpus_name, text_path in corpora:
+        for setting_name, min_count, max_vocab in settings:
+            data = DataHolder(text_path=text_path,
+                              min_count=min_count,
+                              max_vocab=max_vocab)
+            model = RNNLanguageModel(config, data)
+            size = model_size(model)
+            speed = train_speed(model, user_args.steps)
+            print("{:>8} {:>7}: vocab = {:>6}, params = {:>9} ({:.1f} MB), "
+                  "{:.0f} tokens/sec".format(corpus_name,
+                                             setting_name,
+                                             len(data.vocab),
+                                             size,
+                                             size * 4 / 2. ** 20,
+                                             speed))
+
+
+if __name__ == "__main__":
+    main()
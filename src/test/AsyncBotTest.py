@@ -0,0 +1,146 @@
+import unittest
+import os
+import sys
+import inspect
+import asyncio
+import threading
+import time
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utils import run_test
+from agent.AsyncBot import AsyncBot, gather_tasks
+
+
+class StubAPI(object):
+    """
+    Twitter API that only keeps the posted tweets.
+    """
+    def __init__(self):
+        self.posted = []
+
+    def update_status(self, tweet):
+        self.posted.append(tweet)
+
+    def trends_place(self, local):
+        return [{"trends": [{"name": "#AI"},
+                            {"name": "#tensorflow"},
+                            {"name": "news"}]}]
+
+
+class StubBot(object):
+    """
+    Bot without the twitter API: the tweets of "search"
+    are numbers and "engage_tweet" keeps the tweets
+    (it fails with the tweet "fail").
+    """
+    def __init__(self, fail=None):
+        self.api = StubAPI()
+        self.hashtag_search = ["#AI"]
+        self.fail = fail
+        self.engaged = []
+        self.lock = threading.Lock()
+
+    def search(self, hashtag, num_tweets):
+        return list(range(num_tweets))
+
+    def engage_tweet(self, tweet, retweet=False):
+        if tweet == self.fail:
+            raise RuntimeError("refused")
+        with self.lock:
+            self.engaged.append((tweet, retweet))
+        return True
+
+
+class StubGenerator(object):
+    """
+    GeneratorService that writes the same tweet with the hashtags.
+    """
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        tweet = " ".join(["hello"] + hashtag_list)
+        return [tweet] * number_of_tweets
+
+
+class AsyncBotTest(unittest.TestCase):
+    """
+    Class that test the AsyncBot with a stub bot
+    (no twitter keys) and a stub generator.
+    """
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+
+    def test_schedule(self):
+        """
+        Testing if a scheduled coroutine runs after its delay and
+        if a task cancelled before the delay never creates it
+        """
+        bot = AsyncBot(StubBot(), StubGenerator())
+        calls = []
+
+        async def record(value):
+            calls.append((value, time.time()))
+            return value
+
+        async def main():
+            start = time.time()
+            first = bot.schedule(0.05, record, 1)
+            second = bot.schedule(10, record, 2)
+            result = await first
+            second.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await second
+            return start, result
+        start, result = self.loop.run_until_complete(main())
+        self.assertEqual(result, 1)
+        self.assertEqual([value for value, _ in calls], [1])
+        self.assertTrue(calls[0][1] - start >= 0.04)
+
+    def test_write_and_engage(self):
+        """
+        Testing if two bots write and engage at the
+        same time in one event loop
+        """
+        writer = AsyncBot(StubBot(), StubGenerator())
+        engager = AsyncBot(StubBot(), StubGenerator())
+        tweets, engaged = self.loop.run_until_complete(
+            gather_tasks([writer.write(3,
+                                       num_hashtags=2,
+                                       minutes_pause=0.0005),
+                          engager.engage(num_tweets_to_see=3,
+                                         minutes_paused=0.0005)]))
+        self.assertEqual(len(tweets), 3)
+        self.assertEqual(writer.bot.api.posted, tweets)
+        for tweet in tweets:
+            self.assertTrue(tweet.startswith("hello #"), msg=tweet)
+        self.assertEqual(engaged, 3)
+        self.assertEqual(sorted(engager.bot.engaged),
+                         [(0, True), (1, False), (2, False)])
+
+    def test_engage_error(self):
+        """
+        Testing if the tweets still waiting are cancelled
+        when the engagement with one tweet fails
+        """
+        bot = AsyncBot(StubBot(fail=0), StubGenerator())
+        with self.assertRaises(RuntimeError):
+            self.loop.run_until_complete(bot.engage(num_tweets_to_see=4,
+                                                    minutes_paused=0.001))
+        self.loop.run_until_complete(asyncio.sleep(0.3))
+        self.assertEqual(bot.bot.engaged, [])
+
+
+if __name__ == "__main__":
+    run_test(AsyncBotTest,
+             "\n=== Running test for the AsyncBot ===\n")
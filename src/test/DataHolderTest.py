@@ -0,0 +1,270 @@
+import unittest
+import os
+import sys
+import inspect
+import shutil
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utils import run_test
+from tftools.DataHolder import DataHolder
+from text_processing.functions import read_line_eos
+from text_processing.Vocab import Vocab
+from text_processing.noum_functions import extract_noums, load_noums
+from text_processing.cache_functions import hash_state, read_appends
+
+
+class DataHolderTest(unittest.TestCase):
+    """
+    Class that test the preprocessing and
+    the cache of the class DataHolder
+    """
+    @classmethod
+    def setUpClass(cls):
+        data_path = os.path.join(parentdir, 'data')
+        cls.text_path = os.path.join(data_path, 'toy_tweets.txt')
+        cls.cache_folder = os.path.join(data_path, "dataholder_cache")
+        cls.clean_paths = [cls.text_path[:-4] + end
+                           for end in ["CLEAN.txt", "CLEANTRAIN.txt",
+                                       "CLEANVALID.txt", "CLEANTEST.txt"]]
+
+    @classmethod
+    def tearDown(cls):
+        for path in cls.clean_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.exists(cls.cache_folder):
+            shutil.rmtree(cls.cache_folder)
+
+    def test_single_pass(self):
+        """
+        Testing if reading each file only once gives the
+        same vocabulary and encoding as reading the train
+        file twice with the class Vocab
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path,
+                          use_cache=False)
+        vocab = Vocab()
+        vocab.read_words(read_line_eos(data.path_train))
+        self.assertEqual(data.vocab.word2index, vocab.word2index)
+        freq = [vocab.word_freq[vocab.decode(index)]
+                for index in range(len(vocab))]
+        self.assertEqual(list(data.vocab.word_freq), freq)
+        self.assertEqual(data.vocab.total_words, vocab.total_words)
+        for path, result in [(data.path_train, data.encoded_train),
+                             (data.path_valid, data.encoded_valid),
+                             (data.path_test, data.encoded_test)]:
+            expected = [vocab.encode(word) for word in read_line_eos(path)]
+            self.assertEqual(result.dtype, np.int32)
+            self.assertEqual(list(result), expected)
+
+    def test_pruning(self):
+        """
+        Testing if the words removed by "max_vocab" are
+        encoded as unk and if the vocab is ordered by frequency
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path,
+                          use_cache=False)
+        pruned = DataHolder(text_path=DataHolderTest.text_path,
+                            use_cache=False,
+                            max_vocab=10)
+        self.assertEqual(len(pruned.vocab), 10)
+        freq = pruned.vocab.word_freq[1:]
+        self.assertTrue(np.all(freq[:-1] >= freq[1:]),
+                        msg="not sorted: {}".format(freq))
+        self.assertEqual(pruned.vocab.word_freq.sum(),
+                         data.vocab.word_freq.sum())
+        full = data.vocab.decode_many(data.encoded_train)
+        kept = pruned.vocab.decode_many(pruned.encoded_train)
+        for word, result in zip(full, kept):
+            if word in pruned.vocab.word2index:
+                self.assertEqual(result, word)
+            else:
+                self.assertEqual(result, pruned.unk_token)
+
+    def test_cache(self):
+        """
+        Testing if the second DataHolder for the same
+        corpus reads the same data from the cache
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path)
+        self.assertTrue(os.path.exists(data.cache_path),
+                        msg="no cache in {}".format(data.cache_path))
+        cached = DataHolder(text_path=DataHolderTest.text_path)
+        self.assertEqual(cached.cache_path, data.cache_path)
+        self.assertEqual(len(cached.vocab), len(data.vocab))
+        self.assertEqual(cached.vocab.word2index, data.vocab.word2index)
+        self.assertEqual(cached.get_noums(), data.get_noums())
+        for before, after in [(data.encoded_train, cached.encoded_train),
+                              (data.encoded_valid, cached.encoded_valid),
+                              (data.encoded_test, cached.encoded_test)]:
+            self.assertTrue(np.array_equal(before, after),
+                            msg="{} != {}".format(before, after))
+
+    def test_memmap(self):
+        """
+        Testing if the cached splits are memory-mapped token
+        files with the compact dtype and the same indexes as
+        the ones kept in memory
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path,
+                          use_cache=False)
+        for _ in range(2):
+            cached = DataHolder(text_path=DataHolderTest.text_path,
+                                max_vocab=10)
+            pruned = DataHolder(text_path=DataHolderTest.text_path,
+                                use_cache=False,
+                                max_vocab=10)
+            for before, after in [(pruned.encoded_train, cached.encoded_train),
+                                  (pruned.encoded_valid, cached.encoded_valid),
+                                  (pruned.encoded_test, cached.encoded_test)]:
+                self.assertIsInstance(after, np.memmap)
+                self.assertEqual(after.dtype, np.uint16)
+                self.assertTrue(np.array_equal(before, after),
+                                msg="{} != {}".format(before, after))
+        self.assertEqual(list(cached.vocab.word_freq),
+                         list(pruned.vocab.word_freq))
+        self.assertEqual(cached.vocab.total_words, data.vocab.total_words)
+
+    def test_append(self):
+        """
+        Testing if appending lines gives the same vocabulary
+        and encoding as preprocessing the whole corpus again,
+        with and without the cache
+        """
+        new_lines = ["Make America GREAT again!!! zzzqqq\n",
+                     "@Somebody visit http://t.co/abc now",
+                     "zzzqqq 123 times"]
+        for use_cache in [True, False]:
+            data = DataHolder(text_path=DataHolderTest.text_path,
+                              use_cache=use_cache)
+            old_path = data.cache_path
+            sizes = data.append(new_lines, split=None)
+            self.assertEqual(sizes, {"train": 2, "valid": 0, "test": 1})
+            data.append(new_lines[:1], split="valid")
+            scratch = DataHolder(text_path=DataHolderTest.text_path,
+                                 use_cache=False)
+            self.assertEqual(data.vocab.word2index, scratch.vocab.word2index)
+            self.assertEqual(list(data.vocab.word_freq),
+                             list(scratch.vocab.word_freq))
+            self.assertEqual(data.vocab.total_words,
+                             scratch.vocab.total_words)
+            for before, after in [(scratch.encoded_train, data.encoded_train),
+                                  (scratch.encoded_valid, data.encoded_valid),
+                                  (scratch.encoded_test, data.encoded_test)]:
+                self.assertTrue(np.array_equal(before, after),
+                                msg="{} != {}".format(before, after))
+            if use_cache:
+                self.assertNotEqual(data.cache_path, old_path)
+                self.assertFalse(os.path.exists(old_path))
+                records = read_appends(data.cache_path)
+                self.assertEqual([record["lines"] for record in records],
+                                 [sizes, {"train": 0, "valid": 1, "test": 0}])
+                cached = DataHolder(text_path=DataHolderTest.text_path)
+                self.assertEqual(cached.cache_path, data.cache_path)
+                self.assertTrue(np.array_equal(cached.encoded_train,
+                                               data.encoded_train))
+            DataHolderTest.tearDown()
+
+    def test_append_pruned(self):
+        """
+        Testing if appending lines to a DataHolder with a pruned
+        vocabulary gives the same vocabulary and encoding as
+        preprocessing the whole corpus again, with and without
+        the cache (the new words change the pruned vocabulary)
+        """
+        new_lines = ["zzzqqq zzzqqq zzzqqq wwwkkk\n"] * 5
+        for use_cache in [True, False]:
+            data = DataHolder(text_path=DataHolderTest.text_path,
+                              use_cache=use_cache,
+                              min_count=2)
+            old_path = data.cache_path
+            old_size = len(data.vocab)
+            data.append(new_lines, split="train")
+            data.append(new_lines[:1], split="test")
+            self.assertEqual(len(data.vocab), old_size + 2)
+            scratch = DataHolder(text_path=DataHolderTest.text_path,
+                                 use_cache=False,
+                                 min_count=2)
+            self.assertEqual(data.vocab.word2index, scratch.vocab.word2index)
+            self.assertEqual(list(data.vocab.word_freq),
+                             list(scratch.vocab.word_freq))
+            for before, after in [(scratch.encoded_train, data.encoded_train),
+                                  (scratch.encoded_valid, data.encoded_valid),
+                                  (scratch.encoded_test, data.encoded_test)]:
+                self.assertTrue(np.array_equal(before, after),
+                                msg="{} != {}".format(before, after))
+            if use_cache:
+                self.assertNotEqual(data.cache_path, old_path)
+                self.assertFalse(os.path.exists(old_path))
+                cached = DataHolder(text_path=DataHolderTest.text_path,
+                                    min_count=2)
+                self.assertEqual(cached.cache_path, data.cache_path)
+                self.assertEqual(cached.vocab.word2index,
+                                 scratch.vocab.word2index)
+                self.assertTrue(np.array_equal(cached.encoded_train,
+                                               scratch.encoded_train))
+            DataHolderTest.tearDown()
+
+    def test_hash_state(self):
+        """
+        Testing if the hash of a file that grows can be
+        resumed and if it matches the hash of the whole file
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path,
+                          use_cache=False)
+        for block_size in [7, 2 ** 20]:
+            state = hash_state(data.path_train, block_size=block_size)
+            with open(data.path_train, "a") as f:
+                f.write("one more line\n")
+            resumed = hash_state(data.path_train, state, block_size)
+            full = hash_state(data.path_train, block_size=block_size)
+            self.assertNotEqual(resumed["digest"], state["digest"])
+            self.assertEqual(resumed, full)
+
+    def test_noums_cache(self):
+        """
+        Testing if the list of noums is stored in its own
+        file, if the line budget is respected and if a list
+        cut by the time limit is not stored
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path)
+        self.assertIsNone(data.all_noums)
+        all_noums = data.get_noums()
+        names = [name for name in os.listdir(DataHolderTest.cache_folder)
+                 if name.startswith("noums_")]
+        self.assertEqual(len(names), 1, msg="{}".format(names))
+        noums_path = os.path.join(DataHolderTest.cache_folder, names[0])
+        with open(noums_path) as f:
+            cached = [line.rstrip("\n") for line in f]
+        self.assertEqual(cached, all_noums)
+        noums = extract_noums(data.path_train, max_lines=0, num_workers=1)
+        self.assertEqual(noums, [])
+        cut = load_noums(data.path_train,
+                         DataHolderTest.cache_folder,
+                         max_noums=10 ** 6,
+                         max_seconds=0,
+                         batch_size=1,
+                         num_workers=1)
+        self.assertTrue(len(cut) < len(all_noums), msg="{}".format(cut))
+        names = [name for name in os.listdir(DataHolderTest.cache_folder)
+                 if name.startswith("noums_")]
+        self.assertEqual(len(names), 1, msg="{}".format(names))
+
+    def test_no_cache(self):
+        """
+        Testing if the DataHolder writes nothing
+        when the cache is off
+        """
+        data = DataHolder(text_path=DataHolderTest.text_path,
+                          use_cache=False)
+        self.assertIsNone(data.cache_path)
+        self.assertFalse(os.path.exists(DataHolderTest.cache_folder))
+
+
+if __name__ == "__main__":
+    run_test(DataHolderTest,
+             "\n=== Running test for the DataHolder ===\n")
@@ -3,8 +3,9 @@ import os
 import sys
 import inspect
 import shutil
+import numpy as np
 import tensorflow as tf
-from copy import deepcopy
+from copy import copy, deepcopy
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
@@ -16,6 +17,10 @@ from tftools.DataHolder import DataHolder
 from tftools.RNNLanguageModel import RNNLanguageModel
 from tftools.train_functions import run_epoch
 from tftools.generate_functions import generate_text
+from tftools.export_functions import export_checkpoint
+from tftools.NumpyEngine import NumpyEngine
+from tftools.TFEngine import TFEngine
+from tftools.PrefixCache import PrefixCache
 
 
 class GenerateFunctionsTest(unittest.TestCase):
@@ -73,6 +78,159 @@ class GenerateFunctionsTest(unittest.TestCase):
         self.assertTrue(test1 or test2,
                         msg="result = {}".format(result))
 
+    def test_inference_graph(self):
+        """
+        Testing if the inference graph restores the checkpoint
+        of the training graph and gives the same next word
+        distribution and state as the full model
+        """
+        model = GenerateFunctionsTest.model
+        gen_config = GenerateFunctionsTest.gen_config
+        with tf.Session(graph=model.graph) as sess:
+                tf.global_variables_initializer().run()
+                model.saver.save(sess, model.save_path)
+        results = []
+        for inference in [False, True]:
+            gen_model = RNNLanguageModel(gen_config,
+                                         GenerateFunctionsTest.data,
+                                         inference=inference)
+            with tf.Session(graph=gen_model.graph) as sess:
+                    gen_model.saver.restore(sess, gen_model.save_path)
+                    state = sess.run(gen_model.initial_state)
+                    for token in [1, 2, 3]:
+                        feed = {gen_model.input_placeholder: [[token]],
+                                gen_model.initial_state: state,
+                                gen_model.dropout_placeholder: 1.0}
+                        state, y_pred = sess.run([gen_model.final_state,
+                                                  gen_model.next_prediction],
+                                                 feed_dict=feed)
+            results.append((state, y_pred))
+            num_ops = len(gen_model.graph.get_operations())
+        (full_state, full_pred), (state, y_pred) = results
+        self.assertEqual(y_pred.dtype, np.float32)
+        self.assertTrue(np.allclose(full_state, state, atol=1e-6))
+        self.assertTrue(np.allclose(full_pred, y_pred, atol=1e-6))
+        self.assertTrue(num_ops < 100, msg="{} ops".format(num_ops))
+
+    def test_numpy_engine(self):
+        """
+        Testing if the weights exported as numpy arrays give
+        (without TensorFlow) the same next word distribution
+        and state as the inference graph, with both output layers
+        (and the transposed output weights of a sampled loss)
+        """
+        for output_layer, loss in [("dense", "softmax"),
+                                   ("adaptive", "softmax"),
+                                   ("dense", "nce")]:
+            config = Config(max_epochs=1,
+                            output_layer=output_layer,
+                            loss=loss,
+                            cutoffs=[100, 1000])
+            model = RNNLanguageModel(config, GenerateFunctionsTest.data)
+            with tf.Session(graph=model.graph) as sess:
+                    tf.global_variables_initializer().run()
+                    model.saver.save(sess, model.save_path)
+            export_path = export_checkpoint(config, GenerateFunctionsTest.data)
+            results = []
+            for engine in [TFEngine(config, GenerateFunctionsTest.data),
+                           NumpyEngine(export_path)]:
+                state = engine.zero_state(2)
+                for tokens in [[1, 4], [2, 5], [3, 6]]:
+                    y_pred, state = engine.step(tokens, state)
+                logits, _ = engine.step_logits([7, 8], state)
+                engine.close()
+                results.append((state, y_pred, logits))
+            tf_state, tf_pred, tf_logits = results[0]
+            np_state, np_pred, np_logits = results[1]
+            self.assertEqual(np_pred.shape, (2, model.vocab_size))
+            self.assertTrue(np.allclose(tf_state, np_state, atol=1e-5))
+            self.assertTrue(np.allclose(tf_pred, np_pred, atol=1e-5),
+                            msg=output_layer)
+            self.assertTrue(np.allclose(tf_logits, np_logits, atol=1e-4),
+                            msg=output_layer)
+
+    def test_saved_ranks(self):
+        """
+        Testing if the ranks of the adaptive softmax are restored
+        from the checkpoint when the word counts change after the
+        training (e.g., DataHolder.append), so the TFEngine and the
+        NumpyEngine still give the same distribution
+        """
+        config = Config(max_epochs=1,
+                        output_layer="adaptive",
+                        cutoffs=[100, 1000])
+        data = GenerateFunctionsTest.data
+        model = RNNLanguageModel(config, data)
+        with tf.Session(graph=model.graph) as sess:
+                tf.global_variables_initializer().run()
+                model.saver.save(sess, model.save_path)
+        export_path = export_checkpoint(config, data)
+        # the rarest word becomes the most frequent one
+        changed = copy(data)
+        changed.vocab = deepcopy(data.vocab)
+        rare = int(np.argmax(model.rank))
+        if changed.vocab.frozen:
+            changed.vocab.word_freq = np.array(changed.vocab.word_freq)
+            changed.vocab.word_freq[rare] += len(data.encoded_train)
+        else:
+            word = changed.vocab.decode(rare)
+            changed.vocab.word_freq[word] += len(data.encoded_train)
+        engine = TFEngine(config, changed)
+        self.assertFalse(np.array_equal(engine.model.rank, model.rank))
+        restored = engine.session.run(engine.model.rank_variable)
+        self.assertTrue(np.array_equal(restored, model.rank))
+        results = []
+        for engine in [engine, NumpyEngine(export_path)]:
+            state = engine.zero_state(2)
+            logits, _ = engine.step_logits([7, 8], state)
+            engine.close()
+            results.append(logits)
+        self.assertTrue(np.allclose(results[0], results[1], atol=1e-4))
+
+    def test_prefix_cache(self):
+        """
+        Testing if the state after a starting text is computed
+        with all its tokens, if it is reused from the cache and if
+        the least recently used prefix is removed from the cache
+        """
+        model = GenerateFunctionsTest.model
+        gen_config = GenerateFunctionsTest.gen_config
+        with tf.Session(graph=model.graph) as sess:
+                tf.global_variables_initializer().run()
+                model.saver.save(sess, model.save_path)
+        export_path = export_checkpoint(gen_config, GenerateFunctionsTest.data)
+        engine = NumpyEngine(export_path)
+        cache = PrefixCache(max_size=2)
+        y_pred, state = cache.prime(engine, [1, 2, 3])
+        expected_state = engine.zero_state(1)
+        for token in [1, 2, 3]:
+            expected_pred, expected_state = engine.step_logits([token],
+                                                               expected_state)
+        self.assertTrue(np.allclose(state, expected_state))
+        self.assertTrue(np.allclose(y_pred, expected_pred))
+        only_last, _ = cache.prime(engine, [3])
+        self.assertFalse(np.allclose(only_last, y_pred))
+        cached_pred, _ = cache.prime(engine, [1, 2, 3])
+        self.assertTrue(cached_pred is y_pred)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        cache.prime(engine, [4])
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.get((engine.checkpoint, (3,))) is None)
+        gen_model = RNNLanguageModel(gen_config,
+                                     GenerateFunctionsTest.data,
+                                     inference=True)
+        cache = PrefixCache()
+        with tf.Session(graph=gen_model.graph) as sess:
+                gen_model.saver.restore(sess, gen_model.save_path)
+                for i in range(3):
+                    generate_text(sess,
+                                  gen_model,
+                                  gen_config,
+                                  starting_text="i am",
+                                  stop_length=5,
+                                  prefix_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
 
 if __name__ == "__main__":
     run_test(GenerateFunctionsTest,
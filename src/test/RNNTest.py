@@ -3,6 +3,7 @@ import os
 import sys
 import inspect
 import shutil
+import numpy as np
 import tensorflow as tf
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
@@ -57,6 +58,129 @@ class RNNTest(unittest.TestCase):
                         msg="before = {0}\nafter = {1}".format(before_training,
                                                                after_traing))
 
+    def test_dynamic_mode(self):
+        """
+        Testing if the dynamic mode has the same variables and
+        gives the same results as the static mode, and if it
+        accepts batches of any shape
+        """
+        model = RNNTest.model
+        config = Config(max_epochs=1, rnn_mode="dynamic")
+        dynamic = RNNLanguageModel(config, RNNTest.data)
+        with model.graph.as_default():
+            static_vars = [(var.name, var.shape.as_list())
+                           for var in tf.trainable_variables()]
+        with dynamic.graph.as_default():
+            dynamic_vars = [(var.name, var.shape.as_list())
+                            for var in tf.trainable_variables()]
+        self.assertEqual(static_vars, dynamic_vars)
+        batch = RNNTest.toy_valid[:config.batch_size * (config.num_steps + 1)]
+        batch = batch.reshape(config.batch_size, config.num_steps + 1)
+        x, y = batch[:, :-1], batch[:, 1:]
+        save_path = os.path.join(currentdir, "checkpoints", "static")
+        results = []
+        with tf.Session(graph=model.graph) as sess:
+            tf.global_variables_initializer().run()
+            model.saver.save(sess, save_path)
+            feed = {model.input_placeholder: x,
+                    model.labels_placeholder: y,
+                    model.dropout_placeholder: 1.0}
+            results.append(sess.run([model.loss,
+                                     model.final_state,
+                                     model.next_prediction],
+                                    feed_dict=feed))
+        with tf.Session(graph=dynamic.graph) as sess:
+            dynamic.saver.restore(sess, save_path)
+            feed = {dynamic.input_placeholder: x,
+                    dynamic.labels_placeholder: y,
+                    dynamic.dropout_placeholder: 1.0}
+            results.append(sess.run([dynamic.loss,
+                                     dynamic.final_state,
+                                     dynamic.next_prediction],
+                                    feed_dict=feed))
+            feed = {dynamic.input_placeholder: x[:3, :5],
+                    dynamic.labels_placeholder: y[:3, :5],
+                    dynamic.initial_state: np.zeros((3, config.hidden_size)),
+                    dynamic.dropout_placeholder: 1.0}
+            loss, state = sess.run([dynamic.loss, dynamic.final_state],
+                                   feed_dict=feed)
+        for static_result, dynamic_result in zip(*results):
+            self.assertTrue(np.allclose(static_result,
+                                        dynamic_result,
+                                        atol=1e-5))
+        self.assertTrue(np.isfinite(loss))
+        self.assertEqual(state.shape, (3, config.hidden_size))
+
+    def test_sampled_loss(self):
+        """
+        Testing if the sampled losses reduce the exact
+        perplexity on the valid data, in both rnn modes, and
+        if the gradient of the output weights only has the
+        rows of the sampled words
+        """
+        toy_valid = RNNTest.toy_valid
+        toy_train = RNNTest.toy_train
+        for loss, rnn_mode in [("sampled_softmax", "static"),
+                               ("nce", "dynamic")]:
+            config = Config(max_epochs=1, loss=loss, rnn_mode=rnn_mode)
+            model = RNNLanguageModel(config, RNNTest.data)
+            self.assertIsNot(model.train_loss, model.loss)
+            weights = model.output_weights["weights"]
+            self.assertEqual(weights.get_shape().as_list(),
+                             [model.vocab_size, config.hidden_size])
+            with model.graph.as_default():
+                gradient = tf.gradients(model.train_loss, weights)[0]
+            self.assertIsInstance(gradient, tf.IndexedSlices)
+            with tf.Session(graph=model.graph) as sess:
+                tf.global_variables_initializer().run()
+                before_training = run_epoch(model, sess, toy_valid)
+                run_epoch(model, sess, toy_train, model.train_op)
+                after_traing = run_epoch(model, sess, toy_valid)
+            self.assertTrue(before_training > after_traing,
+                            msg="{0}: before = {1}\nafter = {2}".format(loss,
+                                                                       before_training,
+                                                                       after_traing))
+
+    def test_adaptive_softmax(self):
+        """
+        Testing if the adaptive softmax gives distributions over the
+        vocabulary that agree with its loss, and if training with
+        it reduces the perplexity on the valid data
+        """
+        toy_valid = RNNTest.toy_valid
+        toy_train = RNNTest.toy_train
+        for rnn_mode in ["static", "dynamic"]:
+            config = Config(max_epochs=1,
+                            rnn_mode=rnn_mode,
+                            output_layer="adaptive",
+                            cutoffs=[100, 1000])
+            model = RNNLanguageModel(config, RNNTest.data)
+            batch = toy_valid[:config.batch_size * (config.num_steps + 1)]
+            batch = batch.reshape(config.batch_size, config.num_steps + 1)
+            x, y = batch[:, :-1], batch[:, 1:]
+            with tf.Session(graph=model.graph) as sess:
+                tf.global_variables_initializer().run()
+                feed = {model.input_placeholder: x,
+                        model.labels_placeholder: y,
+                        model.dropout_placeholder: 1.0}
+                loss, predictions = sess.run([model.loss, model.predictions],
+                                             feed_dict=feed)
+                before_training = run_epoch(model, sess, toy_valid)
+                run_epoch(model, sess, toy_train, model.train_op)
+                after_traing = run_epoch(model, sess, toy_valid)
+            predictions = np.array(predictions)
+            self.assertEqual(predictions.shape, (config.num_steps,
+                                                 config.batch_size,
+                                                 len(RNNTest.data.vocab)))
+            self.assertTrue(np.allclose(predictions.sum(axis=2), 1))
+            true_probs = [predictions[j, i, y[i, j]]
+                          for i in range(config.batch_size)
+                          for j in range(config.num_steps)]
+            self.assertAlmostEqual(loss, -np.mean(np.log(true_probs)), places=4)
+            self.assertTrue(before_training > after_traing,
+                            msg="before = {0}\nafter = {1}".format(before_training,
+                                                                   after_traing))
+
 
 if __name__ == "__main__":
     run_test(RNNTest,
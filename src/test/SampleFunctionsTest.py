@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from utils import run_test, sample
+from tftools.sample_functions import sample_logits, sample_probs
+from tftools.sample_functions import top_candidates
+
+
+class SampleFunctionsTest(unittest.TestCase):
+    """
+    Class that test the functions from the
+    sample_functions module
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.probs = np.array([[0.0, 0.0, 1.0, 0.0],
+                              [0.5, 0.5, 0.0, 0.0],
+                              [0.1, 0.2, 0.3, 0.4]], dtype=np.float32)
+        cls.logits = np.log(np.array([[0.1, 0.2, 0.3, 0.4],
+                                      [0.4, 0.3, 0.2, 0.1]]))
+
+    def test_sample_rows(self):
+        """
+        Testing if each row is sampled from its own distribution
+        """
+        rng = np.random.RandomState(0)
+        probs = SampleFunctionsTest.probs
+        draws = np.array([sample_probs(probs, rng=rng) for _ in range(4000)])
+        self.assertTrue(np.all(draws[:, 0] == 2))
+        self.assertEqual(set(draws[:, 1]), set([0, 1]))
+        frequencies = np.bincount(draws[:, 2], minlength=4) / 4000.0
+        self.assertTrue(np.allclose(frequencies, probs[2], atol=0.03),
+                        msg=str(frequencies))
+        self.assertEqual(sample(probs[0]), 2)
+        self.assertTrue(isinstance(sample_probs(probs[1]), int))
+
+    def test_seed_and_temperature(self):
+        """
+        Testing if the same seed (also the one of np.random.seed)
+        gives the same indexes and if the temperature
+        changes the distribution
+        """
+        logits = np.tile(SampleFunctionsTest.logits, (50, 1))
+        first = sample_logits(logits, rng=42)
+        second = sample_logits(logits, rng=42)
+        self.assertTrue(np.array_equal(first, second))
+        np.random.seed(42)
+        first = sample_logits(logits)
+        np.random.seed(42)
+        second = sample_logits(logits)
+        self.assertTrue(np.array_equal(first, second))
+        greedy = sample_logits(logits, temperature=0)
+        self.assertTrue(np.array_equal(greedy, np.tile([3, 0], 50)))
+        cold = sample_logits(np.tile(logits, (10, 1)), temperature=0.05, rng=0)
+        self.assertTrue(np.mean(cold == np.tile([3, 0], 500)) > 0.99)
+
+    def test_top_k_and_top_p(self):
+        """
+        Testing if only the words allowed by
+        top_k and top_p are sampled
+        """
+        logits = np.tile(SampleFunctionsTest.logits, (500, 1))
+        draws = sample_logits(logits, top_k=2, rng=0).reshape(500, 2)
+        self.assertEqual(set(draws[:, 0]), set([2, 3]))
+        self.assertEqual(set(draws[:, 1]), set([0, 1]))
+        draws = sample_logits(logits, top_p=0.6, rng=0).reshape(500, 2)
+        self.assertEqual(set(draws[:, 0]), set([2, 3]))
+        draws = sample_logits(logits, top_p=0.3, rng=0).reshape(500, 2)
+        self.assertEqual(set(draws[:, 0]), set([3]))
+        draws = sample_logits(logits, top_k=3, top_p=0.95, rng=0)
+        self.assertEqual(set(draws.reshape(500, 2)[:, 1]), set([0, 1, 2]))
+
+    def test_nucleus_partial_sort(self):
+        """
+        Testing if the nucleus is the same when only a part of
+        the logits is sorted (an almost flat distribution
+        needs more words than the first part)
+        """
+        rng = np.random.RandomState(1)
+        logits = np.vstack([rng.randn(5000) * 4, rng.randn(5000) * 0.1])
+        indexes, candidates = top_candidates(logits, top_p=0.9)
+        for row in range(2):
+            probs = np.exp(logits[row] - logits[row].max())
+            probs = probs / probs.sum()
+            order = np.argsort(-probs, kind="mergesort")
+            expected = np.searchsorted(np.cumsum(probs[order]), 0.9) + 1
+            kept = indexes[row][np.isfinite(candidates[row])]
+            self.assertEqual(len(kept), expected)
+            self.assertEqual(set(kept), set(order[:expected]))
+
+
+if __name__ == "__main__":
+    run_test(SampleFunctionsTest,
+             "\n=== Running test for the sample functions ===\n")
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import os
 import sys
 import inspect
@@ -10,7 +11,10 @@ sys.path.insert(0, parentdir)
 from utils import run_test
 from text_processing.functions import read_line_eos, clean_text
 from text_processing.functions import file_len, text_cut, clean_and_cut
+from text_processing.functions import parallel_clean_and_cut
 from text_processing.Vocab import Vocab
+from text_processing.BatchSource import BatchSource
+from text_processing.Prefetcher import Prefetcher
 
 
 class TextManiTest(unittest.TestCase):
@@ -128,6 +132,32 @@ class TextManiTest(unittest.TestCase):
                          clean_tweet2,
                          msg="result = {}".format(result))
 
+    def test_parallel_clean_and_cut(self):
+        """
+        Testing if the parallel version of clean_and_cut
+        writes exactly the same files (using very small shards)
+        """
+        paths = [TextManiTest.clean_txt_path,
+                 TextManiTest.train_path2,
+                 TextManiTest.valid_path2,
+                 TextManiTest.test_path2]
+        clean_and_cut(TextManiTest.text_path_tweets)
+        expected = []
+        for path in paths:
+            with open(path, "rb") as f:
+                expected.append(f.read())
+            os.remove(path)
+        parallel_clean_and_cut(TextManiTest.text_path_tweets,
+                               num_workers=2,
+                               shard_size=64)
+        for path, content in zip(paths, expected):
+            with open(path, "rb") as f:
+                result = f.read()
+            self.assertEqual(result, content, msg="{}".format(path))
+        folder = os.path.dirname(TextManiTest.text_path_tweets)
+        shards = [name for name in os.listdir(folder) if "shard" in name]
+        self.assertEqual(shards, [])
+
     def test_enco_deco(self):
         """
         Testing the encoding and decoding of the class Vocab
@@ -170,6 +200,87 @@ class TextManiTest(unittest.TestCase):
                          TextManiTest.last,
                          msg="result = {}".format(result))
 
+    def test_batch_source(self):
+        """
+        Testing if the batches are views of the raw data
+        with the same values as the ones from the old ptb_iterator
+        """
+        raw_data = np.arange(103, dtype=np.int32)
+        batch_size, num_steps = 4, 3
+        batches = BatchSource(raw_data, batch_size, num_steps)
+        batch_len = 103 // batch_size
+        data = np.zeros([batch_size, batch_len], dtype=np.int32)
+        for i in range(batch_size):
+            data[i] = raw_data[batch_len * i:batch_len * (i + 1)]
+        self.assertEqual(batches.epoch_size, (batch_len - 1) // num_steps)
+        self.assertEqual(len(list(batches)), batches.epoch_size)
+        for i, (x, y) in enumerate(batches):
+            self.assertTrue(np.shares_memory(x, raw_data))
+            self.assertTrue(np.array_equal(x, data[:, i * num_steps:(i + 1) * num_steps]))
+            self.assertTrue(np.array_equal(y, data[:, i * num_steps + 1:(i + 1) * num_steps + 1]))
+
+    def test_prefetcher(self):
+        """
+        Testing if the prefetcher yields the same batches
+        in the same order, and if it can be stopped early
+        """
+        raw_data = np.arange(1000, dtype=np.int32)
+        batches = BatchSource(raw_data, 7, 5)
+        prefetched = Prefetcher(batches, buffer_size=3)
+        self.assertEqual(len(prefetched), batches.epoch_size)
+        for epoch in range(2):
+            result = list(prefetched)
+            self.assertEqual(len(result), batches.epoch_size)
+            for (x, y), (x_pre, y_pre) in zip(batches, result):
+                self.assertTrue(np.array_equal(x, x_pre))
+                self.assertTrue(np.array_equal(y, y_pre))
+        for step, _ in enumerate(prefetched):
+            if step == 2:
+                break
+        self.assertEqual(step, 2)
+
+    def test_frozen_vocab(self):
+        """
+        Testing if the frozen vocab encodes and decodes
+        many words at once in the same way as the
+        methods encode and decode
+        """
+        vocab = Vocab()
+        path = TextManiTest.text_path_toy
+        vocab.read_words(read_line_eos(path))
+        words = list(read_line_eos(path)) + ["NotAWord", "zzz"]
+        expected = [vocab.encode(word) for word in words]
+        vocab.freeze()
+        encoded = vocab.encode_many(words)
+        self.assertEqual(list(encoded), expected)
+        batch = encoded[:20].reshape(4, 5)
+        decoded = vocab.decode_many(batch)
+        self.assertEqual(decoded.shape, (4, 5))
+        self.assertEqual(list(decoded.ravel()), words[:20])
+        self.assertEqual(vocab.decode_many([0]).tolist(), ["<unk>"])
+
+    def test_vocab_save_load(self):
+        """
+        Testing if the vocab is the same after being
+        saved and loaded
+        """
+        vocab = Vocab()
+        vocab.read_words(read_line_eos(TextManiTest.text_path_toy))
+        vocab_path = TextManiTest.clean_txt_path[:-4] + ".npz"
+        try:
+            vocab.save(vocab_path)
+            loaded = Vocab()
+            loaded.load(vocab_path)
+        finally:
+            if os.path.exists(vocab_path):
+                os.remove(vocab_path)
+        self.assertTrue(loaded.frozen)
+        self.assertEqual(loaded.word2index, vocab.word2index)
+        self.assertEqual(loaded.total_words, vocab.total_words)
+        freq = [vocab.word_freq[vocab.decode(index)]
+                for index in range(len(vocab))]
+        self.assertTrue(np.array_equal(loaded.word_freq, freq))
+
 
 if __name__ == "__main__":
     run_test(TextManiTest,
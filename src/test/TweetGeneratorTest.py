@@ -3,6 +3,11 @@ import os
 import sys
 import inspect
 import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import numpy as np
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
@@ -11,6 +16,12 @@ sys.path.insert(0, parentdir)
 from utils import run_test
 from tftools.Config import Config
 from twitter.TweetGenerator import TweetGenerator
+from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+from twitter.GeneratorService import GeneratorService
+from twitter.GeneratorClient import GeneratorClient
+from twitter.BatchingGeneratorService import BatchingGeneratorService
+from twitter.CandidatePool import CandidatePool
+from twitter.ParallelTweetGenerator import ParallelTweetGenerator
 from twitter.functions import TweetValid
 
 
@@ -87,6 +98,509 @@ class TweetGeneratorTest(unittest.TestCase):
                 break
         self.assertTrue(result, msg="\nProblematic tweet = {}".format(debug))
 
+    def test_numpy_generator(self):
+        """
+        Function to test if the tweets generated without TensorFlow
+        (with the weights exported by the training) are valid
+        tweets with the hashtags from the hastag list
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        hastags = ["#AI", "#tensorflow"]
+        tweet_list = tg.generate_tweet_list(50, "i am", hashtag_list=hastags)
+        self.assertEqual(len(tweet_list), 50)
+        for tweet in tweet_list:
+            self.assertTrue(TweetValid(tweet), msg=tweet)
+            self.assertTrue(tweet.endswith(" #AI #tensorflow"), msg=tweet)
+
+    def test_batch_generation(self):
+        """
+        Function to test if the tweets are generated in one batch:
+        the number of steps is the number of steps of the
+        longest tweet (the state after the starting text is
+        in the cache), and the rows of the finished tweets
+        are removed from the batch
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        tg.generate_tweet_list(1, "i am")
+        batch_sizes = []
+        step = tg.engine.step_logits
+
+        def counting_step(tokens, state):
+            batch_sizes.append(len(tokens))
+            return step(tokens, state)
+        tg.engine.step_logits = counting_step
+        tweet_list = tg.generate_tweet_list(10, "i am")
+        self.assertEqual(len(tweet_list), 10)
+        self.assertEqual(tg.prefix_cache.hits, 1)
+        self.assertEqual(batch_sizes[0], 10)
+        self.assertEqual(batch_sizes, sorted(batch_sizes, reverse=True))
+        max_words = max([len(tweet.split()) for tweet in tweet_list])
+        self.assertTrue(len(batch_sizes) <= max_words,
+                        msg="{} steps".format(len(batch_sizes)))
+        for tweet in tweet_list:
+            self.assertTrue(TweetValid(tweet), msg=tweet)
+
+    def test_constrained_decoding(self):
+        """
+        Function to test if the words of the black list and
+        the unk token are never generated, and if the tweets
+        stop only when no word fits in the characters that are left
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        black_list = ["the", "to", "and", "a", "of"]
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True,
+                                 black_list=black_list)
+        banned, lengths = tg.token_constraints()
+        self.assertEqual(banned.sum(), 6)
+        tweets = tg.__generate_tweet_batch_no_unk__(tg.engine,
+                                                    50,
+                                                    "i am",
+                                                    CharSize=40)
+        for tweet in tweets:
+            self.assertTrue(len(" ".join(tweet)) <= 40, msg=tweet)
+            self.assertEqual(tweet[:2], ["i", "am"])
+            for word in tweet:
+                self.assertFalse(word in black_list + ["<unk>"], msg=tweet)
+            next_size = len(" ".join(tweet)) + 1 + lengths[~banned].min()
+            self.assertTrue(next_size > 40, msg=tweet)
+
+    def test_best_of_and_beam(self):
+        """
+        Function to test the decodings "best_of" and "beam": the
+        tweets are valid and have the hashtags, a beam search of
+        size one is the greedy decoding and the scores are sorted
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        hastags = ["#AI", "#tensorflow"]
+        for decoding in ["best_of", "beam"]:
+            tweet_list = tg.generate_tweet_list(3,
+                                                "i am",
+                                                hashtag_list=hastags,
+                                                decoding=decoding,
+                                                num_candidates=4)
+            self.assertEqual(len(tweet_list), 3)
+            for tweet in tweet_list:
+                self.assertTrue(TweetValid(tweet), msg=tweet)
+                self.assertTrue(tweet.endswith(" #AI #tensorflow"), msg=tweet)
+        greedy = tg.__generate_tweet_no_unk__(tg.engine, "i am", temp=0)
+        tweets, scores = tg.__beam_search__(tg.engine, 1, "i am")
+        self.assertEqual(tweets[0], greedy)
+        tweets, scores = tg.__beam_search__(tg.engine, 5, "i am")
+        self.assertTrue(len(tweets) >= 5)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+        self.assertTrue(np.all(scores <= 0))
+        _, sample_scores = tg.__generate_tweet_batch_no_unk__(tg.engine,
+                                                              5,
+                                                              "i am",
+                                                              with_scores=True)
+        self.assertEqual(sample_scores.shape, (5,))
+        self.assertTrue(np.all(sample_scores <= 0))
+
+    def test_generator_service(self):
+        """
+        Function to test if the GeneratorService keeps the engine
+        of the generator between the requests and if it
+        answers the requests made in the same process
+        and through the Unix socket (including the errors)
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        service = GeneratorService(tg)
+        engine = tg.engine
+        hastags = ["#AI", "#tensorflow"]
+        tweet_list = service.generate_tweet_list(5, "i am", hastags)
+        self.assertEqual(len(tweet_list), 5)
+        self.assertTrue(tg.engine is engine)
+        socket_folder = tempfile.mkdtemp()
+        socket_path = os.path.join(socket_folder, "generator.sock")
+        service.start(socket_path)
+        client = GeneratorClient(socket_path, timeout=60)
+        try:
+            for decoding in ["sample", "best_of"]:
+                tweet_list = client.generate_tweet_list(3,
+                                                        "i am",
+                                                        hashtag_list=hastags,
+                                                        decoding=decoding,
+                                                        num_candidates=2)
+                self.assertEqual(len(tweet_list), 3)
+                for tweet in tweet_list:
+                    self.assertTrue(TweetValid(tweet), msg=tweet)
+                    self.assertTrue(tweet.endswith(" #AI #tensorflow"),
+                                    msg=tweet)
+            with self.assertRaises(RuntimeError):
+                client.generate_tweet_list(1, "i am " * 40)
+            with self.assertRaises(RuntimeError):
+                client.request({"number_of_tweet": 1})
+            self.assertEqual(len(client.generate_tweet_list(2)), 2)
+        finally:
+            client.close()
+            service.stop()
+            shutil.rmtree(socket_folder)
+        self.assertFalse(os.path.exists(socket_path))
+        self.assertTrue(tg.engine is engine)
+
+    def test_generate_tweet_lists(self):
+        """
+        Function to test if the tweets of several requests
+        (with different starting texts, hashtags and decodings)
+        are generated together: the first step of the engine has the
+        sentences of all the requests that are sampled
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        requests = [{"number_of_tweets": 3, "starting_text": "i am"},
+                    {"number_of_tweets": 2,
+                     "starting_text": "the",
+                     "hashtag_list": ["#AI"],
+                     "decoding": "best_of",
+                     "num_candidates": 4},
+                    {"number_of_tweets": 2, "decoding": "beam"},
+                    {"hashtag_list": ["#tensorflow"]}]
+        batch_sizes = []
+        step = tg.engine.step_logits
+
+        def counting_step(tokens, state):
+            batch_sizes.append(len(tokens))
+            return step(tokens, state)
+        tg.engine.step_logits = counting_step
+        results = tg.generate_tweet_lists(requests)
+        self.assertEqual([len(tweets) for tweets in results], [3, 2, 2, 1])
+        self.assertTrue(max(batch_sizes) >= 3 + 2 * 4 + 1 - 2,
+                        msg="batch sizes = {}".format(batch_sizes))
+        for tweet in results[0]:
+            self.assertTrue(tweet.startswith("i am "), msg=tweet)
+        for tweet in results[1]:
+            self.assertTrue(tweet.startswith("the "), msg=tweet)
+            self.assertTrue(tweet.endswith(" #AI"), msg=tweet)
+        self.assertTrue(results[3][0].endswith(" #tensorflow"))
+        for tweets in results:
+            for tweet in tweets:
+                self.assertTrue(TweetValid(tweet), msg=tweet)
+        with self.assertRaises(AssertionError):
+            tg.generate_tweet_lists(requests + [{"decoding": "greedy"}])
+
+    def test_batching_service(self):
+        """
+        Function to test if the BatchingGeneratorService merges the
+        requests made at the same time and gives each caller
+        its tweets (or its error)
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        service = BatchingGeneratorService(tg, max_batch=100, max_wait=1.0)
+        results = {}
+
+        def request(i):
+            results[i] = service.generate_tweet_list(i + 1,
+                                                     "i am",
+                                                     ["#{}".format(i)])
+        threads = [threading.Thread(target=request, args=(i,))
+                   for i in range(4)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+            self.assertEqual(service.num_requests, 4)
+            self.assertTrue(service.num_batches <= 2,
+                            msg="{} batches".format(service.num_batches))
+            for i in range(4):
+                self.assertEqual(len(results[i]), i + 1)
+                for tweet in results[i]:
+                    self.assertTrue(TweetValid(tweet), msg=tweet)
+                    self.assertTrue(tweet.endswith(" #{}".format(i)),
+                                    msg=tweet)
+            with self.assertRaises(AssertionError):
+                service.generate_tweet_list(1, "i am " * 40)
+        finally:
+            service.stop()
+        self.assertFalse(service.worker.is_alive())
+
+    def test_batching_service_errors(self):
+        """
+        Function to test if a request that fails in a batch of the
+        BatchingGeneratorService only fails its own caller
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        service = BatchingGeneratorService(tg, max_batch=100, max_wait=1.0)
+        results = {}
+        errors = {}
+
+        def request(i):
+            # the request 1 is valid for the service but fails in the batch
+            number_of_tweets = -1 if i == 1 else 2
+            try:
+                results[i] = service.generate_tweet_list(number_of_tweets,
+                                                         "i am",
+                                                         decoding="best_of",
+                                                         num_candidates=2)
+            except Exception as error:
+                errors[i] = error
+        threads = [threading.Thread(target=request, args=(i,))
+                   for i in range(3)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+        finally:
+            service.stop()
+        self.assertEqual(service.num_requests, 3)
+        self.assertEqual(sorted(errors), [1])
+        self.assertEqual(sorted(results), [0, 2])
+        for i in [0, 2]:
+            self.assertEqual(len(results[i]), 2)
+            for tweet in results[i]:
+                self.assertTrue(tweet.startswith("i am "), msg=tweet)
+
+    def test_candidate_pool(self):
+        """
+        Function to test if the CandidatePool generates the tweets
+        in the background for '<eos>' and for the last starting
+        texts, and drops the old candidates and the starting
+        texts not used recently
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        pool = CandidatePool(tg, size=5, max_keys=2)
+
+        def wait_for(starting_text):
+            deadline = time.time() + 60
+            while pool.available(starting_text) < 5:
+                self.assertTrue(time.time() < deadline)
+                time.sleep(0.01)
+        try:
+            wait_for('<eos>')
+            tweet_list = pool.generate_tweet_list(5)
+            self.assertEqual((pool.hits, pool.misses), (5, 0))
+            hashtag_tweets = pool.generate_tweet_list(3, "i am", ["#AI"])
+            self.assertEqual((pool.hits, pool.misses), (5, 3))
+            wait_for("i am")
+            hashtag_tweets += pool.generate_tweet_list(2, "i am", ["#AI"])
+            self.assertEqual((pool.hits, pool.misses), (7, 3))
+            self.assertEqual(len(hashtag_tweets), 5)
+            for tweet in tweet_list + hashtag_tweets:
+                self.assertTrue(TweetValid(tweet), msg=tweet)
+            for tweet in hashtag_tweets:
+                self.assertTrue(tweet.startswith("i am "), msg=tweet)
+                self.assertTrue(tweet.endswith(" #AI"), msg=tweet)
+            pool.generate_tweet_list(1, "the")
+            pool.generate_tweet_list(1, "we")
+            self.assertEqual(list(pool.entries), ['<eos>', "the", "we"])
+            with self.assertRaises(AssertionError):
+                pool.generate_tweet_list(1, "i am " * 40)
+        finally:
+            pool.stop()
+        self.assertFalse(pool.thread.is_alive())
+        pool.max_age = 0
+        self.assertEqual(pool.available('<eos>'), 0)
+
+    def test_candidate_pool_hashtags(self):
+        """
+        Function to test if the candidates of the CandidatePool are
+        used by lists of hashtags longer than the one they were
+        generated for, and if an error of the background
+        generation is raised to the caller
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = NumpyTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                 debug=True)
+        pool = CandidatePool(tg, size=5)
+
+        def wait_for(starting_text):
+            deadline = time.time() + 60
+            while pool.available(starting_text) < 5:
+                self.assertTrue(time.time() < deadline)
+                time.sleep(0.01)
+        try:
+            hashtag_lists = [["#AI"],
+                             ["#AI", "#tensorflow"],
+                             ["#AI", "#tensorflow", "#deeplearning"]]
+            for i, hashtag_list in enumerate(hashtag_lists):
+                wait_for('<eos>')
+                tweets = pool.generate_tweet_list(5,
+                                                  hashtag_list=hashtag_list)
+                self.assertEqual((pool.hits, pool.misses), (5 * (i + 1), 0))
+                cdr = " " + " ".join(hashtag_list)
+                for tweet in tweets:
+                    self.assertTrue(TweetValid(tweet), msg=tweet)
+                    self.assertTrue(tweet.endswith(cdr), msg=tweet)
+                    self.assertTrue(len(tweet) > len(cdr), msg=tweet)
+        finally:
+            pool.stop()
+
+        class FailingGenerator(object):
+            def generate_tweet_list(self, *args, **kwargs):
+                raise RuntimeError("no engine")
+
+        pool = CandidatePool(FailingGenerator())
+        try:
+            pool.thread.join(10)
+            self.assertFalse(pool.thread.is_alive())
+            with self.assertRaises(RuntimeError):
+                pool.generate_tweet_list(1)
+            self.assertEqual(pool.error, None)
+        finally:
+            pool.stop()
+
+    def test_parallel_generator(self):
+        """
+        Function to test if the tweets generated by the worker
+        processes of the ParallelTweetGenerator (with memory-mapped
+        weights) are valid tweets with the hashtags from the
+        hastag list, and if each worker samples different tweets
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = ParallelTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                    num_workers=2,
+                                    debug=True)
+        hastags = ["#AI", "#tensorflow"]
+        try:
+            tweet_list = tg.generate_tweet_list(20, "i am", hashtag_list=hastags)
+            self.assertEqual(len(tweet_list), 20)
+            self.assertTrue(len(set(tweet_list)) > 10)
+            for decoding in ["best_of", "beam"]:
+                tweet_list += tg.generate_tweet_list(3,
+                                                     "i am",
+                                                     hashtag_list=hastags,
+                                                     decoding=decoding,
+                                                     num_candidates=2)
+            self.assertEqual(len(tweet_list), 26)
+            for tweet in tweet_list:
+                self.assertTrue(TweetValid(tweet), msg=tweet)
+                self.assertTrue(tweet.startswith("i am "), msg=tweet)
+                self.assertTrue(tweet.endswith(" #AI #tensorflow"), msg=tweet)
+            with self.assertRaises(AssertionError):
+                tg.generate_tweet_list(1, "i am " * 40)
+        finally:
+            tg.close()
+
+    def test_batching_parallel_generator(self):
+        """
+        Function to test if the BatchingGeneratorService merges
+        the requests when the tweets are generated by the worker
+        processes of a ParallelTweetGenerator
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        tg = ParallelTweetGenerator(text_path=TweetGeneratorTest.data_path,
+                                    num_workers=2,
+                                    debug=True)
+        service = BatchingGeneratorService(tg, max_batch=100, max_wait=1.0)
+        results = {}
+
+        def request(i):
+            decoding = ["sample", "best_of", "beam"][i % 3]
+            results[i] = service.generate_tweet_list(i + 1,
+                                                     "i am",
+                                                     ["#{}".format(i)],
+                                                     decoding=decoding,
+                                                     num_candidates=2)
+        threads = [threading.Thread(target=request, args=(i,))
+                   for i in range(4)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+            self.assertEqual(service.num_requests, 4)
+            for i in range(4):
+                self.assertEqual(len(results[i]), i + 1)
+                for tweet in results[i]:
+                    self.assertTrue(TweetValid(tweet), msg=tweet)
+                    self.assertTrue(tweet.startswith("i am "), msg=tweet)
+                    self.assertTrue(tweet.endswith(" #{}".format(i)),
+                                    msg=tweet)
+        finally:
+            service.stop()
+            tg.close()
+
+    def test_parallel_generator_cold_cache(self):
+        """
+        Function to test if the workers of the ParallelTweetGenerator
+        start when the DataHolder cache of the corpus does not exist
+        """
+        TweetGenerator(text_path=TweetGeneratorTest.data_path,
+                       config=TweetGeneratorTest.config,
+                       train=True,
+                       debug=True)
+        cache_folder = os.path.join(TweetGeneratorTest.data_path,
+                                    "dataholder_cache")
+        if os.path.exists(cache_folder):
+            shutil.rmtree(cache_folder)
+        code = ("from twitter.ParallelTweetGenerator import "
+                "ParallelTweetGenerator; "
+                "tg = ParallelTweetGenerator({!r}, {!r}, num_workers=2, "
+                "debug=True); "
+                "print(len(tg.generate_tweet_list(4))); "
+                "tg.close()").format(TweetGeneratorTest.data_path,
+                                     os.path.join(currentdir,
+                                                  "checkpoints",
+                                                  "best_validation_numpy"))
+        output = subprocess.check_output([sys.executable, "-c", code],
+                                         cwd=parentdir,
+                                         timeout=300)
+        self.assertEqual(output.decode().split()[-1], "4")
+
+    def test_numpy_generator_imports(self):
+        """
+        Function to test if the module of the NumpyTweetGenerator
+        can be used without importing TensorFlow
+        """
+        code = ("import sys; import twitter.NumpyTweetGenerator; "
+                "print('tensorflow' in sys.modules)")
+        output = subprocess.check_output([sys.executable, "-c", code],
+                                         cwd=parentdir)
+        self.assertEqual(output.decode().split()[-1], "False")
+
 
 if __name__ == "__main__":
     run_test(TweetGeneratorTest,
@@ -7,7 +7,10 @@ import inspect
 from RNNTest import RNNTest
 from GenerateFunctionsTest import GenerateFunctionsTest
 from TextManiTest import TextManiTest
+from DataHolderTest import DataHolderTest
+from SampleFunctionsTest import SampleFunctionsTest
 from TweetGeneratorTest import TweetGeneratorTest
+from AsyncBotTest import AsyncBotTest
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
@@ -28,12 +31,18 @@ from utils import run_test
 def main():
     run_test(TextManiTest,
              "\n=== Running test for the text manipulation functions ===\n")
+    run_test(DataHolderTest,
+             "\n=== Running test for the DataHolder ===\n")
     run_test(RNNTest,
              "\n=== Running test for the RNN model ===\n")
+    run_test(SampleFunctionsTest,
+             "\n=== Running test for the sample functions ===\n")
     run_test(GenerateFunctionsTest,
              "\n=== Running test for the generate functions ===\n")
     run_test(TweetGeneratorTest,
              "\n=== Running test for tweet generation ===\n")
+    run_test(AsyncBotTest,
+             "\n=== Running test for the AsyncBot ===\n")
     if user_has_key:
         run_test(BotTest,
                  "\n=== Running test for the Twitter Bot ===\n")
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+class BatchSource(object):
+    """
+    Iterable with the same batches as the function "ptb_iterator".
+    "raw_data" is an array of indexes -- shape = (#tokens,).
+    The array "data" of shape (batch_size, len(raw_data) // batch_size)
+    is a reshape of "raw_data" (no copy when "raw_data" is a
+    numpy array) and each pair (x, y) is a view of "data".
+    So the same object can be iterated at every epoch without
+    allocating or copying the text again. The number of
+    batches of one epoch is stored in "epoch_size".
+    If "raw_data" is memory-mapped only the pages of the
+    current window are read from the disk.
+
+    :type raw_data: list or np array
+    :type batch_size: int
+    :type num_steps: int
+    """
+    def __init__(self, raw_data, batch_size, num_steps):
+        if not isinstance(raw_data, np.ndarray):
+            raw_data = np.array(raw_data, dtype=np.int32)
+        self.batch_size = batch_size
+        self.num_steps = num_steps
+        self.batch_len = len(raw_data) // batch_size
+        size = batch_size * self.batch_len
+        self.data = raw_data[:size].reshape(batch_size, self.batch_len)
+        self.epoch_size = (self.batch_len - 1) // num_steps
+        if self.epoch_size <= 0:
+            raise ValueError("epoch_size == 0, decrease batch_size or num_steps")
+
+    def __iter__(self):
+        """
+        Generator.
+        For each iteration in range(epoch_size) it yields
+        the arrays x and y of shape (batch_size, num_steps),
+        where y[i][j] is the immediate following word of x[i][j].
+        """
+        num_steps = self.num_steps
+        for i in range(self.epoch_size):
+            x = self.data[:, i * num_steps:(i + 1) * num_steps]
+            y = self.data[:, i * num_steps + 1:(i + 1) * num_steps + 1]
+            yield (x, y)
+
+    def __len__(self):
+        """
+        Return the number of batches of one epoch
+
+        :rtype: int
+        """
+        return self.epoch_size
@@ -0,0 +1,86 @@
+import threading
+import numpy as np
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class Prefetcher(object):
+    """
+    Iterable that reads the pairs (x, y) of "batches" (e.g., a
+    BatchSource) in a background thread. Up to "buffer_size" pairs are
+    kept ready in a bounded queue while the main thread is busy with
+    the current step. In the thread each array is turned into a
+    contiguous int32 array, so it can be fed to the graph as it is.
+    The pairs come in the same order as the ones of "batches".
+
+    :type batches: iterable of (np array, np array)
+    :type buffer_size: int
+    """
+    def __init__(self, batches, buffer_size=2):
+        self.batches = batches
+        self.buffer_size = buffer_size
+        self.epoch_size = len(batches)
+
+    def produce(self, buffer, stop):
+        """
+        Method that runs in the background thread. It puts in
+        "buffer" every pair of "batches", followed by None
+        (or by the exception raised while reading the batches).
+        It returns as soon as the event "stop" is set.
+
+        :type buffer: queue.Queue
+        :type stop: threading.Event
+        """
+        try:
+            for x, y in self.batches:
+                item = (np.ascontiguousarray(x, dtype=np.int32),
+                        np.ascontiguousarray(y, dtype=np.int32))
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            item = None
+        except Exception as exception:
+            item = exception
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def __iter__(self):
+        """
+        Generator.
+        Yields the pairs (x, y) prepared by the background thread.
+        """
+        buffer = queue.Queue(maxsize=self.buffer_size)
+        stop = threading.Event()
+        thread = threading.Thread(target=self.produce, args=(buffer, stop))
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                item = buffer.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def __len__(self):
+        """
+        Return the number of batches of one epoch
+
+        :rtype: int
+        """
+        return self.epoch_size
@@ -1,9 +1,16 @@
 from collections import defaultdict
+from itertools import repeat
+import numpy as np
 
 
 class Vocab(object):
     """
-    Class to process one text file
+    Class to process one text file.
+    After all the words are read the vocabulary can be frozen
+    (method "freeze"). A frozen vocabulary keeps "index2word"
+    and "word_freq" as numpy arrays (both indexed by the word index),
+    so a batch of indexes is decoded with one numpy indexing
+    (method "decode_many").
     """
     def __init__(self):
         self.word2index = {}
@@ -11,6 +18,7 @@ class Vocab(object):
         self.word_freq = defaultdict(int)
         self.total_words = 0
         self.unknown = '<unk>'
+        self.frozen = False
         self.add_word(self.unknown, count=0)
 
     def add_word(self, word, count=1):
@@ -21,12 +29,17 @@ class Vocab(object):
 
         :type word: str
         :type count: int
+        :rtype: int
         """
-        if word not in self.word2index:
+        if self.frozen:
+            raise ValueError("the vocabulary is frozen, call unfreeze first")
+        index = self.word2index.get(word)
+        if index is None:
             index = len(self.word2index)
             self.word2index[word] = index
             self.index2word[index] = word
         self.word_freq[word] += count
+        return index
 
     def read_words(self, words):
         """
@@ -38,11 +51,86 @@ class Vocab(object):
 
         for word in words:
             self.add_word(word)
-        self.total_words = sum(self.word_freq.values())
+        self.update_total()
+
+    def update_total(self):
+        """
+        Recount the total number of tokens seen so far.
+        It prints also the vocabulary size and the token count
+        """
+        if self.frozen:
+            self.total_words = int(self.word_freq.sum())
+        else:
+            self.total_words = sum(self.word_freq.values())
         uniques = self.__len__()
         print('{} total tokens with {} uniques'.format(self.total_words,
                                                        uniques))
 
+    def freeze(self):
+        """
+        Stores the words and the frequencies in numpy arrays.
+        "index2word" becomes an array of str and "word_freq" an
+        array of int64, both indexed by the word index.
+        """
+        if self.frozen:
+            return
+        size = len(self.word2index)
+        words = [self.index2word[index] for index in range(size)]
+        freq = [self.word_freq[word] for word in words]
+        self.index2word = np.array(words, dtype=object)
+        self.word_freq = np.array(freq, dtype=np.int64)
+        self.frozen = True
+
+    def unfreeze(self):
+        """
+        Turns the arrays back into dicts, so new
+        words can be added to the vocabulary.
+        """
+        if not self.frozen:
+            return
+        words = self.index2word
+        freq = self.word_freq
+        self.index2word = {}
+        self.word_freq = defaultdict(int)
+        for index, word in enumerate(words):
+            self.index2word[index] = word
+            self.word_freq[word] = int(freq[index])
+        self.frozen = False
+
+    def prune(self, min_count=1, max_vocab=None):
+        """
+        Removes every word that appears less than "min_count"
+        times and keeps at most "max_vocab" words ('<unk>' included).
+        The remaining words are ordered by frequency (the most frequent
+        word gets the index 1, '<unk>' keeps the index 0) and the
+        frequency of every removed word is added to '<unk>'.
+        The vocabulary is frozen. It returns the array "remap"
+        such that remap[old_index] is the new index of the word, so
+        an already encoded text can be translated with remap[text].
+
+        :type min_count: int
+        :type max_vocab: None or int
+        :rtype: np array
+        """
+        self.freeze()
+        unknown = self.word2index[self.unknown]
+        freq = self.word_freq
+        order = np.argsort(-freq, kind="mergesort")
+        order = order[order != unknown]
+        order = order[freq[order] >= min_count]
+        if max_vocab is not None:
+            order = order[:max(max_vocab - 1, 0)]
+        remap = np.zeros(len(freq), dtype=np.int32)
+        remap[order] = np.arange(1, len(order) + 1, dtype=np.int32)
+        new_freq = np.zeros(len(order) + 1, dtype=np.int64)
+        new_freq[1:] = freq[order]
+        new_freq[0] = freq.sum() - new_freq[1:].sum()
+        words = [self.unknown] + list(self.index2word[order])
+        self.index2word = np.array(words, dtype=object)
+        self.word2index = {word: index for index, word in enumerate(words)}
+        self.word_freq = new_freq
+        return remap
+
     def encode(self, word):
         """
         Translation: word to index
@@ -67,6 +155,71 @@ class Vocab(object):
         """
         return self.index2word[index]
 
+    def encode_many(self, tokens):
+        """
+        Translation: list of words to array of indexes.
+        The dict lookups are done by "map" and the array
+        is filled by "np.fromiter", so there is no python
+        loop over the words.
+
+        :type tokens: list of str or np array
+        :rtype: np array
+        """
+        unknown = self.word2index[self.unknown]
+        lookup = map(self.word2index.get, tokens, repeat(unknown))
+        return np.fromiter(lookup, dtype=np.int32, count=len(tokens))
+
+    def decode_many(self, indices):
+        """
+        Translation: array of indexes to array of words.
+        "indices" can have any shape (e.g., a batch of
+        sequences), the result has the same shape.
+
+        :type indices: list of int or np array
+        :rtype: np array
+        """
+        if not self.frozen:
+            indices = np.asarray(indices)
+            words = [self.index2word[index] for index in indices.ravel()]
+            return np.array(words, dtype=object).reshape(indices.shape)
+        return self.index2word[np.asarray(indices)]
+
+    def save(self, path):
+        """
+        Write the vocabulary in the compact npz file "path".
+        All words are stored in one utf-8 buffer (separated by
+        new lines, the line number being the index of the word)
+        together with the array of frequencies.
+
+        :type path: str
+        """
+        was_frozen = self.frozen
+        self.freeze()
+        blob = "\n".join(self.index2word).encode("utf-8")
+        with open(path, "wb") as f:
+            np.savez(f,
+                     words=np.frombuffer(blob, dtype=np.uint8),
+                     word_freq=self.word_freq)
+        if not was_frozen:
+            self.unfreeze()
+
+    def load(self, path):
+        """
+        Read a vocabulary saved with the method "save".
+        Every word previously stored in this object is discarded
+        and the vocabulary is frozen.
+
+        :type path: str
+        """
+        with np.load(path) as saved:
+            words = saved["words"].tobytes().decode("utf-8").split("\n")
+            word_freq = saved["word_freq"]
+        self.word2index = {word: index for index, word in enumerate(words)}
+        self.index2word = np.array(words, dtype=object)
+        self.word_freq = word_freq.astype(np.int64)
+        self.frozen = True
+        self.total_words = int(self.word_freq.sum())
+
     def __len__(self):
         """
         Return the number of unique words in the text
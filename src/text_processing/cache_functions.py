@@ -0,0 +1,325 @@
+import hashlib
+import json
+import numpy as np
+import os
+import shutil
+import sys
+import inspect
+from itertools import islice
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from text_processing.Vocab import Vocab
+
+# Bump this number every time the layout of the cache changes,
+# so old caches are ignored instead of being read in the wrong way.
+CACHE_VERSION = 5
+SPLITS = ["train", "valid", "test"]
+
+
+def hash_state(path, state=None, block_size=2 ** 20):
+    """
+    Function that computes the sha1 hash of the content of the
+    file in "path" in a way that can be resumed when the file grows.
+    The file is read in blocks of "block_size" bytes, the hash of
+    every full block is chained (chain = sha1(chain + block)) and the
+    digest is sha1(chain + last partial block). If "state" (a state
+    returned by this function for the same file) is not None only
+    the bytes after its full blocks are read, so it must only be
+    used when text was appended to the file since then.
+    It returns the state, the digest is state["digest"].
+
+    :type path: str
+    :type state: None or dict
+    :type block_size: int
+    :rtype: dict
+    """
+    chain = b""
+    blocks = 0
+    if state is not None and state["block_size"] == block_size:
+        chain = bytes.fromhex(state["chain"])
+        blocks = state["blocks"]
+    tail = b""
+    with open(path, "rb") as f:
+        f.seek(blocks * block_size)
+        for block in iter(lambda: f.read(block_size), b""):
+            if len(block) < block_size:
+                tail = block
+                break
+            chain = hashlib.sha1(chain + block).digest()
+            blocks += 1
+        stat = os.fstat(f.fileno())
+    return {"size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "block_size": block_size,
+            "blocks": blocks,
+            "chain": chain.hex(),
+            "digest": hashlib.sha1(chain + tail).hexdigest()}
+
+
+def file_hash(path, hash_index=None):
+    """
+    Function that returns the hash of the content
+    of the file in "path" (see "hash_state").
+    If "hash_index" is not None the hash is stored in this
+    dict (keyed by the absolute path) and it is not computed
+    again while the size and the modification time of
+    the file do not change.
+
+    :type path: str
+    :type hash_index: None or dict
+    :rtype: str
+    """
+    if hash_index is None:
+        return hash_state(path)["digest"]
+    path = os.path.abspath(path)
+    state = hash_index.get(path)
+    stat = os.stat(path)
+    if state is None or (state["size"], state["mtime_ns"]) != (stat.st_size,
+                                                             stat.st_mtime_ns):
+        state = hash_state(path)
+        hash_index[path] = state
+    return state["digest"]
+
+
+def load_hash_index(cache_folder):
+    """
+    Function to read the hashes stored in the folder
+    "cache_folder" by "save_hash_index" (an empty
+    dict if there is none).
+
+    :type cache_folder: str
+    :rtype: dict
+    """
+    index_path = os.path.join(cache_folder, "hashes.json")
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path) as f:
+            return json.load(f)
+    except ValueError:
+        return {}
+
+
+def save_hash_index(cache_folder, hash_index):
+    """
+    Function to store the dict of hashes "hash_index"
+    (see "file_hash") in the folder "cache_folder".
+
+    :type cache_folder: str
+    :type hash_index: dict
+    """
+    os.makedirs(cache_folder, exist_ok=True)
+    index_path = os.path.join(cache_folder, "hashes.json")
+    tmp_path = index_path + ".tmp{}".format(os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump(hash_index, f)
+    os.replace(tmp_path, index_path)
+
+
+def head_hash(path, num_lines):
+    """
+    Function that computes the sha1 hash
+    of the first "num_lines" lines of the file in "path".
+
+    :type path: str
+    :type num_lines: int
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for line in islice(f, num_lines):
+            sha.update(line)
+    return sha.hexdigest()
+
+
+def cache_key(paths, hash_index=None, **settings):
+    """
+    Function that creates the key of one cache entry.
+    The key depends on the content of all the files
+    in "paths" and on the preprocessing settings
+    passed as keyword arguments. "hash_index" is
+    passed to "file_hash".
+
+    :type paths: list of str
+    :type hash_index: None or dict
+    :rtype: str
+    """
+    sha = hashlib.sha1()
+    sha.update("version={}".format(CACHE_VERSION).encode("utf-8"))
+    for path in paths:
+        sha.update(file_hash(path, hash_index).encode("utf-8"))
+    for name in sorted(settings):
+        sha.update("{}={!r}".format(name, settings[name]).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def token_dtype(vocab_size):
+    """
+    Function that returns the smallest dtype that can
+    store every index of a vocabulary with "vocab_size" words:
+    uint16 (2 bytes per token) if the vocabulary has at most
+    2 ** 16 words, int32 otherwise.
+
+    :type vocab_size: int
+    :rtype: np dtype
+    """
+    if vocab_size <= 2 ** 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.int32)
+
+
+def write_tokens(path, chunks, dtype, mode="wb"):
+    """
+    Function that writes the arrays of indexes in "chunks"
+    one after another in the raw token file "path" (no header,
+    "dtype" items). Only one chunk is in memory at a time.
+    With mode="ab" the tokens are appended to the file.
+    It returns the number of tokens written.
+
+    :type path: str
+    :type chunks: iterable of np array
+    :type dtype: np dtype
+    :type mode: str
+    :rtype: int
+    """
+    size = 0
+    with open(path, mode) as f:
+        for chunk in chunks:
+            np.asarray(chunk).astype(dtype, copy=False).tofile(f)
+            size += len(chunk)
+    return size
+
+
+def read_tokens(path, dtype, chunk_size=None):
+    """
+    Function to read the raw token file "path".
+    If "chunk_size" is None the file is memory-mapped
+    (read-only), so nothing is read from the disk until
+    the array is used. Otherwise it returns a generator
+    of arrays with at most "chunk_size" tokens.
+
+    :type path: str
+    :type dtype: np dtype
+    :type chunk_size: None or int
+    :rtype: np array or generator
+    """
+    if chunk_size is not None:
+        return read_token_chunks(path, dtype, chunk_size)
+    if os.path.getsize(path) == 0:
+        # mmap can not map an empty file
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def read_token_chunks(path, dtype, chunk_size):
+    """
+    Generator.
+    Yields the tokens of the raw token file "path"
+    in arrays of at most "chunk_size" tokens.
+
+    :type path: str
+    :type dtype: np dtype
+    :type chunk_size: int
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = np.fromfile(f, dtype=dtype, count=chunk_size)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+
+def new_cache_folder(cache_path):
+    """
+    Function that creates the temporary folder
+    where a new cache entry is written
+    (see "commit_cache_folder").
+
+    :type cache_path: str
+    :rtype: str
+    """
+    tmp_path = cache_path + ".tmp{}".format(os.getpid())
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    return tmp_path
+
+
+def commit_cache_folder(tmp_path, cache_path):
+    """
+    Function that renames the temporary folder "tmp_path"
+    to "cache_path", so a cache folder is always complete.
+
+    :type tmp_path: str
+    :type cache_path: str
+    """
+    try:
+        os.rename(tmp_path, cache_path)
+    except OSError:
+        # another process has written the same entry
+        shutil.rmtree(tmp_path)
+
+
+def save_dtype(cache_path, dtype):
+    """
+    Function to store the name of the dtype of the
+    token files in the cache folder "cache_path".
+
+    :type cache_path: str
+    :type dtype: np dtype
+    """
+    with open(os.path.join(cache_path, "dtype.txt"), "w") as f:
+        f.write(np.dtype(dtype).name)
+
+
+def load_cache(cache_path):
+    """
+    Function to read a cache written by the
+    method "build_cache" of the DataHolder.
+    The encoded splits are memory-mapped, so nothing is
+    read from the disk until the arrays are used.
+
+    :type cache_path: str
+    :rtype: (Vocab, dict of np array)
+    """
+    vocab = Vocab()
+    vocab.load(os.path.join(cache_path, "vocab.npz"))
+    with open(os.path.join(cache_path, "dtype.txt")) as f:
+        dtype = np.dtype(f.read().strip())
+    encoded = {}
+    for split in SPLITS:
+        encoded[split] = read_tokens(os.path.join(cache_path,
+                                                  split + ".tokens"),
+                                     dtype)
+    return vocab, encoded
+
+
+def record_append(cache_path, record):
+    """
+    Function that adds the dict "record" (the description
+    of one append to the corpus) as one json line to the
+    file "appends.jsonl" of the cache folder "cache_path".
+
+    :type cache_path: str
+    :type record: dict
+    """
+    with open(os.path.join(cache_path, "appends.jsonl"), "a") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def read_appends(cache_path):
+    """
+    Function to read every record written
+    by "record_append" in "cache_path".
+
+    :type cache_path: str
+    :rtype: list of dict
+    """
+    appends_path = os.path.join(cache_path, "appends.jsonl")
+    if not os.path.exists(appends_path):
+        return []
+    with open(appends_path) as f:
+        return [json.loads(line) for line in f]
@@ -1,7 +1,17 @@
 from collections import defaultdict
+import io
+import multiprocessing
 import numpy as np
+import os
 import re
 import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from text_processing.BatchSource import BatchSource
 
 
 class Vocab(object):
@@ -116,21 +126,15 @@ def ptb_iterator(raw_data, batch_size, num_steps):
         tokens(<eof> included)
 
 
+    The batches are views of one reshape of "raw_data" (see the
+    class BatchSource, that should be used when the same data
+    is read many times).
+
     :type raw_data: list or np array
     :type batch_size: int
     :type num_steps: int
     """
-    raw_data = np.array(raw_data, dtype=np.int32)
-    batch_len = len(raw_data) // batch_size
-    data = np.zeros([batch_size, batch_len], dtype=np.int32)
-    for i in range(batch_size):
-        data[i] = raw_data[batch_len * i:batch_len * (i + 1)]
-    epoch_size = (batch_len - 1) // num_steps
-    if epoch_size == 0:
-        raise ValueError("epoch_size == 0, decrease batch_size or num_steps")
-    for i in range(epoch_size):
-        x = data[:, i * num_steps:(i + 1) * num_steps]
-        y = data[:, i * num_steps + 1:(i + 1) * num_steps + 1]
+    for x, y in BatchSource(raw_data, batch_size, num_steps):
         yield (x, y)
 
 
@@ -148,6 +152,37 @@ def file_len(file_path):
     return i + 1
 
 
+URL = re.compile('http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+NUMS = re.compile(r'[+-]?\d+(?:\.\d+)?')
+PUNCT = re.compile(r'[.?\-",!;–…]+')
+FRIENDS = re.compile(r'@[A-Za-z0-9]+')
+SPACES = re.compile(' +')
+EMOJI_PATTERN = re.compile("["
+        u"\U0001F600-\U0001F64F"  # emoticons
+        u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+        u"\U0001F680-\U0001F6FF"  # transport & map symbols
+        u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+                           "]+", flags=re.UNICODE)
+
+
+def clean_line(line):
+    """
+    Function that cleans one line of text as described
+    in the function "clean_text".
+
+    :type line: str
+    :rtype: str
+    """
+    line = line.lower()
+    new_line = URL.sub("LINK", line)
+    new_line = FRIENDS.sub('PERSON', new_line)
+    new_line = NUMS.sub("N", new_line)
+    new_line = PUNCT.sub(" ", new_line)
+    new_line = EMOJI_PATTERN.sub("EMOJI", new_line)
+    new_line = SPACES.sub(" ", new_line)
+    return new_line
+
+
 def clean_text(path):
     """
     Function that remove every link, number and punctiation
@@ -160,27 +195,62 @@ def clean_text(path):
     :type path: str
     """
     new_path = path[:-4] + "CLEAN.txt"
-    url = re.compile('http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-    nums = re.compile(r'[+-]?\d+(?:\.\d+)?')
-    punct = re.compile(r'[.?\-",!;–…]+')
-    friends = re.compile(r'@[A-Za-z0-9]+')
-    spaces = re.compile(' +')
-    emoji_pattern = re.compile("["
-            u"\U0001F600-\U0001F64F"  # emoticons
-            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-            u"\U0001F680-\U0001F6FF"  # transport & map symbols
-            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                               "]+", flags=re.UNICODE)
     with open(new_path, "w") as f:
         for line in open(path):
-            line = line.lower()
-            new_line = url.sub("LINK", line)
-            new_line = friends.sub('PERSON', new_line)
-            new_line = nums.sub("N", new_line)
-            new_line = punct.sub(" ", new_line)
-            new_line = emoji_pattern.sub("EMOJI", new_line)
-            new_line = spaces.sub(" ", new_line)
-            f.write(new_line)
+            f.write(clean_line(line))
+
+
+def split_sizes(text_size):
+    """
+    Function that returns the number of lines of the train
+    data (four fifths of the "text_size" lines) and of the
+    valid data (half of the rest). The test data has
+    the remaining lines.
+
+    :type text_size: int
+    :rtype: (int, int)
+    """
+    ff = int((4 / 5) * text_size)
+    rest = text_size - ff
+    rest = int(rest / 2)
+    return ff, rest
+
+
+def write_splits(lines, text_size, train_path, valid_path, test_path,
+                 verbose=False):
+    """
+    Writes four fifths of the lines from the iterable "lines"
+    in the file "train_path", and divides the rest in the
+    files "valid_path" and "test_path".
+    "text_size" is the number of lines in "lines".
+
+    :type lines: iterable of str
+    :type text_size: int
+    :type train_path: str
+    :type valid_path: str
+    :type test_path: str
+    :type verbose: boolean
+    """
+    ff, rest = split_sizes(text_size)
+    with open(train_path, "w") as train:
+        with open(valid_path, "w") as valid:
+            with open(test_path, "w") as test:
+                for i, line in enumerate(lines):
+                    if i < ff:
+                        if verbose:
+                            sys.stdout.write('\rwriting train {} / {}'.format(i,text_size))
+                            sys.stdout.flush()
+                        train.write(line)
+                    elif ff <= i < ff + rest:
+                        if verbose:
+                            sys.stdout.write('\rwriting valid {} / {}'.format(i,text_size))
+                            sys.stdout.flush()
+                        valid.write(line)
+                    else:
+                        if verbose:
+                            sys.stdout.write('\rwriting test {} / {}'.format(i,text_size))
+                            sys.stdout.flush()
+                        test.write(line)
 
 
 def text_cut(file_path, verbose=False):
@@ -195,32 +265,12 @@ def text_cut(file_path, verbose=False):
     :type verbose: boolean
     """
     text_size = file_len(file_path)
-    ff = int((4 / 5) * text_size)
-    rest = text_size - ff
-    rest = int(rest / 2)
     train_path = file_path[:-4] + "TRAIN.txt"
     valid_path = file_path[:-4] + "VALID.txt"
     test_path = file_path[:-4] + "TEST.txt"
-    with open(train_path, "w") as train:
-        with open(valid_path, "w") as valid:
-            with open(test_path, "w") as test:
-                with open(file_path) as file:
-                    for i, line in enumerate(file):
-                        if i < ff:
-                            if verbose:
-                                sys.stdout.write('\rwriting train {} / {}'.format(i,text_size))
-                                sys.stdout.flush()
-                            train.write(line)
-                        elif ff <= i < ff + rest:
-                            if verbose:
-                                sys.stdout.write('\rwriting valid {} / {}'.format(i,text_size))
-                                sys.stdout.flush()
-                            valid.write(line)
-                        else:
-                            if verbose:
-                                sys.stdout.write('\rwriting test {} / {}'.format(i,text_size))
-                                sys.stdout.flush()
-                            test.write(line)
+    with open(file_path) as file:
+        write_splits(file, text_size, train_path, valid_path, test_path,
+                     verbose)
 
 
 def clean_and_cut(file_path, verbose=False):
@@ -239,3 +289,128 @@ def clean_and_cut(file_path, verbose=False):
     file_path = file_path[:-4] + "CLEAN.txt"
     text_cut(file_path, verbose)
     return train_path, valid_path, test_path
+
+
+def pool_context():
+    """
+    Multiprocessing context used by the parallel functions.
+    We use "fork" when the system has it, so the workers
+    do not need to import the script that started them.
+
+    :rtype: multiprocessing context
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def find_shards(path, shard_size):
+    """
+    Function that divides the file in "path" in byte ranges
+    [start, end) of roughly "shard_size" bytes. Every range
+    ends right after a new line, so no line is cut in two.
+
+    :type path: str
+    :type shard_size: int
+    :rtype: list of (int, int)
+    """
+    file_size = os.path.getsize(path)
+    shards = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < file_size:
+            f.seek(min(start + shard_size, file_size))
+            f.readline()
+            end = min(f.tell(), file_size)
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def clean_shard(args):
+    """
+    Cleans the lines in the byte range [start, end) of the file
+    "path" (with the function "clean_line") and writes them in the
+    file "out_path". The bytes are decoded as the function "open"
+    would decode them, so the result is the same as the one of
+    "clean_text". It returns the number of lines.
+
+    :type args: (str, int, int, str)
+    :rtype: int
+    """
+    path, start, end, out_path = args
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    count = 0
+    with open(out_path, "w") as out:
+        for line in io.TextIOWrapper(io.BytesIO(data)):
+            out.write(clean_line(line))
+            count += 1
+    return count
+
+
+def merge_shards(shard_paths, clean_file):
+    """
+    Generator.
+    Yields every line of the files in "shard_paths" (in order)
+    and also writes it in the open file "clean_file".
+
+    :type shard_paths: list of str
+    :type clean_file: file
+    """
+    for shard_path in shard_paths:
+        with open(shard_path) as shard:
+            for line in shard:
+                clean_file.write(line)
+                yield line
+
+
+def parallel_clean_and_cut(file_path,
+                           num_workers=None,
+                           shard_size=2 ** 23,
+                           verbose=False):
+    """
+    Same as the function "clean_and_cut" (the files
+    written by both functions are identical), but the text is
+    divided in shards of "shard_size" bytes that are cleaned by a
+    pool of "num_workers" processes (default: one per core).
+    The clean file and the train, valid and test files are
+    then written in one pass over the clean shards.
+    A file with only one shard is cleaned without a pool.
+
+    :type file_path: str
+    :type num_workers: None or int
+    :type shard_size: int
+    :type verbose: boolean
+    :rtype: str
+    """
+    clean_path = file_path[:-4] + "CLEAN.txt"
+    train_path = file_path[:-4] + "CLEANTRAIN.txt"
+    valid_path = file_path[:-4] + "CLEANVALID.txt"
+    test_path = file_path[:-4] + "CLEANTEST.txt"
+    shards = find_shards(file_path, shard_size)
+    tasks = [(file_path, start, end, clean_path + ".shard{}".format(i))
+             for i, (start, end) in enumerate(shards)]
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    num_workers = min(num_workers, len(tasks))
+    try:
+        if num_workers > 1:
+            with pool_context().Pool(num_workers) as pool:
+                counts = pool.map(clean_shard, tasks)
+        else:
+            counts = [clean_shard(task) for task in tasks]
+        shard_paths = [task[-1] for task in tasks]
+        with open(clean_path, "w") as clean_file:
+            write_splits(merge_shards(shard_paths, clean_file),
+                         sum(counts),
+                         train_path,
+                         valid_path,
+                         test_path,
+                         verbose)
+    finally:
+        for task in tasks:
+            if os.path.exists(task[-1]):
+                os.remove(task[-1])
+    return train_path, valid_path, test_path
@@ -0,0 +1,159 @@
+import os
+import sys
+import time
+import inspect
+from itertools import islice
+from textblob import TextBlob
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from text_processing.functions import pool_context
+from text_processing.cache_functions import cache_key, head_hash
+
+MAX_LINES = 10000
+
+
+def batch_noums(lines):
+    """
+    Function that returns the noun phrases of
+    each line in the list "lines" (one list per line).
+
+    :type lines: list of str
+    :rtype: list of list of str
+    """
+    return [list(TextBlob(line).noun_phrases) for line in lines]
+
+
+def read_batches(path, max_lines, batch_size):
+    """
+    Generator.
+    Yields the first "max_lines" lines of the file in "path"
+    in lists of "batch_size" lines.
+
+    :type path: str
+    :type max_lines: int
+    :type batch_size: int
+    """
+    with open(path) as f:
+        lines = islice(f, max_lines)
+        while True:
+            batch = list(islice(lines, batch_size))
+            if batch == []:
+                break
+            yield batch
+
+
+def collect_noums(path,
+                  max_noums=100,
+                  max_lines=MAX_LINES,
+                  max_seconds=60,
+                  batch_size=200,
+                  num_workers=None,
+                  blob_unk_token='< unk >'):
+    """
+    Function that collects the noun phrases of the text in "path"
+    until we have more than "max_noums" of them. The lines are
+    parsed by TextBlob in batches of "batch_size" lines using a pool
+    of "num_workers" processes (default: one per core). No more than
+    "max_lines" lines are parsed and the extraction stops after
+    "max_seconds" seconds. Noun phrases with the "blob_unk_token"
+    are discarded. It returns the noun phrases, in the order they
+    first appear in the text, and False if the extraction was
+    stopped by the time limit (the list depends on the speed
+    of the machine), True otherwise.
+
+    :type path: str
+    :type max_noums: int
+    :type max_lines: int
+    :type max_seconds: float
+    :type batch_size: int
+    :type num_workers: None or int
+    :type blob_unk_token: str
+    :rtype: (list of str, boolean)
+    """
+    start = time.time()
+    complete = True
+    all_noums = []
+    seen = set([])
+    batches = read_batches(path, max_lines, batch_size)
+    if num_workers is None:
+        num_workers = os.cpu_count()
+    pool = None
+    if num_workers > 1:
+        pool = pool_context().Pool(num_workers)
+        results = pool.imap(batch_noums, batches)
+    else:
+        results = map(batch_noums, batches)
+    try:
+        for result in results:
+            for noums in result:
+                if len(seen) > max_noums:
+                    break
+                for noum in noums:
+                    if noum not in seen:
+                        seen.add(noum)
+                        all_noums.append(noum)
+            if len(seen) > max_noums:
+                break
+            if time.time() - start > max_seconds:
+                complete = False
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+    all_noums = [noum for noum in all_noums if noum.find(blob_unk_token) == -1]
+    return all_noums, complete
+
+
+def extract_noums(path, **kwargs):
+    """
+    Function that returns the noun phrases of the text in "path"
+    (see "collect_noums", all keyword arguments are passed to it).
+
+    :type path: str
+    :rtype: list of str
+    """
+    return collect_noums(path, **kwargs)[0]
+
+
+def load_noums(path, cache_folder=None, **kwargs):
+    """
+    Function that returns the noun phrases of the text in "path"
+    (see "extract_noums", all keyword arguments are passed to it).
+    If "cache_folder" is not None the list is stored in one txt file
+    inside this folder, keyed by the arguments and the content of
+    the lines of "path" that can be parsed ("max_lines"), and the
+    next calls only read this file. So appending text to a long
+    file does not change the key. A list cut by the time limit
+    ("max_seconds") is not stored, so the cached list never
+    depends on the speed of the machine.
+
+    :type path: str
+    :type cache_folder: None or str
+    :rtype: list of str
+    """
+    if cache_folder is None:
+        return extract_noums(path, **kwargs)
+    # only the complete lists are stored, so the time limit
+    # and the number of processes are not part of the key
+    settings = dict(kwargs)
+    settings.pop("max_seconds", None)
+    settings.pop("num_workers", None)
+    settings["head"] = head_hash(path, settings.get("max_lines", MAX_LINES))
+    key = cache_key([], **settings)
+    noums_path = os.path.join(cache_folder, "noums_" + key + ".txt")
+    if os.path.exists(noums_path):
+        with open(noums_path) as f:
+            return [line.rstrip("\n") for line in f]
+    all_noums, complete = collect_noums(path, **kwargs)
+    if not complete:
+        return all_noums
+    os.makedirs(cache_folder, exist_ok=True)
+    tmp_path = noums_path + ".tmp{}".format(os.getpid())
+    with open(tmp_path, "w") as f:
+        for noum in all_noums:
+            f.write(noum + "\n")
+    os.replace(tmp_path, noums_path)
+    return all_noums
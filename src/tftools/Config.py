@@ -10,6 +10,13 @@ class Config(object):
     :type early_stopping: int
     :type dropout: float
     :type lr: float
+    :type prefetch: int
+    :type rnn_mode: str
+    :type loss: str
+    :type num_sampled: int
+    :type output_layer: str
+    :type cutoffs: list of int
+    :type tail_factor: int
     """
     def __init__(self,
                  embed_size=50,
@@ -19,7 +26,14 @@ class Config(object):
                  max_epochs=16,
                  early_stopping=2,
                  dropout=0.991323729933,
-                 lr=0.00217346380124):
+                 lr=0.00217346380124,
+                 prefetch=2,
+                 rnn_mode="static",
+                 loss="softmax",
+                 num_sampled=64,
+                 output_layer="dense",
+                 cutoffs=(2000, 10000),
+                 tail_factor=4):
         self.embed_size = embed_size
         self.batch_size = batch_size
         self.num_steps = num_steps
@@ -28,3 +42,10 @@ class Config(object):
         self.early_stopping = early_stopping
         self.dropout = dropout
         self.lr = lr
+        self.prefetch = prefetch
+        self.rnn_mode = rnn_mode
+        self.loss = loss
+        self.num_sampled = num_sampled
+        self.output_layer = output_layer
+        self.cutoffs = list(cutoffs)
+        self.tail_factor = tail_factor
@@ -1,43 +1,82 @@
+from array import array
 import numpy as np
 import os
 import sys
 import inspect
-from textblob import TextBlob
+import shutil
+import time
 
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
 from text_processing.Vocab import Vocab
-from text_processing.functions import clean_and_cut
+from text_processing.functions import parallel_clean_and_cut, read_line_eos
+from text_processing.functions import clean_line, split_sizes
+from text_processing.noum_functions import load_noums
+from text_processing.cache_functions import (SPLITS, cache_key, file_hash,
+                                             hash_state, load_hash_index,
+                                             save_hash_index, token_dtype,
+                                             write_tokens, read_tokens,
+                                             save_dtype, load_cache,
+                                             new_cache_folder,
+                                             commit_cache_folder,
+                                             record_append)
 
 
 class DataHolder():
     """
-    Class that preprocess all the text data. It also
-    stores a list of noums of the original text.
-    We use this list to substititute the tokens "unk_token"
-    from the text. The textblob library adds some blanck space.
-    That is why we used two unk variables: "unk_token" is the
-    original token, "blob_unk_token" is the one for the textblob lib.
+    Class that preprocess all the text data.
     The default text is the ptb dataset that is stored in the folder "data".
     So if you pass a folder as the "text_path" it will search the
     ptb dataset. Otherwise it will prepocess the txt in "text_path".
+    If "use_cache" is True the vocabulary and the encoded data
+    are stored in the folder "dataholder_cache"
+    (next to the train file) and loaded from there the next time the
+    same corpus is used with the same settings. The cached splits
+    are raw token files (uint16 when the vocabulary has at most
+    2 ** 16 words) that are memory-mapped, so "encoded_train" does
+    not need to fit in memory. New lines of text can be added
+    with the method "append", which only preprocesses the new lines.
+    The generation does not use noums (the unk token is never
+    sampled, see BaseGenerator). The method "get_noums" is only a
+    cached helper for the benchmarks: it extracts the noun phrases
+    of the train data (at most "max_noums", using "num_workers"
+    processes, see the function "extract_noums") the first time
+    it is called and stores them in the cache, apart from the
+    encoded data. The textblob library adds some blank space to
+    the unk token, so it is "blob_unk_token" in the noun phrases.
+    To shrink the vocabulary (and so the output layer of the model)
+    we can drop every word that appears less than "min_count" times
+    in the train data, or keep only the "max_vocab" most frequent words.
+    In both cases the removed words are encoded as "unk_token" and
+    the vocabulary is ordered by frequency.
 
     :type text_path: str
     :type debug: boolean
     :type max_noums: int
     :type unk_token: str
+    :type use_cache: boolean
+    :type min_count: int
+    :type max_vocab: None or int
+    :type num_workers: None or int
     """
     def __init__(self,
                  text_path,
                  debug=False,
                  max_noums=100,
-                 unk_token='<unk>'):
+                 unk_token='<unk>',
+                 use_cache=True,
+                 min_count=1,
+                 max_vocab=None,
+                 num_workers=None):
         self.unk_token = unk_token
         self.blob_unk_token = '< unk >'
-        self.all_noums = set([])
+        self.all_noums = None
         self.max_noums = max_noums
+        self.num_workers = num_workers
+        self.min_count = min_count
+        self.max_vocab = max_vocab
         if os.path.isdir(text_path):
             self.path_train = os.path.join(text_path, 'ptb.train.txt')
             self.path_valid = os.path.join(text_path, 'ptb.valid.txt')
@@ -53,55 +92,374 @@ class DataHolder():
             condition2 = os.path.exists(self.path_valid)
             condition3 = os.path.exists(self.path_test)
             if not (condition1 and condition2 and condition3):
-                path_train, path_valid, path_test = clean_and_cut(text_path)
+                paths = parallel_clean_and_cut(text_path, num_workers)
+                path_train, path_valid, path_test = paths
                 self.path_train = path_train
                 self.path_valid = path_valid
                 self.path_test = path_test
-        self.load_data(debug)
-        self.all_noums = [noum for noum in list(self.all_noums)
-                          if noum.find(self.blob_unk_token) == -1]
+        self.debug = debug
+        self.cache_path = None
+        self.cache_folder = None
+        self.hash_index = None
+        if use_cache:
+            self.cache_folder = os.path.join(os.path.dirname(self.path_train),
+                                             "dataholder_cache")
+            self.hash_index = load_hash_index(self.cache_folder)
+            self.cache_path = os.path.join(self.cache_folder,
+                                           self.current_key())
+            save_hash_index(self.cache_folder, self.hash_index)
+        if self.cache_path is not None and os.path.exists(self.cache_path):
+            self.load_from_cache(debug)
+        else:
+            self.load_data(debug)
+
+    def get_noums(self):
+        """
+        Returns the list of noums of the train data (a helper
+        for the benchmarks, the generation does not use it). They
+        are extracted (or read from the cache) in the first call
+        and kept in "all_noums".
+
+        :rtype: list of str
+        """
+        if self.all_noums is None:
+            self.all_noums = load_noums(self.path_train,
+                                        self.cache_folder,
+                                        max_noums=self.max_noums,
+                                        num_workers=self.num_workers,
+                                        blob_unk_token=self.blob_unk_token)
+        return self.all_noums
+
+    def current_key(self):
+        """
+        Returns the key of the cache entry for the current
+        content of the train/dev/test files and the
+        current settings.
 
-    def read_line_eos_noums(self,
-                            path):
+        :rtype: str
+        """
+        return cache_key([self.path_train, self.path_valid, self.path_test],
+                         hash_index=self.hash_index,
+                         unk_token=self.unk_token,
+                         min_count=self.min_count,
+                         max_vocab=self.max_vocab)
+
+    def encode_chunks(self, path, count=False, chunk_size=2 ** 16):
         """
         Generator.
-        Similar as the function read_line_eos from
-        the text_mani module. The only diference here
-        is that we keep track of all the noums.
+        Reads the text in "path" only once and yields the indexes
+        of the tokens in int32 arrays of at most "chunk_size" tokens.
+        If "count" is True the vocabulary is updated with each token
+        before it is encoded (method "add_word"), so the vocabulary and
+        the encoded text are built in one pass. Otherwise the tokens
+        are encoded with the method "encode_many".
+
+        :type path: str
+        :type count: boolean
+        :type chunk_size: int
+        """
+        if count:
+            encode_add = self.vocab.add_word
+
+            def encode(tokens):
+                return np.fromiter(map(encode_add, tokens),
+                                   dtype=np.int32,
+                                   count=len(tokens))
+        else:
+            encode = self.vocab.encode_many
+        chunk = []
+        for word in read_line_eos(path):
+            chunk.append(word)
+            if len(chunk) == chunk_size:
+                yield encode(chunk)
+                chunk = []
+        if chunk != []:
+            yield encode(chunk)
+
+    def encode_file(self, path, count=False):
+        """
+        Encodes every token of the text in "path" (see "encode_chunks").
+        The indexes are stored in a typed buffer (4 bytes per token)
+        instead of a list of python ints.
 
         :type path: str
+        :type count: boolean
+        :rtype: np array
+        """
+        buffer = array('i')
+        for chunk in self.encode_chunks(path, count):
+            buffer.frombytes(chunk.astype(np.intc).tobytes())
+        return np.frombuffer(buffer, dtype=np.intc).astype(np.int32,
+                                                             copy=False)
+
+    def prune_vocab(self):
+        """
+        Prunes the vocabulary with "min_count" and "max_vocab".
+        It returns the array to translate the indexes of the
+        words (see the method "prune" of Vocab), or None if
+        there is nothing to prune.
+
+        :rtype: None or np array
         """
-        for line in open(path):
-            if len(list(self.all_noums)) <= self.max_noums:
-                blob = TextBlob(line)
-                noums = set(blob.noun_phrases)
-                self.all_noums = self.all_noums.union(noums)
-            for word in line.split():
-                yield word
-            yield '<eos>'
+        if self.min_count > 1 or self.max_vocab is not None:
+            return self.vocab.prune(self.min_count, self.max_vocab)
+        return None
 
     def load_data(self, debug):
         """
         Loads starter word-vectors and train/dev/test data.
+        Each file is read only once. The vocabulary is
+        frozen after reading the train data.
+        If the cache is on the encoded data is written
+        in the cache (method "build_cache") and memory-mapped
+        from there, otherwise it is kept in memory.
 
         :type debug: boolean
         """
         self.vocab = Vocab()
-        self.vocab.read_words(self.read_line_eos_noums(self.path_train))
-        self.encoded_train = np.array(
-            [self.vocab.encode(word)
-             for word in self.read_line_eos_noums(self.path_train)],
-            dtype=np.int32)
-        self.encoded_valid = np.array(
-            [self.vocab.encode(word)
-             for word in self.read_line_eos_noums(self.path_valid)],
-            dtype=np.int32)
-        self.encoded_test = np.array(
-            [self.vocab.encode(word)
-             for word in self.read_line_eos_noums(self.path_test)],
-            dtype=np.int32)
+        if self.cache_path is not None:
+            self.build_cache()
+            self.load_from_cache(debug)
+            return
+        self.encoded_train = self.encode_file(self.path_train, count=True)
+        remap = self.prune_vocab()
+        if remap is not None:
+            self.encoded_train = remap[self.encoded_train]
+        self.vocab.freeze()
+        self.vocab.update_total()
+        self.encoded_valid = self.encode_file(self.path_valid)
+        self.encoded_test = self.encode_file(self.path_test)
+        if debug:
+            self.cut_debug()
+
+    def build_cache(self, chunk_size=2 ** 20):
+        """
+        Builds the vocabulary and writes the encoded train/dev/test
+        data in "cache_path" as raw token files, one chunk at a time,
+        so the encoded corpus is never held in memory.
+        The indexes are stored as uint16 when the vocabulary
+        fits (see "token_dtype"). Since the vocabulary size is only
+        known after the train data is read, the train data is first
+        written as int32 and then converted (and remapped if the
+        vocabulary was pruned) in chunks of "chunk_size" tokens.
+
+        :type chunk_size: int
+        """
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = new_cache_folder(self.cache_path)
+        raw_train = os.path.join(tmp_path, "train.int32")
+        write_tokens(raw_train,
+                     self.encode_chunks(self.path_train, count=True),
+                     np.int32)
+        remap = self.prune_vocab()
+        self.vocab.freeze()
+        self.vocab.update_total()
+        dtype = token_dtype(len(self.vocab))
+        chunks = read_tokens(raw_train, np.int32, chunk_size)
+        if remap is not None:
+            chunks = (remap[chunk] for chunk in chunks)
+        write_tokens(os.path.join(tmp_path, "train.tokens"), chunks, dtype)
+        os.remove(raw_train)
+        for split, path in [("valid", self.path_valid),
+                            ("test", self.path_test)]:
+            write_tokens(os.path.join(tmp_path, split + ".tokens"),
+                         self.encode_chunks(path),
+                         dtype)
+        self.vocab.save(os.path.join(tmp_path, "vocab.npz"))
+        save_dtype(tmp_path, dtype)
+        commit_cache_folder(tmp_path, self.cache_path)
+
+    def load_from_cache(self, debug):
+        """
+        Loads the vocabulary and the train/dev/test data
+        stored in "cache_path" by the method "build_cache".
+        The encoded data is memory-mapped: only the pages
+        of the windows that are used are read from the disk.
+
+        :type debug: boolean
+        """
+        vocab, encoded = load_cache(self.cache_path)
+        self.vocab = vocab
+        self.encoded_train = encoded["train"]
+        self.encoded_valid = encoded["valid"]
+        self.encoded_test = encoded["test"]
         if debug:
-            num_debug = 1024
-            self.encoded_train = self.encoded_train[:num_debug]
-            self.encoded_valid = self.encoded_valid[:num_debug]
-            self.encoded_test = self.encoded_test[:num_debug]
+            self.cut_debug()
+
+    def cut_debug(self, num_debug=1024):
+        """
+        Keeps only the first "num_debug" tokens of each split.
+
+        :type num_debug: int
+        """
+        self.encoded_train = self.encoded_train[:num_debug]
+        self.encoded_valid = self.encoded_valid[:num_debug]
+        self.encoded_test = self.encoded_test[:num_debug]
+
+    def append(self, lines, split="train"):
+        """
+        Adds the lines of text "lines" to the corpus without
+        preprocessing the old data again. The lines are cleaned
+        (function "clean_line") and written at the end of the file
+        of "split" ("train", "valid" or "test"). With split=None four
+        fifths of the lines go to the train data and the rest is
+        divided between valid and test, as in "clean_and_cut".
+        Only the new lines are encoded. The new indexes are appended
+        to the encoded data and the train lines update the word
+        counts of the vocabulary (a new train word gets the next
+        free index). If the cache is on the token files are extended,
+        the entry is moved to the key of the new content (only the
+        new bytes of the text files are hashed) and the append is
+        recorded in the file "appends.jsonl" of the entry.
+        If the vocabulary was pruned ("min_count" or "max_vocab") the
+        new counts can change which words are kept and their order,
+        so the whole corpus is preprocessed again (method "rebuild").
+        In both cases the result is the same as a new DataHolder
+        of the whole corpus.
+        It returns the number of new lines of each split.
+
+        :type lines: list of str
+        :type split: None or str
+        :rtype: dict
+        """
+        lines = [clean_line(line.rstrip("\n")) + "\n" for line in lines]
+        if split is None:
+            ff, rest = split_sizes(len(lines))
+            parts = {"train": lines[:ff],
+                     "valid": lines[ff:ff + rest],
+                     "test": lines[ff + rest:]}
+        else:
+            assert split in SPLITS, "unknown split: {}".format(split)
+            parts = {split: lines}
+        paths = {"train": self.path_train,
+                 "valid": self.path_valid,
+                 "test": self.path_test}
+        if self.hash_index is not None:
+            for path in paths.values():
+                file_hash(path, self.hash_index)
+        pruned = self.min_count > 1 or self.max_vocab is not None
+        encoded = {}
+        for name in SPLITS:
+            new_lines = parts.get(name, [])
+            if new_lines == []:
+                continue
+            with open(paths[name], "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # the last line is already read as one line
+                        new_lines[0] = "\n" + new_lines[0]
+            with open(paths[name], "a") as f:
+                f.writelines(new_lines)
+            if self.hash_index is not None:
+                path = os.path.abspath(paths[name])
+                self.hash_index[path] = hash_state(path,
+                                                   self.hash_index[path])
+            if pruned:
+                continue
+            tokens = []
+            for line in new_lines:
+                tokens.extend(line.split())
+                tokens.append('<eos>')
+            if name == "train":
+                encoded[name] = self.count_words(tokens)
+            else:
+                encoded[name] = self.vocab.encode_many(tokens)
+        if pruned:
+            self.rebuild()
+        elif self.cache_path is None:
+            for name, new in encoded.items():
+                attribute = "encoded_" + name
+                old = getattr(self, attribute)
+                setattr(self, attribute, np.concatenate([old, new]))
+        else:
+            self.extend_cache(encoded,
+                              {name: len(parts.get(name, []))
+                               for name in SPLITS})
+        return {name: len(parts.get(name, [])) for name in SPLITS}
+
+    def count_words(self, tokens):
+        """
+        Encodes the list of new train tokens "tokens"
+        and adds them to the counts of the vocabulary
+        (see the method "append").
+
+        :type tokens: list of str
+        :rtype: np array
+        """
+        self.vocab.unfreeze()
+        encoded = np.fromiter(map(self.vocab.add_word, tokens),
+                              dtype=np.int32,
+                              count=len(tokens))
+        self.vocab.freeze()
+        self.vocab.total_words += len(tokens)
+        return encoded
+
+    def rebuild(self):
+        """
+        Preprocesses the current content of the train/dev/test
+        files again, as a new DataHolder (used by "append" when
+        the vocabulary is pruned). With the cache the entry of the
+        old content is removed and the data is read from the
+        entry of the new key (built if it does not exist).
+        """
+        if self.cache_path is None:
+            self.load_data(self.debug)
+            return
+        old_path = self.cache_path
+        self.cache_path = os.path.join(self.cache_folder, self.current_key())
+        save_hash_index(self.cache_folder, self.hash_index)
+        if os.path.exists(self.cache_path):
+            self.load_from_cache(self.debug)
+        else:
+            self.load_data(self.debug)
+        if old_path != self.cache_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    def extend_cache(self, encoded, num_lines, chunk_size=2 ** 20):
+        """
+        Appends the arrays of indexes "encoded" (one per split)
+        to the token files of the cache entry and moves the entry
+        to the key of the new content. While it is changed the entry
+        has a temporary name, so it is never found under a key
+        that does not match its content. If the vocabulary does not
+        fit in the dtype of the token files anymore every token
+        file is converted to int32 (in chunks of "chunk_size" tokens).
+
+        :type encoded: dict of np array
+        :type num_lines: dict of int
+        :type chunk_size: int
+        """
+        tmp_path = self.cache_path + ".append{}".format(os.getpid())
+        os.rename(self.cache_path, tmp_path)
+        with open(os.path.join(tmp_path, "dtype.txt")) as f:
+            dtype = np.dtype(f.read().strip())
+        new_dtype = token_dtype(len(self.vocab))
+        if new_dtype.itemsize > dtype.itemsize:
+            for name in SPLITS:
+                tokens_path = os.path.join(tmp_path, name + ".tokens")
+                write_tokens(tokens_path + ".tmp",
+                             read_tokens(tokens_path, dtype, chunk_size),
+                             new_dtype)
+                os.replace(tokens_path + ".tmp", tokens_path)
+            dtype = new_dtype
+            save_dtype(tmp_path, dtype)
+        for name, new in encoded.items():
+            write_tokens(os.path.join(tmp_path, name + ".tokens"),
+                         [new],
+                         dtype,
+                         mode="ab")
+        vocab_path = os.path.join(tmp_path, "vocab.npz")
+        self.vocab.save(vocab_path + ".tmp")
+        os.replace(vocab_path + ".tmp", vocab_path)
+        record_append(tmp_path,
+                      {"lines": num_lines,
+                       "tokens": {name: len(new)
+                                  for name, new in encoded.items()},
+                       "vocab_size": len(self.vocab),
+                       "time": time.time()})
+        self.cache_path = os.path.join(self.cache_folder, self.current_key())
+        save_hash_index(self.cache_folder, self.hash_index)
+        commit_cache_folder(tmp_path, self.cache_path)
+        self.load_from_cache(self.debug)
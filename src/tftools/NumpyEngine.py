@@ -0,0 +1,152 @@
+import json
+import os
+import numpy as np
+
+try:
+    from PrefixCache import checkpoint_key
+except ImportError:
+    from tftools.PrefixCache import checkpoint_key
+
+
+def sigmoid(x):
+    """
+    Logistic function, written with tanh so it
+    does not overflow for large negative values.
+
+    :type x: np array
+    :rtype: np array
+    """
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def log_softmax(x):
+    """
+    Log of the softmax of each row of "x".
+
+    :type x: np array
+    :rtype: np array
+    """
+    x = x - x.max(axis=1, keepdims=True)
+    return x - np.log(np.exp(x).sum(axis=1, keepdims=True))
+
+
+def softmax(x):
+    """
+    Softmax of each row of "x".
+
+    :type x: np array
+    :rtype: np array
+    """
+    x = np.exp(x - x.max(axis=1, keepdims=True))
+    return x / x.sum(axis=1, keepdims=True)
+
+
+class NumpyEngine(object):
+    """
+    Forward step of the RNNLanguageModel written with numpy.
+    The weights are read once from the folder "export_path" written
+    by the function "export_numpy" (after training they are in
+    "checkpoints/best_validation_numpy"), so generating text does not
+    need TensorFlow. With mmap_mode="r" the arrays are memory-mapped
+    (the pages are shared by every process that reads the same files).
+    It has the same interface as the class TFEngine: "zero_state"
+    gives the first state of a batch of sequences and "step" gives
+    the distribution of the next word of each sequence (float32, the
+    same values as "next_prediction" of the model) and the new state.
+    The attribute "checkpoint" identifies the weights.
+
+    :type export_path: str
+    :type mmap_mode: None or str
+    """
+    def __init__(self, export_path, mmap_mode=None):
+        with open(os.path.join(export_path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.checkpoint = checkpoint_key(os.path.join(export_path,
+                                                      "meta.json"))
+        self.weights = {}
+        for name in os.listdir(export_path):
+            if name.endswith(".npy"):
+                self.weights[name[:-4]] = np.load(os.path.join(export_path,
+                                                               name),
+                                                  mmap_mode=mmap_mode)
+        self.hidden_size = self.meta["hidden_size"]
+        self.vocab_size = self.meta["vocab_size"]
+        self.output_layer = self.meta["output_layer"]
+        self.L = self.weights["WordEmbeddings.L"]
+        self.W = self.weights["hidden.W"]
+        self.U = self.weights["hidden.input_weights.weights"]
+        self.b = self.weights["hidden.input_weights.bias"]
+        self.rank = self.weights["rank"]
+
+    def zero_state(self, batch_size=1):
+        """
+        State of "batch_size" new sequences.
+
+        :type batch_size: int
+        :rtype: np array
+        """
+        return np.zeros((batch_size, self.hidden_size), dtype=np.float32)
+
+    def logits(self, h):
+        """
+        Output layer of the model applied to the
+        states "h" -- shape = (batch_size, hidden_size).
+        With the adaptive softmax the logits are the
+        log probabilities (in the order of the word indexes).
+
+        :type h: np array
+        :rtype: np array
+        """
+        if self.output_layer == "dense":
+            return (np.dot(h, self.weights["Projection_layer.output_weights.weights"]) +
+                    self.weights["Projection_layer.output_weights.bias"])
+        prefix = "Projection_layer.adaptive"
+        cutoffs = self.meta["cutoffs"]
+        head_size = cutoffs[0]
+        head_logits = (np.dot(h, self.weights[prefix + ".head.weights"]) +
+                       self.weights[prefix + ".head.bias"])
+        head_log_probs = log_softmax(head_logits)
+        log_probs = [head_log_probs[:, :head_size]]
+        for i in range(len(cutoffs) - 1):
+            tail = prefix + ".tail{}".format(i)
+            projection = np.dot(h, self.weights[tail + ".projection"])
+            tail_logits = (np.dot(projection, self.weights[tail + ".output.weights"]) +
+                           self.weights[tail + ".output.bias"])
+            cluster_log_prob = head_log_probs[:, head_size + i:head_size + i + 1]
+            log_probs.append(log_softmax(tail_logits) + cluster_log_prob)
+        # columns from rank order to index order
+        return np.concatenate(log_probs, axis=1)[:, self.rank]
+
+    def step(self, tokens, state):
+        """
+        One step of the RNN for a batch of sequences:
+        "tokens" are the last words (indexes) of the sequences and
+        "state" their states. It returns the distribution of the
+        next word of each sequence -- shape = (batch_size, vocab_size)
+        -- and the new states.
+
+        :type tokens: list of int or np array
+        :type state: np array
+        :rtype: (np array, np array)
+        """
+        logits, h = self.step_logits(tokens, state)
+        return softmax(logits), h
+
+    def step_logits(self, tokens, state):
+        """
+        Same as "step", but it returns the logits of the
+        distribution of the next word (see "sample_logits").
+
+        :type tokens: list of int or np array
+        :type state: np array
+        :rtype: (np array, np array)
+        """
+        x = self.L[np.asarray(tokens).reshape(-1)]
+        h = sigmoid(np.dot(state, self.W) + np.dot(x, self.U) + self.b)
+        return self.logits(h), h
+
+    def close(self):
+        """
+        Nothing to release (same interface as TFEngine).
+        """
+        pass
@@ -0,0 +1,92 @@
+import os
+from collections import OrderedDict
+import numpy as np
+
+
+def checkpoint_key(path):
+    """
+    Function that identifies the version of the weights stored in
+    the file "path" (the path, the size and the time of the last
+    modification of the file), so the states computed with
+    old weights are not used after a new training.
+
+    :type path: str
+    :rtype: tuple
+    """
+    if not os.path.exists(path):
+        return (path, None, None)
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime_ns)
+
+
+class PrefixCache(object):
+    """
+    LRU cache of the state of the model after the tokens of
+    a starting text. The keys are (checkpoint, tokens) -- the
+    checkpoint is the attribute "checkpoint" of the engine, see
+    "checkpoint_key" -- and the values are the pairs
+    (logits of the next word, state), both with shape
+    (1, size). When there are more than "max_size" prefixes
+    the least recently used one is removed.
+
+    :type max_size: int
+    """
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the pair (logits, state) of "key"
+        or None if "key" is not in the cache.
+
+        :type key: tuple
+        :rtype: None or (np array, np array)
+        """
+        value = self.entries.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[key] = value
+        return value
+
+    def put(self, key, value):
+        """
+        Stores the pair (logits, state) of "key".
+
+        :type key: tuple
+        :type value: (np array, np array)
+        """
+        self.entries.pop(key, None)
+        self.entries[key] = value
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def prime(self, engine, tokens):
+        """
+        Runs all the tokens of the starting text "tokens"
+        (one step of "engine" for each token, from the
+        first state) and returns the logits of the next
+        word and the state after the last token. The result is
+        taken from the cache when the prefix was already run
+        with the same weights.
+
+        :type engine: TFEngine or NumpyEngine
+        :type tokens: list of int
+        :rtype: (np array, np array)
+        """
+        key = (engine.checkpoint, tuple(tokens))
+        value = self.get(key)
+        if value is None:
+            state = engine.zero_state(1)
+            for token in tokens:
+                logits, state = engine.step_logits([token], state)
+            value = (np.array(logits), np.array(state))
+            self.put(key, value)
+        return value
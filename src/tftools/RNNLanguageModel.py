@@ -1,42 +1,118 @@
 import os
+import numpy as np
 import tensorflow as tf
 
 try:
     from basic_functions import init_wb, affine_transformation
+    from softmax_functions import adaptive_cutoffs, init_adaptive
+    from softmax_functions import adaptive_loss, adaptive_log_probs
 except ImportError:
     from tftools.basic_functions import init_wb, affine_transformation
+    from tftools.softmax_functions import adaptive_cutoffs, init_adaptive
+    from tftools.softmax_functions import adaptive_loss, adaptive_log_probs
+
+
+def word_counts(vocab):
+    """
+    Function that returns the number of times each word of
+    "vocab" appears in the train data (an array indexed
+    by the word index).
+
+    :type vocab: Vocab
+    :rtype: np array
+    """
+    if vocab.frozen:
+        return np.asarray(vocab.word_freq)
+    return np.array([vocab.word_freq[vocab.decode(index)]
+                     for index in range(len(vocab))])
+
+
+def word_ranks(vocab):
+    """
+    Function that returns the array "rank" such that rank[index]
+    is the position of the word "index" when the vocabulary is
+    sorted by frequency (the most frequent word has rank 0).
+
+    :type vocab: Vocab
+    :rtype: np array
+    """
+    freq = word_counts(vocab)
+    order = np.argsort(-freq, kind="mergesort")
+    rank = np.zeros(len(freq), dtype=np.int32)
+    rank[order] = np.arange(len(freq), dtype=np.int32)
+    return rank
 
 
 class RNNLanguageModel():
     """
-    Language model based on a RNN
+    Language model based on a RNN.
+    With config.rnn_mode == "static" the recurrence is unrolled
+    in python, one set of ops for each of the "num_steps" steps.
+    With config.rnn_mode == "dynamic" the recurrence is a symbolic
+    loop (tf.scan) and the input and output layers are one matmul
+    over all the steps, so the graph size does not depend on
+    "num_steps" and the same graph accepts batches of any shape.
+    Both modes have the same variables, so a checkpoint saved
+    in one mode can be restored in the other. With a sampled loss
+    the dense output weights are transposed (see "output_projection"),
+    so its checkpoints are restored with the same config.loss.
+    If "inference" is True the graph has only what is needed to
+    generate text, one step of the RNN at a time (see the
+    method "add_inference_step").
+    With the adaptive softmax the rank of each word (see "word_ranks")
+    is the non trainable variable "rank_variable", saved in the
+    checkpoints: the vocabulary counts only give its initial value,
+    so a restored model keeps the ranks it was trained with
+    even if the counts changed (see DataHolder.append).
 
     :type config: Config
     :type dataholder: DataHolder
     :type debug: boolean
     :type search: boolean
+    :type inference: boolean
     """
 
-    def __init__(self, config, dataholder, debug=False, search=False):
+    def __init__(self,
+                 config,
+                 dataholder,
+                 debug=False,
+                 search=False,
+                 inference=False):
         self.config = config
+        self.inference = inference
         self.num_steps = self.config.num_steps
         self.embed_size = self.config.embed_size
         self.batch_size = self.config.batch_size
         self.hidden_size = self.config.hidden_size
+        self.rnn_mode = self.config.rnn_mode
+        assert self.rnn_mode in ["static", "dynamic"], "unknown rnn_mode"
+        assert self.config.loss in ["softmax", "sampled_softmax", "nce"], \
+            "unknown loss"
+        self.output_layer = self.config.output_layer
+        self.output_transposed = self.config.loss != "softmax"
+        assert self.output_layer in ["dense", "adaptive"], \
+            "unknown output_layer"
+        assert self.output_layer == "dense" or self.config.loss == "softmax", \
+            "the adaptive softmax is not used with a sampled loss"
         self.search = search
         self.vocab = dataholder.vocab
         self.vocab_size = len(self.vocab)
         self.encoded_train = dataholder.encoded_train
         self.encoded_valid = dataholder.encoded_valid
         self.encoded_test = dataholder.encoded_test
+        self.rank = word_ranks(self.vocab)
         self.build_graph()
 
     def add_placeholders(self):
         """
-        Adding placeholders for the graph
+        Adding placeholders for the graph.
+        In the dynamic mode the batch size and the number
+        of steps are not fixed.
 
         """
         input_shape = [self.batch_size, self.num_steps]
+        if self.rnn_mode == "dynamic":
+            input_shape = [None, None]
         self.input_placeholder = tf.placeholder(tf.int32,
                                                 shape=input_shape,
                                                 name="input_placeholder")
@@ -80,6 +156,8 @@ class RNNLanguageModel():
             Lshape = (self.vocab_size, self.embed_size)
             self.L = tf.get_variable("L", shape=Lshape)
             self.look = tf.nn.embedding_lookup(self.L, self.input_placeholder)
+            if self.rnn_mode == "dynamic":
+                return
             self.split = tf.split(self.look, self.num_steps, 1)
             self.inputs = [tf.squeeze(tensor, squeeze_dims=[1])
                            for tensor in self.split]
@@ -119,7 +197,6 @@ class RNNLanguageModel():
         initialshape = (self.batch_size, self.hidden_size)
         Wshape = (self.hidden_size, self.hidden_size)
         Ushape = (self.embed_size, self.hidden_size)
-        Vshape = (self.config.hidden_size, self.vocab_size)
 
         with tf.variable_scope("memory"):
             self.initial_state = tf.zeros(initialshape)
@@ -140,20 +217,186 @@ class RNNLanguageModel():
                 if i == (len(self.inputs) - 1):
                     self.final_state = h
 
+        self.add_projection()
+
+    def add_dynamic_logits(self):
+        """
+        Same model as the method "add_logits" with a symbolic loop.
+
+        The embeddings "look" are turned time major --
+        shape = (num_steps, batch_size, embed_size) -- and the input
+        affine transformation (t*weights + bias) is applied to all the
+        steps with one matmul. Then tf.scan runs the recurrence
+
+            h = sigmoid(previous_h*H + input_t)
+
+        over the first axis, so "rnn_outputs" is one tensor --
+        shape = (num_steps, batch_size, hidden_size) -- and "final_state"
+        is its last entry. The output layer is again one matmul, and
+        "logits" is the tensor of shape (num_steps, batch_size, vocab_size)
+        (so logits[i] is the same as the tensor logits[i] of the
+        static mode).
+
+        "initial_state" has the default value zeros((batch_size,
+        hidden_size)), but a state with any batch size can be fed.
+        """
+        Wshape = (self.hidden_size, self.hidden_size)
+        Ushape = (self.embed_size, self.hidden_size)
+
+        with tf.variable_scope("memory"):
+            zeros = tf.zeros((self.batch_size, self.hidden_size))
+            state_shape = [None, self.hidden_size]
+            self.initial_state = tf.placeholder_with_default(zeros, state_shape)
+
+        with tf.variable_scope("hidden"):
+            self.W = tf.get_variable("W", shape=Wshape)
+            self.input_weights = init_wb(Ushape, "input_weights")
+
+        with tf.variable_scope("RNN"):
+            look = tf.transpose(self.look, [1, 0, 2])
+            time_steps = tf.shape(look)[0]
+            batch_size = tf.shape(look)[1]
+            look = tf.nn.dropout(look, self.dropout_placeholder)
+            flat_look = tf.reshape(look, [-1, self.embed_size])
+            inputs = affine_transformation(flat_look, self.input_weights)
+            inputs = tf.reshape(inputs, [time_steps,
+                                         batch_size,
+                                         self.hidden_size])
+
+            def step(previous_h, input_t):
+                h = tf.sigmoid(tf.matmul(previous_h, self.W) + input_t)
+                return tf.nn.dropout(h, self.dropout_placeholder)
+
+            self.rnn_outputs = tf.scan(step,
+                                       inputs,
+                                       initializer=self.initial_state)
+            self.final_state = self.rnn_outputs[-1]
+
+        self.add_projection()
+
+    def output_projection(self):
+        """
+        Creates the variables of the output layer and returns the
+        function that applies it to a tensor of RNN outputs
+        -- shape = (N, hidden_size) -- giving logits of shape
+        (N, vocab_size). With config.output_layer == "dense" the logits
+        are an affine transformation of the RNN outputs (one matrix of
+        shape (hidden_size, vocab_size)). With config.output_layer ==
+        "adaptive" the output layer is an adaptive softmax (see the
+        module softmax_functions): the words are sorted by frequency
+        ("rank") and split in a head and clusters of rare words with
+        smaller output matrices. In this case the logits are the log
+        probabilities of the adaptive softmax (so the softmax of
+        the logits is its distribution) and the loss
+        is computed by "add_loss" without them.
+        With a sampled loss (config.loss != "softmax") the dense
+        weights are stored transposed, (vocab_size, hidden_size), so
+        the sampled losses gather their rows and the gradient only
+        has the rows of the sampled words ("output_transposed").
+
+        :rtype: function
+        """
         with tf.variable_scope("Projection_layer"):
-            self.output_weights = init_wb(Vshape, "output_weights")
-            self.logits = [affine_transformation(tensor, self.output_weights)
-                           for tensor in self.rnn_outputs]
+            if self.output_layer == "adaptive":
+                cutoffs = adaptive_cutoffs(self.config.cutoffs,
+                                           self.vocab_size)
+                self.adaptive_layer = init_adaptive(self.hidden_size,
+                                                    cutoffs,
+                                                    self.config.tail_factor,
+                                                    "adaptive")
+                rank = tf.constant(self.rank, dtype=tf.int32)
+                self.rank_variable = tf.get_variable("rank",
+                                                     initializer=rank,
+                                                     trainable=False)
+
+                def project(outputs):
+                    log_probs = adaptive_log_probs(outputs,
+                                                   self.adaptive_layer)
+                    # columns from rank order to index order
+                    log_probs = tf.gather(tf.transpose(log_probs),
+                                          self.rank_variable)
+                    return tf.transpose(log_probs)
+            elif self.output_transposed:
+                Vshape = (self.vocab_size, self.hidden_size)
+                Winit = tf.truncated_normal(Vshape, mean=0, stddev=0.1)
+                binit = tf.zeros(self.vocab_size)
+                self.output_weights = {}
+                self.output_weights["weights"] = tf.get_variable(
+                    "output_weights/weights",
+                    dtype=tf.float32,
+                    initializer=Winit)
+                self.output_weights["bias"] = tf.get_variable(
+                    "output_weights/bias",
+                    dtype=tf.float32,
+                    initializer=binit)
+
+                def project(outputs):
+                    return (tf.matmul(outputs,
+                                      self.output_weights["weights"],
+                                      transpose_b=True) +
+                            self.output_weights["bias"])
+            else:
+                Vshape = (self.hidden_size, self.vocab_size)
+                self.output_weights = init_wb(Vshape, "output_weights")
+
+                def project(outputs):
+                    return affine_transformation(outputs,
+                                                 self.output_weights)
+        return project
+
+    def add_projection(self):
+        """
+        Output layer (see "output_projection").
+        In the static mode "logits" is a list with one tensor for
+        each step, in the dynamic mode it is one time major tensor.
+        """
+        project = self.output_projection()
+        if self.rnn_mode == "static":
+            self.logits = [project(tensor) for tensor in self.rnn_outputs]
+        else:
+            outputs_shape = tf.shape(self.rnn_outputs)
+            flat_outputs = tf.reshape(self.rnn_outputs,
+                                      [-1, self.hidden_size])
+            self.logits = tf.reshape(project(flat_outputs),
+                                     [outputs_shape[0],
+                                      outputs_shape[1],
+                                      self.vocab_size])
+
+    def time_major_outputs(self):
+        """
+        Returns the outputs of the RNN as one tensor of
+        shape (num_steps * batch_size, hidden_size) and the
+        labels as one tensor of shape (num_steps * batch_size),
+        both in time major order.
+
+        :rtype: (tf tensor, tf tensor)
+        """
+        if self.rnn_mode == "dynamic":
+            flat_outputs = tf.reshape(self.rnn_outputs, [-1, self.hidden_size])
+        else:
+            flat_outputs = tf.concat(self.rnn_outputs, 0)
+        labels = tf.reshape(tf.transpose(self.labels_placeholder), [-1])
+        return flat_outputs, labels
 
     def add_prediction(self):
         """
         This method transforms every tensor from "logits",
         in a distribution over the vocabulary using the softmax function.
         The list of distribution is called "predictions" (same shape as
-        the list "logits").
+        the list "logits"). In the dynamic mode "predictions" is one
+        tensor. In both modes "next_prediction" is the distribution
+        of the last step, the one used to sample the next word
+        (in the dynamic mode predictions[-1] would add
+        a new op to the graph every time it is called), and
+        "next_logits" are its logits.
         """
-        self.predictions = [tf.nn.softmax(tf.cast(tensor, 'float64'))
-                            for tensor in self.logits]
+        if self.rnn_mode == "dynamic":
+            self.predictions = tf.nn.softmax(tf.cast(self.logits, 'float64'))
+        else:
+            self.predictions = [tf.nn.softmax(tf.cast(tensor, 'float64'))
+                                for tensor in self.logits]
+        self.next_prediction = self.predictions[-1]
+        self.next_logits = self.logits[-1]
 
     def add_loss(self):
         """
@@ -233,7 +476,32 @@ class RNNLanguageModel():
 
             - self.labelsReshaped.shape = (num_steps * batch_size)
 
+        With the adaptive softmax the loss is computed from the
+        RNN outputs by the function "adaptive_loss", with the
+        ranks of the labels (see "add_projection").
+
+        In the dynamic mode "logits" is already one time major tensor,
+        so it is only reshaped to (num_steps * batch_size, vocab_size)
+        and the labels are transposed to the same (time major) order.
+        The mean of the loss does not depend on this order.
+
         """
+        if self.output_layer == "adaptive":
+            flat_outputs, labels = self.time_major_outputs()
+            self.labelsReshaped = labels
+            ranks = tf.gather(self.rank_variable, labels)
+            self.loss = adaptive_loss(flat_outputs, ranks, self.adaptive_layer)
+            self.loss = tf.reduce_mean(self.loss)
+            return
+        if self.rnn_mode == "dynamic":
+            self.logitsReshaped2 = tf.reshape(self.logits,
+                                              [-1, self.vocab_size])
+            labels = tf.transpose(self.labels_placeholder)
+            self.labelsReshaped = tf.reshape(labels, [-1])
+            self.loss = tf.nn.sparse_softmax_cross_entropy_with_logits(labels=self.labelsReshaped,
+                                                                       logits=self.logitsReshaped2)
+            self.loss = tf.reduce_mean(self.loss)
+            return
         self.logitsReshaped1 = tf.concat(self.logits, 1)
         self.logitsReshaped2 = tf.reshape(self.logitsReshaped1,
                                           [-1, self.vocab_size])
@@ -244,18 +512,122 @@ class RNNLanguageModel():
                                                                    logits=self.logitsReshaped2)
         self.loss = tf.reduce_mean(self.loss)
 
+    def add_train_loss(self):
+        """
+        Method to create the loss minimized by the optimizer,
+        "train_loss". With config.loss == "softmax" it is the same
+        tensor as "loss". With config.loss == "sampled_softmax" or
+        config.loss == "nce" it is the sampled softmax loss or the
+        noise-contrastive estimation loss of TensorFlow: for each
+        token the output layer is computed only for the true word
+        and "config.num_sampled" sampled words, instead of the whole
+        vocabulary. The sampled losses need the output weights as
+        a (vocab_size, hidden_size) matrix (they are stored so, see
+        "output_projection") and the outputs of the RNN as one tensor
+        (num_steps * batch_size, hidden_size), in time major
+        order (as the labels). The words are sampled with their
+        frequency in the train data (the default sampler of
+        TensorFlow assumes that the indexes are sorted by
+        frequency, which is not the order of the DataHolder).
+        "loss" is still the exact loss, used to compute the
+        perplexity of the valid and test data.
+        """
+        if self.config.loss == "softmax":
+            self.train_loss = self.loss
+            return
+        flat_outputs, labels = self.time_major_outputs()
+        labels = tf.expand_dims(tf.cast(labels, tf.int64), 1)
+        # every word keeps a non zero probability (e.g., the unk token)
+        # and the counts are smoothed (count ** 0.75) as in word2vec,
+        # with the raw counts the noise of nce is mostly frequent words
+        unigrams = np.maximum(word_counts(self.vocab), 1)
+        sampler = tf.nn.fixed_unigram_candidate_sampler(
+            true_classes=labels,
+            num_true=1,
+            num_sampled=self.config.num_sampled,
+            unique=True,
+            range_max=self.vocab_size,
+            distortion=0.75,
+            unigrams=[float(count) for count in unigrams])
+        sampled_loss = {"sampled_softmax": tf.nn.sampled_softmax_loss,
+                        "nce": tf.nn.nce_loss}[self.config.loss]
+        self.train_loss = sampled_loss(weights=self.output_weights["weights"],
+                                       biases=self.output_weights["bias"],
+                                       labels=labels,
+                                       inputs=flat_outputs,
+                                       num_sampled=self.config.num_sampled,
+                                       num_classes=self.vocab_size,
+                                       sampled_values=sampler)
+        self.train_loss = tf.reduce_mean(self.train_loss)
+
     def add_training_op(self):
         """
         Method to create the graph optimizer.
         """
         optimizer = tf.train.AdamOptimizer(self.config.lr)
-        self.train_op = optimizer.minimize(self.loss)
+        self.train_op = optimizer.minimize(self.train_loss)
+
+    def add_inference_step(self):
+        """
+        The only part of the model used to generate text: one
+        step of the RNN and the distribution of the next word.
+        "input_placeholder" has shape (batch_size, 1) and the batch
+        size is not fixed. "initial_state" has the default value
+        zeros((batch_size, hidden_size)), and "final_state" is
+
+            h = sigmoid(initial_state*H + (t*weights + bias)),
+
+        where t is the embedding of the input word. "next_prediction"
+        is the float32 softmax of the logits of h ("next_logits")
+        -- shape = (batch_size, vocab_size). There is no dropout, no loss and
+        no optimizer ("dropout_placeholder" has the default value 1.0
+        and it is not used, so the old feeds still work).
+        The variables have the same names as in the
+        training graph, so its checkpoints can be restored.
+        """
+        self.input_placeholder = tf.placeholder(tf.int32,
+                                                shape=[None, 1],
+                                                name="input_placeholder")
+        no_dropout = tf.constant(1.0)
+        self.dropout_placeholder = tf.placeholder_with_default(no_dropout, [])
+        with tf.variable_scope("WordEmbeddings"):
+            Lshape = (self.vocab_size, self.embed_size)
+            self.L = tf.get_variable("L", shape=Lshape)
+            self.look = tf.nn.embedding_lookup(self.L,
+                                               self.input_placeholder[:, 0])
+        with tf.variable_scope("memory"):
+            zeros = tf.zeros((self.batch_size, self.hidden_size))
+            state_shape = [None, self.hidden_size]
+            self.initial_state = tf.placeholder_with_default(zeros, state_shape)
+        with tf.variable_scope("hidden"):
+            Wshape = (self.hidden_size, self.hidden_size)
+            Ushape = (self.embed_size, self.hidden_size)
+            self.W = tf.get_variable("W", shape=Wshape)
+            self.input_weights = init_wb(Ushape, "input_weights")
+        with tf.variable_scope("RNN"):
+            h = (tf.matmul(self.initial_state, self.W) +
+                 affine_transformation(self.look, self.input_weights))
+            self.final_state = tf.sigmoid(h)
+        project = self.output_projection()
+        self.logits = [project(self.final_state)]
+        self.next_logits = self.logits[0]
+        self.next_prediction = tf.nn.softmax(self.next_logits)
+        self.predictions = [self.next_prediction]
 
     def add_saver(self):
         """
         Method to create the graph saver.
+        The saver of the inference graph only has
+        the trainable variables (there are no optimizer slots)
+        and the ranks of the adaptive softmax.
         """
-        self.saver = tf.train.Saver()
+        if self.inference:
+            variables = tf.trainable_variables()
+            if self.output_layer == "adaptive":
+                variables.append(self.rank_variable)
+            self.saver = tf.train.Saver(variables)
+        else:
+            self.saver = tf.train.Saver()
         save_dir = 'checkpoints/'
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
@@ -264,10 +636,18 @@ class RNNLanguageModel():
     def build_graph(self):
         self.graph = tf.Graph()
         with self.graph.as_default():
+            if self.inference:
+                self.add_inference_step()
+                self.add_saver()
+                return
             self.add_placeholders()
             self.add_embedding()
-            self.add_logits()
+            if self.rnn_mode == "dynamic":
+                self.add_dynamic_logits()
+            else:
+                self.add_logits()
             self.add_prediction()
             self.add_loss()
+            self.add_train_loss()
             self.add_training_op()
             self.add_saver()
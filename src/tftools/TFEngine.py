@@ -0,0 +1,88 @@
+from copy import deepcopy
+import numpy as np
+import tensorflow as tf
+
+try:
+    from RNNLanguageModel import RNNLanguageModel
+    from PrefixCache import checkpoint_key
+except ImportError:
+    from tftools.RNNLanguageModel import RNNLanguageModel
+    from tftools.PrefixCache import checkpoint_key
+
+
+class TFEngine(object):
+    """
+    Forward step of the RNNLanguageModel run by TensorFlow. It builds
+    the inference graph of the model (see "add_inference_step"),
+    opens one session and restores the checkpoint "save_path"
+    (default: the checkpoint of the RNNLanguageModel).
+    The attribute "checkpoint" identifies the restored weights.
+    It has the same interface as the class NumpyEngine.
+
+    :type config: Config
+    :type dataholder: DataHolder
+    :type save_path: None or str
+    """
+    def __init__(self, config, dataholder, save_path=None):
+        gen_config = deepcopy(config)
+        gen_config.batch_size = gen_config.num_steps = 1
+        self.model = RNNLanguageModel(gen_config,
+                                      dataholder,
+                                      inference=True)
+        if save_path is None:
+            save_path = self.model.save_path
+        self.checkpoint = checkpoint_key(save_path + ".index")
+        self.hidden_size = self.model.hidden_size
+        self.vocab_size = self.model.vocab_size
+        self.session = tf.Session(graph=self.model.graph)
+        self.model.saver.restore(self.session, save_path)
+
+    def zero_state(self, batch_size=1):
+        """
+        State of "batch_size" new sequences.
+
+        :type batch_size: int
+        :rtype: np array
+        """
+        return np.zeros((batch_size, self.hidden_size), dtype=np.float32)
+
+    def step(self, tokens, state):
+        """
+        One step of the RNN for a batch of sequences:
+        "tokens" are the last words (indexes) of the sequences and
+        "state" their states. It returns the distribution of the
+        next word of each sequence -- shape = (batch_size, vocab_size)
+        -- and the new states.
+
+        :type tokens: list of int or np array
+        :type state: np array
+        :rtype: (np array, np array)
+        """
+        feed = {self.model.input_placeholder: np.reshape(tokens, (-1, 1)),
+                self.model.initial_state: state}
+        state, y_pred = self.session.run([self.model.final_state,
+                                          self.model.next_prediction],
+                                         feed_dict=feed)
+        return y_pred, state
+
+    def step_logits(self, tokens, state):
+        """
+        Same as "step", but it returns the logits of the
+        distribution of the next word (see "sample_logits").
+
+        :type tokens: list of int or np array
+        :type state: np array
+        :rtype: (np array, np array)
+        """
+        feed = {self.model.input_placeholder: np.reshape(tokens, (-1, 1)),
+                self.model.initial_state: state}
+        state, logits = self.session.run([self.model.final_state,
+                                          self.model.next_logits],
+                                         feed_dict=feed)
+        return logits, state
+
+    def close(self):
+        """
+        Closes the session.
+        """
+        self.session.close()
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+from copy import deepcopy
+import numpy as np
+import tensorflow as tf
+
+try:
+    from RNNLanguageModel import RNNLanguageModel
+    from softmax_functions import adaptive_cutoffs
+except ImportError:
+    from tftools.RNNLanguageModel import RNNLanguageModel
+    from tftools.softmax_functions import adaptive_cutoffs
+
+
+def numpy_path(save_path):
+    """
+    Function that returns the folder where the weights
+    of the checkpoint "save_path" are exported
+    as numpy arrays (see "export_numpy").
+
+    :type save_path: str
+    :rtype: str
+    """
+    return save_path + "_numpy"
+
+
+def export_numpy(session, model, export_path):
+    """
+    Function to write the trainable variables of "model"
+    (with the values they have in "session") in the folder
+    "export_path", one npy file for each variable: the variable
+    "hidden/W" is stored in the file "hidden.W.npy" (the transposed
+    output weights of a sampled loss are stored as (hidden_size,
+    vocab_size), see "output_projection"). The folder
+    also has the rank of each word ("rank.npy", the ranks
+    saved with the adaptive softmax) and the
+    description of the model ("meta.json"), so the
+    class NumpyEngine can use it without TensorFlow.
+    The files are first written in a temporary folder
+    that is renamed at the end.
+
+    :type session: tf Session
+    :type model: RNNLanguageModel
+    :type export_path: str
+    """
+    with model.graph.as_default():
+        variables = tf.trainable_variables()
+    values = session.run(variables)
+    tmp_path = export_path + ".tmp{}".format(os.getpid())
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    for variable, value in zip(variables, values):
+        name = variable.op.name.replace("/", ".")
+        # the numpy files always have the (hidden_size, vocab_size) layout
+        if model.output_transposed and name.endswith("output_weights.weights"):
+            value = value.T
+        np.save(os.path.join(tmp_path, name + ".npy"),
+                value.astype(np.float32))
+    rank = model.rank
+    if model.output_layer == "adaptive":
+        rank = session.run(model.rank_variable)
+    np.save(os.path.join(tmp_path, "rank.npy"), rank)
+    meta = {"vocab_size": model.vocab_size,
+            "embed_size": model.embed_size,
+            "hidden_size": model.hidden_size,
+            "output_layer": model.output_layer,
+            "cutoffs": adaptive_cutoffs(model.config.cutoffs,
+                                        model.vocab_size)}
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    if os.path.exists(export_path):
+        shutil.rmtree(export_path)
+    os.rename(tmp_path, export_path)
+
+
+def export_checkpoint(config, dataholder, save_path=None):
+    """
+    Function that exports the weights of a checkpoint written by
+    "train_model" (default: the checkpoint of the
+    RNNLanguageModel) as numpy arrays.
+    It returns the folder of the arrays.
+
+    :type config: Config
+    :type dataholder: DataHolder
+    :type save_path: None or str
+    :rtype: str
+    """
+    gen_config = deepcopy(config)
+    gen_config.batch_size = gen_config.num_steps = 1
+    model = RNNLanguageModel(gen_config, dataholder, inference=True)
+    if save_path is None:
+        save_path = model.save_path
+    export_path = numpy_path(save_path)
+    with tf.Session(graph=model.graph) as sess:
+        model.saver.restore(sess, save_path)
+        export_numpy(sess, model, export_path)
+    return export_path
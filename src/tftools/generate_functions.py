@@ -1,22 +1,30 @@
-from utils import sample
 from copy import deepcopy
 import tensorflow as tf
 
 try:
+    from sample_functions import sample_logits
     from train_functions import run_epoch
     from RNNLanguageModel import RNNLanguageModel
     from DataHolder import DataHolder
+    from PrefixCache import checkpoint_key
 except ImportError:
+    from tftools.sample_functions import sample_logits
     from tftools.train_functions import run_epoch
     from tftools.RNNLanguageModel import RNNLanguageModel
     from tftools.DataHolder import DataHolder
+    from tftools.PrefixCache import checkpoint_key
 
 
 def generate_text(session, model, config, starting_text='<eos>',
-                  stop_length=100, stop_tokens=None, temp=1.0):
+                  stop_length=100, stop_tokens=None, temp=1.0,
+                  prefix_cache=None):
     """
     This function uses the model to generate a sentence
     starting with the token(s) "starting_text".
+    All the tokens of "starting_text" are run by the model
+    before the first word is sampled. With a PrefixCache
+    "prefix_cache" the state after "starting_text" is
+    computed only once for each checkpoint.
     The generated sentence has at most "stop_length" tokens.
     If you use the list "stop_tokens", the sentence will end at any
     word of that list.
@@ -28,21 +36,37 @@ def generate_text(session, model, config, starting_text='<eos>',
     :type stop_lenght: int
     :type stop_tokens: None or list of str
     :type temp: float
+    :type prefix_cache: None or PrefixCache
     :rtype : list of str
     """
-    state = session.run(model.initial_state)
-    tokens = [model.vocab.encode(word) for word in starting_text.split()]
-    for i in range(stop_length):
-        feed = {model.input_placeholder: [[tokens[-1]]],
+    def step(token, state):
+        feed = {model.input_placeholder: [[token]],
                 model.initial_state: state,
                 model.dropout_placeholder: 1.0}
-        state, y_pred = session.run([model.final_state,
-                                     model.predictions[-1]],
+        state, logits = session.run([model.final_state,
+                                     model.next_logits],
                                     feed_dict=feed)
-        next_word_idx = sample(y_pred[0], temperature=temp)
+        return logits, state
+
+    tokens = [model.vocab.encode(word) for word in starting_text.split()]
+    key = (checkpoint_key(model.save_path + ".index"), tuple(tokens))
+    cached = None
+    if prefix_cache is not None:
+        cached = prefix_cache.get(key)
+    if cached is None:
+        state = session.run(model.initial_state)
+        for token in tokens:
+            logits, state = step(token, state)
+        if prefix_cache is not None:
+            prefix_cache.put(key, (logits, state))
+    else:
+        logits, state = cached
+    for i in range(stop_length):
+        next_word_idx = sample_logits(logits[0], temperature=temp)
         tokens.append(next_word_idx)
         if stop_tokens and model.vocab.decode(tokens[-1]) in stop_tokens:
             break
+        logits, state = step(next_word_idx, state)
     output = [model.vocab.decode(word_idx) for word_idx in tokens]
     return output
 
@@ -76,15 +100,18 @@ def generate_loop(config, text_path, ShowTest=True):
     gen_config = deepcopy(config)
     gen_config.batch_size = gen_config.num_steps = 1
     dataholder = DataHolder(text_path=text_path)
-    model = RNNLanguageModel(gen_config, dataholder)
+    if ShowTest:
+        model = RNNLanguageModel(gen_config, dataholder)
+        with tf.Session(graph=model.graph) as sess:
+            model.saver.restore(sess, model.save_path)
+            test_pp = run_epoch(model, sess, model.encoded_test)
+        print(('=-=' * 5))
+        print(('Test perplexity: {}'.format(test_pp)))
+        print(('=-=' * 5))
+        print(' ')
+    model = RNNLanguageModel(gen_config, dataholder, inference=True)
     with tf.Session(graph=model.graph) as sess:
         model.saver.restore(sess, model.save_path)
-        if ShowTest:
-            test_pp = run_epoch(model, sess, model.encoded_test)
-            print(('=-=' * 5))
-            print(('Test perplexity: {}'.format(test_pp)))
-            print(('=-=' * 5))
-            print(' ')
         print(('=-=' * 5))
         print("Sentence generator\nType '*end*' to break the loop")
         print(('=-=' * 5))
@@ -0,0 +1,183 @@
+import numpy as np
+
+
+def random_state(rng=None):
+    """
+    Function that returns the random number generator used
+    by the sampling functions: the module np.random when "rng"
+    is None (its functions, e.g. np.random.random_sample, use the
+    global generator of np.random.seed), a new generator when
+    "rng" is a seed, or "rng" itself.
+
+    :type rng: None or int or np.random.RandomState
+    :rtype: np.random.RandomState or module np.random
+    """
+    if rng is None:
+        return np.random
+    if isinstance(rng, np.random.RandomState):
+        return rng
+    return np.random.RandomState(rng)
+
+
+def log_softmax(logits):
+    """
+    Log of the softmax of each row of "logits" (the logits
+    equal to -inf have log probability -inf).
+
+    :type logits: np array
+    :rtype: np array
+    """
+    logits = logits - logits.max(axis=1, keepdims=True)
+    return logits - np.log(np.exp(logits).sum(axis=1, keepdims=True))
+
+
+def sample_rows(logits, rng):
+    """
+    Function to sample one index from each row of "logits"
+    (shape = (batch_size, size)) with the distribution
+    softmax(row). We draw one uniform number for each row and
+    search it in the cumulative sum of exp(row) (there is no
+    normalization and no log). The entries equal to -inf are
+    never sampled. The rows are done one by one: np.cumsum along
+    the rows of a large array is several times slower.
+
+    :type logits: np array
+    :type rng: np.random.RandomState or module np.random
+    :rtype: np array
+    """
+    uniform = rng.random_sample(logits.shape[0])
+    indexes = np.empty(logits.shape[0], dtype=np.int64)
+    for i, row in enumerate(logits):
+        cdf = np.cumsum(np.exp(row - row.max()), dtype=np.float64)
+        indexes[i] = np.searchsorted(cdf, uniform[i] * cdf[-1], side="right")
+    return np.minimum(indexes, logits.shape[1] - 1)
+
+
+def row_candidates(row, top_k=None, top_p=None, first_size=64):
+    """
+    Function that returns the indexes of the words of "row"
+    (the logits of one distribution) that can be sampled and
+    their logits. With "top_k" they are the "top_k" words with
+    the largest logits (np.argpartition, there is no full sort).
+    With "top_p" they are the smallest set of words, from the most
+    probable one, with probability at least "top_p" (nucleus): only
+    the "first_size" largest logits are sorted, and this size grows
+    (x4) while the sorted words have less than "top_p".
+    With both, the nucleus is taken from the top k.
+
+    :type row: np array
+    :type top_k: None or int
+    :type top_p: None or float
+    :type first_size: int
+    :rtype: (np array, np array)
+    """
+    indexes = np.arange(row.size)
+    if top_k is not None and top_k < row.size:
+        indexes = np.argpartition(-row, top_k - 1)[:top_k]
+        row = row[indexes]
+    if top_p is not None:
+        weights = np.exp(row - row.max())
+        total = weights.sum()
+        num_sorted = min(row.size, first_size)
+        while True:
+            if num_sorted < row.size:
+                part = np.argpartition(-weights, num_sorted - 1)[:num_sorted]
+            else:
+                part = np.arange(row.size)
+            part = part[np.argsort(-weights[part], kind="mergesort")]
+            mass = np.cumsum(weights[part]) / total
+            if num_sorted == row.size or mass[-1] >= top_p:
+                break
+            num_sorted = min(row.size, 4 * num_sorted)
+        part = part[:(mass < top_p).sum() + 1]
+        indexes = indexes[part]
+        row = row[part]
+    return indexes, row
+
+
+def top_candidates(logits, top_k=None, top_p=None, first_size=64):
+    """
+    Function that applies "row_candidates" to each row of "logits".
+    It returns the indexes of the words that can be sampled and
+    their logits, both with shape (batch_size, num_candidates)
+    (the rows with less candidates are filled with logit -inf).
+
+    :type logits: np array
+    :type top_k: None or int
+    :type top_p: None or float
+    :type first_size: int
+    :rtype: (np array, np array)
+    """
+    rows = [row_candidates(row, top_k, top_p, first_size) for row in logits]
+    num_candidates = max([len(row_indexes) for row_indexes, _ in rows])
+    indexes = np.zeros((len(rows), num_candidates), dtype=np.int64)
+    candidates = np.full((len(rows), num_candidates), -np.inf)
+    for i, (row_indexes, row) in enumerate(rows):
+        indexes[i, :len(row)] = row_indexes
+        candidates[i, :len(row)] = row
+    return indexes, candidates
+
+
+def sample_logits(logits,
+                  temperature=1.0,
+                  top_k=None,
+                  top_p=None,
+                  rng=None):
+    """
+    Function to sample the index of the next word from
+    the logits of the model -- shape = (size,) or
+    (batch_size, size), one index for each row. The
+    distribution is softmax(logits / temperature)
+    (temperature = 0 gives the argmax), restricted to the
+    "top_k" most probable words and / or to the nucleus
+    of probability "top_p" (see "top_candidates").
+    "rng" is a seed or a np.random.RandomState (see "random_state").
+
+    :type logits: np array
+    :type temperature: float
+    :type top_k: None or int
+    :type top_p: None or float
+    :type rng: None or int or np.random.RandomState
+    :rtype: int or np array
+    """
+    logits = np.asarray(logits)
+    single = logits.ndim == 1
+    logits = np.atleast_2d(logits)
+    if temperature == 0:
+        indexes = logits.argmax(axis=1)
+    else:
+        rng = random_state(rng)
+        if temperature != 1.0:
+            logits = logits / temperature
+        if top_k is None and top_p is None:
+            indexes = sample_rows(logits, rng)
+        else:
+            candidates, candidate_logits = top_candidates(logits,
+                                                          top_k,
+                                                          top_p)
+            choice = sample_rows(candidate_logits, rng)
+            indexes = candidates[np.arange(len(choice)), choice]
+    if single:
+        return int(indexes[0])
+    return indexes
+
+
+def sample_probs(probs,
+                 temperature=1.0,
+                 top_k=None,
+                 top_p=None,
+                 rng=None):
+    """
+    Same as "sample_logits" for probabilities
+    (e.g., the softmax of the model).
+
+    :type probs: np array
+    :type temperature: float
+    :type top_k: None or int
+    :type top_p: None or float
+    :type rng: None or int or np.random.RandomState
+    :rtype: int or np array
+    """
+    with np.errstate(divide="ignore"):
+        logits = np.log(np.asarray(probs, dtype=np.float64))
+    return sample_logits(logits, temperature, top_k, top_p, rng)
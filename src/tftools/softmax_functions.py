@@ -0,0 +1,129 @@
+import tensorflow as tf
+
+try:
+    from basic_functions import init_wb, affine_transformation
+except ImportError:
+    from tftools.basic_functions import init_wb, affine_transformation
+
+
+def adaptive_cutoffs(cutoffs, vocab_size):
+    """
+    Function that returns the limits of the clusters of an
+    adaptive softmax: the head has the words with rank
+    smaller than the first limit and the cluster i the words
+    with rank between the limits i and i + 1. Every limit
+    in "cutoffs" that is not smaller than "vocab_size" is
+    dropped and "vocab_size" is the last limit.
+
+    :type cutoffs: list of int
+    :type vocab_size: int
+    :rtype: list of int
+    """
+    return [cutoff for cutoff in cutoffs if 0 < cutoff < vocab_size] + [vocab_size]
+
+
+def init_adaptive(hidden_size, cutoffs, tail_factor, name):
+    """
+    Function that initializes the variables of an adaptive
+    softmax with the limits "cutoffs" (see "adaptive_cutoffs").
+    The head is an affine transformation from the hidden state to
+    the words of the head plus one logit for each cluster.
+    The cluster i first projects the hidden state to a space of
+    dimension hidden_size // tail_factor ** (i + 1), so the rare
+    words have smaller (reduced-rank) output matrices.
+
+    :type hidden_size: int
+    :type cutoffs: list of int
+    :type tail_factor: int
+    :type name: str
+    :rtype: dictionary
+    """
+    num_clusters = len(cutoffs) - 1
+    layer = {}
+    layer["cutoffs"] = cutoffs
+    layer["head"] = init_wb((hidden_size, cutoffs[0] + num_clusters),
+                            name + "/head")
+    layer["tails"] = []
+    for i in range(num_clusters):
+        tail_size = max(hidden_size // tail_factor ** (i + 1), 1)
+        tail = {}
+        tail["projection"] = tf.get_variable(name + "/tail{}/projection".format(i),
+                                             shape=(hidden_size, tail_size))
+        tail["output"] = init_wb((tail_size, cutoffs[i + 1] - cutoffs[i]),
+                                 name + "/tail{}/output".format(i))
+        layer["tails"].append(tail)
+    return layer
+
+
+def tail_logits(inputs, tail):
+    """
+    Function that applies the reduced-rank output
+    layer of one cluster in the tensor "inputs".
+
+    :type inputs: tf tensor
+    :type tail: dictionary
+    :rtype: tf tensor
+    """
+    return affine_transformation(tf.matmul(inputs, tail["projection"]),
+                                 tail["output"])
+
+
+def adaptive_loss(inputs, labels, layer):
+    """
+    Function that computes the cross entropy of an adaptive
+    softmax for each row of "inputs" -- shape = (N, hidden_size).
+    "labels" are the ranks of the true words -- shape = (N,).
+    Every row pays the head, but the output layer of a cluster is
+    only applied to the rows whose label is in this cluster:
+
+        loss = -log p_head(label), if label is in the head
+        loss = -log p_head(cluster) - log p_cluster(label), otherwise
+
+    :type inputs: tf tensor
+    :type labels: tf tensor
+    :type layer: dictionary
+    :rtype: tf tensor
+    """
+    cutoffs = layer["cutoffs"]
+    head_size = cutoffs[0]
+    head_labels = labels
+    num_rows = tf.shape(labels)
+    tail_losses = []
+    for i, tail in enumerate(layer["tails"]):
+        in_cluster = tf.logical_and(labels >= cutoffs[i],
+                                    labels < cutoffs[i + 1])
+        cluster_label = tf.fill(num_rows, head_size + i)
+        head_labels = tf.where(in_cluster, cluster_label, head_labels)
+        rows = tf.where(in_cluster)
+        cluster_inputs = tf.gather_nd(inputs, rows)
+        cluster_labels = tf.gather_nd(labels, rows) - cutoffs[i]
+        loss = tf.nn.sparse_softmax_cross_entropy_with_logits(labels=cluster_labels,
+                                                              logits=tail_logits(cluster_inputs, tail))
+        tail_losses.append(tf.scatter_nd(rows, loss, tf.cast(num_rows, tf.int64)))
+    head_logits = affine_transformation(inputs, layer["head"])
+    loss = tf.nn.sparse_softmax_cross_entropy_with_logits(labels=head_labels,
+                                                          logits=head_logits)
+    return tf.add_n([loss] + tail_losses)
+
+
+def adaptive_log_probs(inputs, layer):
+    """
+    Function that computes the log of the distribution of an
+    adaptive softmax over the whole vocabulary for each row of
+    "inputs". The columns of the result are the ranks of the
+    words -- shape = (N, vocab_size).
+
+    :type inputs: tf tensor
+    :type layer: dictionary
+    :rtype: tf tensor
+    """
+    cutoffs = layer["cutoffs"]
+    head_size = cutoffs[0]
+    head_logits = affine_transformation(inputs, layer["head"])
+    head_log_probs = tf.nn.log_softmax(head_logits)
+    log_probs = [head_log_probs[:, :head_size]]
+    for i, tail in enumerate(layer["tails"]):
+        cluster_log_prob = head_log_probs[:, head_size + i:head_size + i + 1]
+        tail_log_probs = tf.nn.log_softmax(tail_logits(inputs, tail))
+        log_probs.append(tail_log_probs + cluster_log_prob)
+    return tf.concat(log_probs, 1)
@@ -9,7 +9,9 @@ currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfram
 parentdir = os.path.dirname(currentdir)
 sys.path.insert(0, parentdir)
 
-from text_processing.functions import ptb_iterator
+from text_processing.BatchSource import BatchSource
+from text_processing.Prefetcher import Prefetcher
+from tftools.export_functions import export_numpy, numpy_path
 
 
 def run_epoch(model,
@@ -21,31 +23,46 @@ def run_epoch(model,
     Use the tf graph of the model to run one epoch
     through the data using the tf session.
     Note that we need to pass in the initial state and
-    retrieve the final state to give the RNN proper history
+    retrieve the final state to give the RNN proper history.
+    "data" can be the encoded text or a BatchSource
+    built once and reused at every epoch.
+    When config.prefetch > 0 the next config.prefetch batches
+    are prepared in a background thread (see the class Prefetcher)
+    while the session runs the current step.
+    When "train_op" is given the loss of the epoch is the
+    training loss of the model ("train_loss"), so with a sampled
+    loss (config.loss) the perplexity is only an estimate and the
+    full softmax is never computed. Otherwise it is the exact loss.
 
     :type model: RNNLanguageModel
     :type session: tf Session
-    :type data: np ndarray
+    :type data: np ndarray or BatchSource
     :type train_op: None or tf Tensor
     :type verbose: int
     :rtype: float
     """
     config = model.config
     dp = config.dropout
+    loss_op = model.train_loss
     if not train_op:
         train_op = tf.no_op()
+        loss_op = model.loss
         dp = 1
-    DataIte1 = ptb_iterator(data, config.batch_size, config.num_steps)
-    DataIte2 = ptb_iterator(data, config.batch_size, config.num_steps)
-    total_steps = sum(1 for _ in DataIte1)
+    if isinstance(data, BatchSource):
+        batches = data
+    else:
+        batches = BatchSource(data, config.batch_size, config.num_steps)
+    total_steps = batches.epoch_size
+    if config.prefetch > 0:
+        batches = Prefetcher(batches, config.prefetch)
     total_loss = []
     state = session.run(model.initial_state)
-    for step, (x, y) in enumerate(DataIte2):
+    for step, (x, y) in enumerate(batches):
         feed = {model.input_placeholder: x,
                 model.labels_placeholder: y,
                 model.initial_state: state,
                 model.dropout_placeholder: dp}
-        loss, state, _ = session.run([model.loss, model.final_state, train_op],
+        loss, state, _ = session.run([loss_op, model.final_state, train_op],
                                      feed_dict=feed)
         total_loss.append(loss)
         if verbose and step % verbose == 0:
@@ -75,6 +92,12 @@ def train_model(model,
         max_epochs = config.max_epochs
     best_val_pp = float('inf')
     best_val_epoch = 0
+    train_batches = BatchSource(model.encoded_train,
+                                config.batch_size,
+                                config.num_steps)
+    valid_batches = BatchSource(model.encoded_valid,
+                                config.batch_size,
+                                config.num_steps)
     with tf.Session(graph=model.graph) as sess:
         tf.global_variables_initializer().run()
         for epoch in range(max_epochs):
@@ -82,11 +105,11 @@ def train_model(model,
             start = time.time()
             train_pp = run_epoch(model,
                                  sess,
-                                 model.encoded_train,
+                                 train_batches,
                                  model.train_op)
             valid_pp = run_epoch(model,
                                  sess,
-                                 model.encoded_valid)
+                                 valid_batches)
             print(('Training perplexity: {}'.format(train_pp)))
             print(('Validation perplexity: {}'.format(valid_pp)))
             if valid_pp < best_val_pp:
@@ -94,6 +117,7 @@ def train_model(model,
                     best_val_epoch = epoch
                     if save:
                         model.saver.save(sess, model.save_path)
+                        export_numpy(sess, model, numpy_path(model.save_path))
             if epoch - best_val_epoch > config.early_stopping:
                 break
             print(('Total time: {}'.format(time.time() - start)))
@@ -0,0 +1,529 @@
+try:
+    from functions import eos2period, tweet_size
+    from functions import token_lengths, token_mask
+except ImportError:
+    from twitter.functions import eos2period, tweet_size
+    from twitter.functions import token_lengths, token_mask
+import os
+import numpy as np
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.DataHolder import DataHolder
+from tftools.PrefixCache import PrefixCache
+from tftools.sample_functions import sample_logits, log_softmax
+
+# default arguments of "generate_tweet_list"
+TWEET_REQUEST = {"number_of_tweets": 1,
+                 "starting_text": '<eos>',
+                 "hashtag_list": [],
+                 "decoding": "sample",
+                 "num_candidates": 10}
+
+
+class BaseGenerator():
+    """
+    Class with the generation of tweets shared by the
+    tweet generators. The model is used through an "engine"
+    (TFEngine or NumpyEngine) given by the method "load_engine".
+    The engine is loaded once (method "get_engine") and kept
+    until the method "close" is called.
+    "black_list" is the list of all words that the bot should
+    not say. The words of "black_list" and the unk token are never
+    sampled (see "token_constraints"). The states of the model after
+    the starting texts are kept in the LRU cache "prefix_cache".
+
+    :type text_path: srt
+    :type debug: boolean
+    :type black_list: list
+    """
+    def __init__(self,
+                 text_path,
+                 debug=False,
+                 black_list=[]):
+        self.black_list = black_list
+        self.prefix_cache = PrefixCache()
+        self.constraints = None
+        self.engine = None
+        self.dataholder = DataHolder(text_path=text_path, debug=debug)
+
+    def load_engine(self):
+        """
+        Returns a new engine used to generate the tweets.
+
+        :rtype: TFEngine or NumpyEngine
+        """
+        raise NotImplementedError
+
+    def get_engine(self):
+        """
+        Returns the engine of the generator (it is
+        loaded in the first call).
+
+        :rtype: TFEngine or NumpyEngine
+        """
+        if self.engine is None:
+            self.engine = self.load_engine()
+        return self.engine
+
+    def close(self):
+        """
+        Releases the engine (the next list of tweets loads it again).
+        """
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+    def token_constraints(self):
+        """
+        Returns the arrays (indexed by the word index) used to mask
+        the logits: "banned" is True for the unk token and the words
+        of "black_list", and "lengths" is the number of characters of
+        each word. They are computed once for each size of the vocab
+        (together with "costs", the characters used by each word).
+
+        :rtype: (np array, np array)
+        """
+        vocab = self.dataholder.vocab
+        if self.constraints is None or len(self.constraints[0]) != len(vocab):
+            banned = token_mask(vocab,
+                                [self.dataholder.unk_token] + self.black_list)
+            lengths = token_lengths(vocab)
+            self.constraints = (banned, lengths)
+            self.banned_index = np.flatnonzero(banned)
+            # a new word costs its length plus one space
+            self.costs = lengths + 1
+            self.min_cost = self.costs[~banned].min()
+            self.max_cost = self.costs[~banned].max()
+        return self.constraints
+
+    def mask_logits(self, logits, budget):
+        """
+        Sets to -inf (in place) the logits -- shape = (batch_size,
+        vocab_size) -- of the banned words (unk and "black_list") and
+        of the words longer than the characters left in each sentence
+        ("budget"). Only the rows close to the end of the
+        budget need the length mask.
+
+        :type logits: np array
+        :type budget: np array
+        :rtype: np array
+        """
+        self.token_constraints()
+        logits[:, self.banned_index] = -np.inf
+        short = np.flatnonzero(budget < self.max_cost)
+        if short.size > 0:
+            too_long = self.costs > budget[short, np.newaxis]
+            logits[short] = np.where(too_long, -np.inf, logits[short])
+        return logits
+
+    def start_batch(self, engine, starting_text, batch_size, CharSize):
+        """
+        Returns the words of "starting_text" and, for a batch of
+        "batch_size" sentences that start with it, the logits of
+        the next word, the state and the characters left
+        (all the words of "starting_text" are run once, the
+        result is kept in "prefix_cache").
+
+        :type engine: TFEngine or NumpyEngine
+        :type starting_text: str
+        :type batch_size: int
+        :type CharSize: int
+        :rtype: (list of str, np array, np array, np array)
+        """
+        words, logits, state, budget = self.start_groups(engine,
+                                                         [(starting_text,
+                                                           batch_size,
+                                                           CharSize)])
+        return words[0], logits, state, budget
+
+    def start_groups(self, engine, groups):
+        """
+        Same as "start_batch" for a batch with groups of sentences:
+        "groups" is a list of (starting_text, batch_size, CharSize)
+        and the rows of each group are consecutive in the batch.
+        It returns the words of the starting text of each group.
+
+        :type engine: TFEngine or NumpyEngine
+        :type groups: list of (str, int, int)
+        :rtype: (list of list of str, np array, np array, np array)
+        """
+        vocab = self.dataholder.vocab
+        all_words = []
+        all_logits = []
+        all_states = []
+        all_budgets = []
+        for starting_text, batch_size, CharSize in groups:
+            words = starting_text.split()
+            tokens = [vocab.encode(word) for word in words]
+            logits, state = self.prefix_cache.prime(engine, tokens)
+            all_words.append(words)
+            all_logits.append(np.repeat(logits, batch_size, axis=0))
+            all_states.append(np.repeat(state, batch_size, axis=0))
+            all_budgets.append(np.full(batch_size,
+                                       CharSize - len(" ".join(words)),
+                                       dtype=np.int64))
+        return (all_words,
+                np.concatenate(all_logits),
+                np.concatenate(all_states),
+                np.concatenate(all_budgets))
+
+    def __generate_tweet_no_unk__(self,
+                                  engine,
+                                  starting_text='<eos>',
+                                  stop_tokens=None,
+                                  temp=1.0,
+                                  CharSize=140,
+                                  top_k=None,
+                                  top_p=None):
+        """
+        Private method to generate a sentence.
+        The sentence will have at maximun 140 characters (a tweet)
+        and no unk token (see "__generate_tweet_batch_no_unk__").
+
+        :type engine: TFEngine or NumpyEngine
+        :type starting_text: str
+        :type stop_tokens: None or list of str
+        :type temp: float
+        :type CharSize: int
+        :type top_k: None or int
+        :type top_p: None or float
+        :rtype : list of str
+        """
+        return self.__generate_tweet_batch_no_unk__(engine,
+                                                    1,
+                                                    starting_text,
+                                                    stop_tokens,
+                                                    temp,
+                                                    CharSize,
+                                                    top_k,
+                                                    top_p)[0]
+
+    def __generate_tweet_batch_no_unk__(self,
+                                        engine,
+                                        number_of_tweets,
+                                        starting_text='<eos>',
+                                        stop_tokens=None,
+                                        temp=1.0,
+                                        CharSize=140,
+                                        top_k=None,
+                                        top_p=None,
+                                        with_scores=False):
+        """
+        Private method to generate "number_of_tweets" sentences
+        together. All the words of "starting_text" are run once
+        (see "start_batch"), then each step of the engine advances
+        all the sentences that are not finished (one row of the
+        state for each sentence).
+        Before sampling, the logits of the banned words (unk and
+        "black_list") and of the words longer than the characters
+        left in the sentence ("CharSize" minus the size of the
+        sentence, updated after each word) are set to -inf. A sentence
+        stops when no word fits or after a word of "stop_tokens", and
+        its row is removed from the batch.
+        The words are sampled with the temperature "temp" and the
+        filters "top_k" and "top_p" (see "sample_logits").
+        With "with_scores" it also returns the score of each
+        sentence: the mean log probability of its words (given
+        by the masked logits).
+
+        :type engine: TFEngine or NumpyEngine
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type stop_tokens: None or list of str
+        :type temp: float
+        :type CharSize: int
+        :type top_k: None or int
+        :type top_p: None or float
+        :type with_scores: boolean
+        :rtype : list of list of str or (list of list of str, np array)
+        """
+        result = self.__generate_groups_no_unk__(engine,
+                                                 [(starting_text,
+                                                   number_of_tweets,
+                                                   CharSize)],
+                                                 stop_tokens,
+                                                 temp,
+                                                 top_k,
+                                                 top_p,
+                                                 with_scores)
+        if with_scores:
+            return result[0][0], result[1][0]
+        return result[0]
+
+    def __generate_groups_no_unk__(self,
+                                   engine,
+                                   groups,
+                                   stop_tokens=None,
+                                   temp=1.0,
+                                   top_k=None,
+                                   top_p=None,
+                                   with_scores=False):
+        """
+        Private method with the generation of
+        "__generate_tweet_batch_no_unk__" for a batch with groups of
+        sentences: "groups" is a list of (starting_text,
+        number_of_tweets, CharSize) and each step of the engine
+        advances the sentences of all the groups. It returns the
+        sentences (and the scores) of each group.
+
+        :type engine: TFEngine or NumpyEngine
+        :type groups: list of (str, int, int)
+        :type stop_tokens: None or list of str
+        :type temp: float
+        :type top_k: None or int
+        :type top_p: None or float
+        :type with_scores: boolean
+        :rtype : list of list of list of str
+                 or (list of list of list of str, list of np array)
+        """
+        vocab = self.dataholder.vocab
+        self.token_constraints()
+        is_stop = token_mask(vocab, stop_tokens or [])
+        all_words, logits, state, budget = self.start_groups(engine, groups)
+        group_sizes = [batch_size for _, batch_size, _ in groups]
+        number_of_tweets = sum(group_sizes)
+        generated = [[] for i in range(number_of_tweets)]
+        scores = np.zeros(number_of_tweets)
+        # active[row] is the sentence of that row of the batch
+        active = np.arange(number_of_tweets)
+        while active.size > 0:
+            fits = budget >= self.min_cost
+            if not fits.all():
+                active = active[fits]
+                budget = budget[fits]
+                state = state[fits]
+                logits = logits[fits]
+                if active.size == 0:
+                    break
+            self.mask_logits(logits, budget)
+            next_words = sample_logits(logits,
+                                       temperature=temp,
+                                       top_k=top_k,
+                                       top_p=top_p)
+            if with_scores:
+                log_probs = log_softmax(logits)
+                scores[active] += log_probs[np.arange(active.size),
+                                            next_words]
+            budget -= self.costs[next_words]
+            for row, i in enumerate(active):
+                generated[i].append(int(next_words[row]))
+            keep = ~is_stop[next_words]
+            active = active[keep]
+            budget = budget[keep]
+            if active.size > 0:
+                logits, state = engine.step_logits(next_words[keep],
+                                                   state[keep])
+        group_of = np.repeat(np.arange(len(groups)), group_sizes)
+        tweets = [all_words[group_of[i]] + [vocab.decode(index)
+                                            for index in sentence]
+                  for i, sentence in enumerate(generated)]
+        sizes = np.array([max(len(sentence), 1) for sentence in generated])
+        scores = scores / sizes
+        bounds = np.cumsum([0] + group_sizes)
+        tweet_groups = [tweets[start:end]
+                        for start, end in zip(bounds[:-1], bounds[1:])]
+        if with_scores:
+            score_groups = [scores[start:end]
+                            for start, end in zip(bounds[:-1], bounds[1:])]
+            return tweet_groups, score_groups
+        return tweet_groups
+
+    def __beam_search__(self,
+                        engine,
+                        beam_size,
+                        starting_text='<eos>',
+                        stop_tokens=None,
+                        CharSize=140):
+        """
+        Private method to generate sentences with beam search: the
+        batch has (at most) "beam_size" sentences and, after each step
+        of the engine, it is replaced by the "beam_size" extensions
+        (sentence + one word) with the largest log probability. The
+        logits are masked as in "__generate_tweet_batch_no_unk__".
+        A sentence is complete when no word fits in "CharSize"
+        characters or after a word of "stop_tokens". It returns the
+        complete sentences and their scores (mean log probability
+        of the words), sorted by score. The number of steps is at
+        most CharSize / 2, each one with at most "beam_size" rows.
+
+        :type engine: TFEngine or NumpyEngine
+        :type beam_size: int
+        :type starting_text: str
+        :type stop_tokens: None or list of str
+        :type CharSize: int
+        :rtype : (list of list of str, np array)
+        """
+        vocab = self.dataholder.vocab
+        self.token_constraints()
+        is_stop = token_mask(vocab, stop_tokens or [])
+        words, logits, state, budget = self.start_batch(engine,
+                                                        starting_text,
+                                                        1,
+                                                        CharSize)
+        beams = [[]]
+        beam_scores = np.zeros(1)
+        complete = []
+        while len(beams) > 0:
+            fits = budget >= self.min_cost
+            for row in np.flatnonzero(~fits):
+                complete.append((beams[row], beam_scores[row]))
+            if not fits.all():
+                beams = [beams[row] for row in np.flatnonzero(fits)]
+                beam_scores = beam_scores[fits]
+                budget = budget[fits]
+                state = state[fits]
+                logits = logits[fits]
+                if len(beams) == 0:
+                    break
+            self.mask_logits(logits, budget)
+            total = (beam_scores[:, np.newaxis] + log_softmax(logits)).ravel()
+            size = min(beam_size, np.isfinite(total).sum())
+            best = np.argpartition(-total, size - 1)[:size]
+            best = best[np.argsort(-total[best], kind="mergesort")]
+            parents, next_words = np.divmod(best, logits.shape[1])
+            beams = [beams[parent] + [int(word)]
+                     for parent, word in zip(parents, next_words)]
+            beam_scores = total[best]
+            budget = budget[parents] - self.costs[next_words]
+            stop = is_stop[next_words]
+            for row in np.flatnonzero(stop):
+                complete.append((beams[row], beam_scores[row]))
+            keep = np.flatnonzero(~stop)
+            beams = [beams[row] for row in keep]
+            beam_scores = beam_scores[keep]
+            budget = budget[keep]
+            if len(beams) > 0:
+                logits, state = engine.step_logits(next_words[keep],
+                                                   state[parents[keep]])
+        scores = np.array([score / max(len(sentence), 1)
+                           for sentence, score in complete])
+        order = np.argsort(-scores, kind="mergesort")
+        tweets = [words + [vocab.decode(index) for index in complete[i][0]]
+                  for i in order]
+        return tweets, scores[order]
+
+    def tweet_size(self, starting_text='<eos>', hashtag_list=[]):
+        """
+        Returns the number of characters of a tweet that
+        starts with "starting_text" without the hashtags of
+        "hashtag_list" (see the function "tweet_size").
+
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :rtype: int
+        """
+        return tweet_size(starting_text, hashtag_list)
+
+    def finish_tweets(self, tweets, hashtag_list=[]):
+        """
+        Returns the tweets (lists of words) as strings
+        with the hashtags of "hashtag_list" at the end.
+
+        :type tweets: list of list of str
+        :type hashtag_list: list of str
+        :rtype: list of str
+        """
+        cdr = " ".join(hashtag_list)
+        all_tweets = []
+        for tweet in tweets:
+            tweet = " ".join([eos2period(word) for word in tweet])
+            if hashtag_list != []:
+                tweet = tweet + " " + cdr
+            all_tweets.append(tweet)
+        return all_tweets
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        """
+        Given the words in the string "starting text"
+        this method generates "number_of_tweets" tweets
+        (all of them together, in one batch).
+        It also appends at the end of the sentence
+        the hashtags that may occur in the list "hashtag_list".
+        With decoding = "sample" the tweets are sampled from the
+        model. With decoding = "best_of" "num_candidates" tweets are
+        sampled for each tweet (in the same batch) and the tweets
+        with the largest mean log probability are returned. With
+        decoding = "beam" the tweets are the best ones of a beam
+        search of size max(num_candidates, number_of_tweets).
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        request = {"number_of_tweets": number_of_tweets,
+                   "starting_text": starting_text,
+                   "hashtag_list": hashtag_list,
+                   "decoding": decoding,
+                   "num_candidates": num_candidates}
+        return self.generate_tweet_lists([request])[0]
+
+    def generate_tweet_lists(self, requests):
+        """
+        Generates the tweets of several requests together: each
+        request is a dict with the arguments of "generate_tweet_list"
+        (the missing ones take their default values). The sentences
+        of all the requests with decoding "sample" or "best_of" are
+        generated in one batch (one step of the engine for all of
+        them), the beam searches are done one by one.
+        It returns the list of tweets of each request.
+
+        :type requests: list of dict
+        :rtype: list of list of str
+        """
+        requests = [dict(TWEET_REQUEST, **request) for request in requests]
+        for request in requests:
+            assert request["decoding"] in ["sample", "best_of", "beam"]
+        sizes = [self.tweet_size(request["starting_text"],
+                                 request["hashtag_list"])
+                 for request in requests]
+        engine = self.get_engine()
+        results = [None] * len(requests)
+        groups = []
+        batched = []
+        for i, request in enumerate(requests):
+            number_of_tweets = request["number_of_tweets"]
+            num_candidates = request["num_candidates"]
+            if request["decoding"] == "beam":
+                beam_size = max(num_candidates, number_of_tweets)
+                tweets, _ = self.__beam_search__(engine,
+                                                 beam_size,
+                                                 request["starting_text"],
+                                                 CharSize=sizes[i])
+                results[i] = tweets[:number_of_tweets]
+            else:
+                if request["decoding"] == "best_of":
+                    number_of_tweets *= num_candidates
+                groups.append((request["starting_text"],
+                               number_of_tweets,
+                               sizes[i]))
+                batched.append(i)
+        if groups != []:
+            with_scores = any([requests[i]["decoding"] == "best_of"
+                               for i in batched])
+            result = self.__generate_groups_no_unk__(engine,
+                                                     groups,
+                                                     with_scores=with_scores)
+            tweet_groups = result[0] if with_scores else result
+            for group, i in enumerate(batched):
+                tweets = tweet_groups[group]
+                if requests[i]["decoding"] == "best_of":
+                    scores = result[1][group]
+                    order = np.argsort(-scores, kind="mergesort")
+                    number_of_tweets = requests[i]["number_of_tweets"]
+                    tweets = [tweets[j] for j in order[:number_of_tweets]]
+                results[i] = tweets
+        return [self.finish_tweets(tweets, request["hashtag_list"])
+                for tweets, request in zip(results, requests)]
@@ -0,0 +1,172 @@
+try:
+    from GeneratorService import GeneratorService
+except ImportError:
+    from twitter.GeneratorService import GeneratorService
+import threading
+import time
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class BatchRequest(object):
+    """
+    Request waiting in the queue of the BatchingGeneratorService:
+    "request" has the arguments of "generate_tweet_list" and
+    "rows" is the number of sentences it adds to the batch.
+    When the batch is done, "tweets" (or "error") is set.
+
+    :type request: dict
+    :type rows: int
+    """
+    def __init__(self, request, rows):
+        self.request = request
+        self.rows = rows
+        self.done = threading.Event()
+        self.tweets = None
+        self.error = None
+
+
+class BatchingGeneratorService(GeneratorService):
+    """
+    GeneratorService that merges the requests made at the same time
+    (e.g., by several bots through the Unix socket): the requests
+    wait in a queue and one worker thread takes them in batches, and
+    generates the tweets of each batch together (see
+    "generate_tweet_lists"), so each step of the engine
+    advances the sentences of all the requests.
+    A batch starts with the first request in the queue and takes
+    the requests that arrive in the next "max_wait" seconds,
+    until it has "max_batch" sentences.
+
+    :type generator: BaseGenerator
+    :type max_batch: int
+    :type max_wait: float
+    """
+    def __init__(self, generator, max_batch=64, max_wait=0.01):
+        GeneratorService.__init__(self, generator)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.num_batches = 0
+        self.num_requests = 0
+        self.worker = threading.Thread(target=self.run)
+        self.worker.daemon = True
+        self.worker.start()
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        """
+        Same as the method "generate_tweet_list" of the generator
+        (the request waits for its batch).
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        assert decoding in ["sample", "best_of", "beam"]
+        # the invalid requests fail here, not in the batch
+        self.generator.tweet_size(starting_text, hashtag_list)
+        rows = int(number_of_tweets)
+        if decoding == "best_of":
+            rows *= int(num_candidates)
+        elif decoding == "beam":
+            rows = max(int(num_candidates), rows)
+        pending = BatchRequest({"number_of_tweets": number_of_tweets,
+                                "starting_text": starting_text,
+                                "hashtag_list": hashtag_list,
+                                "decoding": decoding,
+                                "num_candidates": num_candidates},
+                               rows)
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.tweets
+
+    def next_batch(self):
+        """
+        Waits for the next batch of requests (None when
+        the service is closed).
+
+        :rtype: None or list of BatchRequest
+        """
+        pending = self.queue.get()
+        if pending is None:
+            return None
+        batch = [pending]
+        rows = pending.rows
+        deadline = time.time() + self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                pending = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if pending is None:
+                self.queue.put(None)
+                break
+            batch.append(pending)
+            rows += pending.rows
+        return batch
+
+    def run(self):
+        """
+        Loop of the worker thread: generates the tweets
+        of each batch and wakes up its requests.
+        """
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                break
+            with self.lock:
+                try:
+                    results = self.generator.generate_tweet_lists(
+                        [pending.request for pending in batch])
+                except Exception as error:
+                    if len(batch) == 1:
+                        batch[0].error = error
+                    else:
+                        # each request gets only its own error
+                        self.run_one_by_one(batch)
+                else:
+                    for pending, tweets in zip(batch, results):
+                        pending.tweets = tweets
+                self.num_batches += 1
+                self.num_requests += len(batch)
+            for pending in batch:
+                pending.done.set()
+
+    def run_one_by_one(self, batch):
+        """
+        Generates the tweets of each request of "batch"
+        alone (used when the batch fails).
+
+        :type batch: list of BatchRequest
+        """
+        for pending in batch:
+            try:
+                pending.tweets = self.generator.generate_tweet_lists(
+                    [pending.request])[0]
+            except Exception as error:
+                pending.error = error
+
+    def stop(self):
+        """
+        Stops serving, removes the socket and stops
+        the worker (the requests in the queue are done first).
+        """
+        GeneratorService.stop(self)
+        if self.worker.is_alive():
+            self.queue.put(None)
+            self.worker.join()
@@ -0,0 +1,227 @@
+try:
+    from GeneratorService import GeneratorService
+    from functions import tweet_size, cut_tweet
+except ImportError:
+    from twitter.GeneratorService import GeneratorService
+    from twitter.functions import tweet_size, cut_tweet
+from collections import OrderedDict, deque
+import threading
+import time
+
+
+class PoolEntry(object):
+    """
+    Candidates of one starting text in the CandidatePool:
+    "tweets" has (creation time, tweet without hashtags) and
+    "hashtag_list" is the last list of hashtags asked with this
+    starting text (the new candidates leave room for them).
+
+    :type hashtag_list: list of str
+    """
+    def __init__(self, hashtag_list=[]):
+        self.hashtag_list = hashtag_list
+        self.tweets = deque()
+
+
+class CandidatePool(object):
+    """
+    Tweets generated in the background for the curator: a thread
+    keeps up to "size" candidates for '<eos>' (always) and for the
+    last "max_keys" starting texts asked, and refills them while
+    the user reads the tweets. The candidates are kept without the
+    hashtags and they are generated for the last list of hashtags
+    asked with their starting text. When a candidate does not fit
+    with a longer list of hashtags its last words are removed
+    (see "cut_tweet"), so the candidates are used by any list
+    of hashtags. Candidates older than "max_age" seconds
+    are dropped.
+    It has the method "generate_tweet_list" of the generators: the
+    tweets come from the pool and, when there are not enough
+    candidates, the rest are generated on the spot.
+    "hits" and "misses" count these tweets. If the background
+    generation fails, the error is raised by the next call of
+    "generate_tweet_list" and the thread starts again.
+
+    :type generator: GeneratorService or BaseGenerator
+    :type size: int
+    :type max_keys: int
+    :type max_age: float
+    """
+    def __init__(self, generator, size=10, max_keys=8, max_age=600):
+        if not isinstance(generator, GeneratorService):
+            generator = GeneratorService(generator)
+        self.generator = generator
+        self.size = size
+        self.max_keys = max_keys
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.error = None
+        # the most recent starting text is the last one
+        self.entries = OrderedDict([('<eos>', PoolEntry())])
+        self.condition = threading.Condition()
+        self.running = True
+        self.start()
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def evict(self):
+        """
+        Drops the candidates older than "max_age" and the starting
+        texts beyond the last "max_keys" (except '<eos>').
+        Call it holding "condition".
+        """
+        oldest = time.time() - self.max_age
+        for entry in self.entries.values():
+            while len(entry.tweets) > 0 and entry.tweets[0][0] < oldest:
+                entry.tweets.popleft()
+        keys = [key for key in self.entries if key != '<eos>']
+        for key in keys[:max(len(keys) - self.max_keys, 0)]:
+            del self.entries[key]
+
+    def available(self, starting_text='<eos>'):
+        """
+        Number of candidates for "starting_text".
+
+        :type starting_text: str
+        :rtype: int
+        """
+        with self.condition:
+            self.evict()
+            if starting_text not in self.entries:
+                return 0
+            return len(self.entries[starting_text].tweets)
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[]):
+        """
+        Returns "number_of_tweets" tweets that start with
+        "starting_text" and end with the hashtags of "hashtag_list"
+        (see the method "generate_tweet_list" of the generators).
+        The candidates of the pool are used first.
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :rtype: list of str
+        """
+        # the invalid requests never reach the pool
+        tweet_size(starting_text, hashtag_list)
+        cdr = " ".join(hashtag_list)
+        max_size = 140 - len(cdr) - 1 if hashtag_list != [] else 140
+        # a candidate needs at least one word after the starting text
+        min_size = 0 if starting_text == '<eos>' else len(starting_text)
+        tweets = []
+        with self.condition:
+            if self.error is not None:
+                error = self.error
+                self.error = None
+                self.start()
+                raise error
+            self.evict()
+            entry = self.entries.pop(starting_text, None)
+            if entry is None:
+                entry = PoolEntry()
+            entry.hashtag_list = hashtag_list
+            self.entries[starting_text] = entry
+            kept = deque()
+            for created, tweet in entry.tweets:
+                if len(tweets) == number_of_tweets:
+                    kept.append((created, tweet))
+                    continue
+                # the candidates longer than the new budget are cut
+                tweet = cut_tweet(tweet, max_size)
+                if len(tweet) > min_size:
+                    tweets.append(tweet)
+            entry.tweets = kept
+            self.evict()
+            self.condition.notify()
+            missing = number_of_tweets - len(tweets)
+            self.hits += len(tweets)
+            self.misses += missing
+        if missing > 0:
+            tweets += self.generate(missing, starting_text, hashtag_list)
+        if hashtag_list != []:
+            tweets = [tweet + " " + cdr for tweet in tweets]
+        return tweets
+
+    def generate(self, number_of_tweets, starting_text, hashtag_list):
+        """
+        Generates "number_of_tweets" tweets and
+        returns them without the hashtags.
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :rtype: list of str
+        """
+        tweets = self.generator.generate_tweet_list(number_of_tweets,
+                                                    starting_text,
+                                                    hashtag_list)
+        if hashtag_list == []:
+            return tweets
+        cdr_size = len(" ".join(hashtag_list)) + 1
+        return [tweet[:len(tweet) - cdr_size] for tweet in tweets]
+
+    def next_refill(self):
+        """
+        Returns the most recent starting text with less than
+        "size" candidates, the number of missing candidates and
+        its hashtags (None when all the entries are full).
+        Call it holding "condition".
+
+        :rtype: None or (str, int, list of str)
+        """
+        self.evict()
+        for key in reversed(list(self.entries)):
+            entry = self.entries[key]
+            if len(entry.tweets) < self.size:
+                return key, self.size - len(entry.tweets), entry.hashtag_list
+        return None
+
+    def run(self):
+        """
+        Loop of the background thread: refills the
+        entries until the method "stop" is called
+        or the generation fails (the error is kept in "error").
+        """
+        while True:
+            with self.condition:
+                refill = self.next_refill()
+                while self.running and refill is None:
+                    # wakes up to drop the old candidates
+                    self.condition.wait(self.max_age)
+                    refill = self.next_refill()
+                if not self.running:
+                    break
+            starting_text, number_of_tweets, hashtag_list = refill
+            try:
+                tweets = self.generate(number_of_tweets,
+                                       starting_text,
+                                       hashtag_list)
+            except Exception as error:
+                with self.condition:
+                    self.error = error
+                break
+            with self.condition:
+                if starting_text in self.entries:
+                    created = time.time()
+                    self.entries[starting_text].tweets.extend(
+                        [(created, tweet) for tweet in tweets])
+
+    def stop(self):
+        """
+        Stops the background thread.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
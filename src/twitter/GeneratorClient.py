@@ -0,0 +1,83 @@
+import json
+import socket
+
+
+class GeneratorClient(object):
+    """
+    Client of a GeneratorService that serves the Unix socket
+    "socket_path". It has the method "generate_tweet_list" of the
+    tweet generators, so it can be used in their place (it does not
+    load the vocab, the weights or TensorFlow). The connection is
+    opened in the first request and kept open.
+
+    :type socket_path: str
+    :type timeout: None or float
+    """
+    def __init__(self, socket_path, timeout=None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.socket = None
+        self.file = None
+
+    def connect(self):
+        """
+        Opens the connection with the service.
+        """
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(self.timeout)
+        self.socket.connect(self.socket_path)
+        self.file = self.socket.makefile("rwb")
+
+    def request(self, request):
+        """
+        Sends the request "request" and returns the tweets of
+        the answer. It raises RuntimeError when the
+        service answers with an error.
+
+        :type request: dict
+        :rtype: list of str
+        """
+        if self.socket is None:
+            self.connect()
+        self.file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            self.close()
+            raise IOError("the generator service closed the connection")
+        answer = json.loads(line.decode("utf-8"))
+        if "error" in answer:
+            raise RuntimeError(answer["error"])
+        return answer["tweets"]
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        """
+        Same as the method "generate_tweet_list" of the generators.
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        return self.request({"number_of_tweets": number_of_tweets,
+                             "starting_text": starting_text,
+                             "hashtag_list": hashtag_list,
+                             "decoding": decoding,
+                             "num_candidates": num_candidates})
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        if self.socket is not None:
+            self.file.close()
+            self.socket.close()
+            self.socket = None
+            self.file = None
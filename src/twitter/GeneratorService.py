@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import sys
+import inspect
+import threading
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+
+def warm_generator(text_path,
+                   export_path=None,
+                   black_list=[],
+                   num_workers=1):
+    """
+    Function that returns a tweet generator for the corpus
+    "text_path". If the weights of the model were exported as
+    numpy arrays in "export_path" (default:
+    "checkpoints/best_validation_numpy", it is done during the
+    training) the tweets are generated without TensorFlow
+    (NumpyTweetGenerator, or ParallelTweetGenerator with
+    "num_workers" processes if num_workers > 1), otherwise we use
+    the TweetGenerator (that trains the model if there is no
+    checkpoint).
+
+    :type text_path: str
+    :type export_path: None or str
+    :type black_list: list
+    :type num_workers: int
+    :rtype: NumpyTweetGenerator or ParallelTweetGenerator or TweetGenerator
+    """
+    if export_path is None:
+        export_path = os.path.join(os.getcwd(),
+                                   "checkpoints",
+                                   "best_validation_numpy")
+    if os.path.exists(export_path) and num_workers > 1:
+        from twitter.ParallelTweetGenerator import ParallelTweetGenerator
+        return ParallelTweetGenerator(text_path=text_path,
+                                      export_path=export_path,
+                                      num_workers=num_workers,
+                                      black_list=black_list)
+    if os.path.exists(export_path):
+        from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+        return NumpyTweetGenerator(text_path=text_path,
+                                   export_path=export_path,
+                                   black_list=black_list)
+    from twitter.TweetGenerator import TweetGenerator
+    return TweetGenerator(text_path=text_path,
+                          black_list=black_list,
+                          train=False)
+
+
+class ServiceHandler(socketserver.StreamRequestHandler):
+    """
+    Handler of one connection to the GeneratorService: it answers
+    each line (a JSON request) with one line (a JSON answer)
+    until the client closes the connection.
+    """
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line.decode("utf-8"))
+            except ValueError as error:
+                answer = {"error": "ValueError: {}".format(error)}
+            else:
+                answer = self.server.service.handle(request)
+            self.wfile.write((json.dumps(answer) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn,
+                          socketserver.UnixStreamServer):
+    """
+    Unix socket server with one thread for each connection.
+    """
+    daemon_threads = True
+
+
+class GeneratorService(object):
+    """
+    Long-lived tweet generator: the vocab and the weights of the
+    "generator" (e.g., the one of "warm_generator") are loaded once
+    and its engine is kept warm, so each request only pays for the
+    generation. The requests are served one at a time.
+
+    In the same process use the method "generate_tweet_list" (same
+    arguments as the one of the generators). Other processes
+    use the Unix socket "socket_path" (method "start" or "serve",
+    see GeneratorClient): each request is one line with a JSON
+    object with the arguments of "generate_tweet_list", and
+    the answer is one line with {"tweets": [...]} or
+    {"error": "..."}.
+
+    :type generator: BaseGenerator
+    """
+    def __init__(self, generator):
+        self.generator = generator
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        """
+        Same as the method "generate_tweet_list" of the generator.
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        with self.lock:
+            return self.generator.generate_tweet_list(number_of_tweets,
+                                                      starting_text,
+                                                      hashtag_list,
+                                                      decoding,
+                                                      num_candidates)
+
+    def handle(self, request):
+        """
+        Answer to the request "request" (the arguments of
+        "generate_tweet_list"). The errors are returned
+        in the answer, the service keeps running.
+
+        :type request: dict
+        :rtype: dict
+        """
+        try:
+            return {"tweets": self.generate_tweet_list(**request)}
+        except Exception as error:
+            return {"error": "{}: {}".format(type(error).__name__, error)}
+
+    def start(self, socket_path):
+        """
+        Starts to serve the requests of the Unix socket
+        "socket_path" in a background thread.
+
+        :type socket_path: str
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.server = ThreadingUnixServer(socket_path, ServiceHandler)
+        self.server.service = self
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve(self, socket_path):
+        """
+        Serves the requests of the Unix socket "socket_path"
+        until the process is interrupted.
+
+        :type socket_path: str
+        """
+        self.start(socket_path)
+        try:
+            while self.thread.is_alive():
+                self.thread.join(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops serving and removes the socket.
+        """
+        if self.server is None:
+            return
+        socket_path = self.server.server_address
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.server = None
+        self.thread = None
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("text_path",
+                        type=str,
+                        help="corpus of the model")
+    parser.add_argument("-s",
+                        "--socket",
+                        type=str,
+                        default="generator.sock",
+                        help="path of the Unix socket (default=generator.sock)")
+    parser.add_argument("-e",
+                        "--export_path",
+                        type=str,
+                        default=None,
+                        help="weights exported as numpy arrays\
+                        (default=checkpoints/best_validation_numpy)")
+    parser.add_argument("-b",
+                        "--max_batch",
+                        type=int,
+                        default=0,
+                        help="merge the requests in batches of up to\
+                        max_batch tweets (default=0, no merging)")
+    parser.add_argument("-w",
+                        "--max_wait",
+                        type=float,
+                        default=10,
+                        help="milliseconds a batch waits for\
+                        more requests (default=10)")
+    parser.add_argument("-j",
+                        "--num_workers",
+                        type=int,
+                        default=1,
+                        help="processes that generate the tweets (default=1)")
+    user_args = parser.parse_args()
+    generator = warm_generator(user_args.text_path,
+                               user_args.export_path,
+                               num_workers=user_args.num_workers)
+    if user_args.max_batch > 0:
+        from twitter.BatchingGeneratorService import BatchingGeneratorService
+        service = BatchingGeneratorService(generator,
+                                           user_args.max_batch,
+                                           user_args.max_wait / 1000.0)
+    else:
+        service = GeneratorService(generator)
+    # warm up: the first list loads the engine
+    service.generate_tweet_list()
+    print("Serving on {}".format(os.path.abspath(user_args.socket)))
+    service.serve(user_args.socket)
+
+
+if __name__ == "__main__":
+    main()
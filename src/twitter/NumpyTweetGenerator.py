@@ -0,0 +1,58 @@
+try:
+    from BaseGenerator import BaseGenerator
+except ImportError:
+    from twitter.BaseGenerator import BaseGenerator
+import os
+import sys
+import inspect
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.NumpyEngine import NumpyEngine
+
+
+class NumpyTweetGenerator(BaseGenerator):
+    """
+    Class that generates tweets without TensorFlow. It uses
+    the weights exported as numpy arrays by the training
+    of a TweetGenerator (the folder "export_path", default:
+    "checkpoints/best_validation_numpy"), they are read only once.
+    With mmap_mode="r" they are memory-mapped (see NumpyEngine).
+    It has the same method "generate_tweet_list" as TweetGenerator.
+    "black_list" is the list of all words that the bot should not say.
+
+    :type text_path: srt
+    :type export_path: None or str
+    :type debug: boolean
+    :type black_list: list
+    :type mmap_mode: None or str
+    """
+    def __init__(self,
+                 text_path,
+                 export_path=None,
+                 debug=False,
+                 black_list=[],
+                 mmap_mode=None):
+        BaseGenerator.__init__(self,
+                               text_path,
+                               debug=debug,
+                               black_list=black_list)
+        if export_path is None:
+            export_path = os.path.join(os.getcwd(),
+                                       "checkpoints",
+                                       "best_validation_numpy")
+        self.export_path = export_path
+        self.mmap_mode = mmap_mode
+        engine = self.get_engine()
+        assert engine.vocab_size == len(self.dataholder.vocab), \
+            "The exported weights are not from this corpus!"
+
+    def load_engine(self):
+        """
+        Reads the exported weights.
+
+        :rtype: NumpyEngine
+        """
+        return NumpyEngine(self.export_path, self.mmap_mode)
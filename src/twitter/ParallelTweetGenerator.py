@@ -0,0 +1,250 @@
+try:
+    from NumpyTweetGenerator import NumpyTweetGenerator
+    from BaseGenerator import TWEET_REQUEST
+    from functions import tweet_size
+except ImportError:
+    from twitter.NumpyTweetGenerator import NumpyTweetGenerator
+    from twitter.BaseGenerator import TWEET_REQUEST
+    from twitter.functions import tweet_size
+import os
+import sys
+import inspect
+import numpy as np
+
+currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parentdir = os.path.dirname(currentdir)
+sys.path.insert(0, parentdir)
+
+from tftools.DataHolder import DataHolder
+from text_processing.functions import pool_context
+
+# generator of each worker process (see "init_worker")
+worker = {}
+
+
+def init_worker(text_path, export_path, debug, black_list):
+    """
+    Initializer of the worker processes: each one has a
+    NumpyTweetGenerator with memory-mapped weights (the pages of
+    the weights, like the ones of the data of the DataHolder
+    cache, are shared by all the workers).
+
+    :type text_path: str
+    :type export_path: str
+    :type debug: boolean
+    :type black_list: list
+    """
+    worker["generator"] = NumpyTweetGenerator(text_path,
+                                              export_path=export_path,
+                                              debug=debug,
+                                              black_list=black_list,
+                                              mmap_mode="r")
+
+
+def generate_chunk(task):
+    """
+    Samples one chunk of the tweets of a request in a worker:
+    "task" is (number_of_tweets, starting_text, hashtag_list,
+    with_scores, seed). It returns the tweets and their scores
+    (None without "with_scores").
+
+    :type task: tuple
+    :rtype: (list of str, None or np array)
+    """
+    number_of_tweets, starting_text, hashtag_list, with_scores, seed = task
+    # each chunk has its own random numbers
+    np.random.seed(seed)
+    tg = worker["generator"]
+    size = tg.tweet_size(starting_text, hashtag_list)
+    result = tg.__generate_tweet_batch_no_unk__(tg.get_engine(),
+                                                number_of_tweets,
+                                                starting_text,
+                                                CharSize=size,
+                                                with_scores=with_scores)
+    if with_scores:
+        tweets, scores = result
+    else:
+        tweets, scores = result, None
+    return tg.finish_tweets(tweets, hashtag_list), scores
+
+
+def generate_list(request):
+    """
+    Runs "generate_tweet_list" in a worker ("request"
+    has its arguments).
+
+    :type request: dict
+    :rtype: list of str
+    """
+    return worker["generator"].generate_tweet_list(**request)
+
+
+def generate_lists(task):
+    """
+    Runs "generate_tweet_lists" in a worker: "task" is
+    (requests, seed).
+
+    :type task: (list of dict, int)
+    :rtype: list of list of str
+    """
+    requests, seed = task
+    np.random.seed(seed)
+    return worker["generator"].generate_tweet_lists(requests)
+
+
+def request_rows(request):
+    """
+    Number of sentences generated for the request "request"
+    (the arguments of "generate_tweet_list").
+
+    :type request: dict
+    :rtype: int
+    """
+    if request["decoding"] == "best_of":
+        return request["number_of_tweets"] * request["num_candidates"]
+    if request["decoding"] == "beam":
+        return max(request["num_candidates"], request["number_of_tweets"])
+    return request["number_of_tweets"]
+
+
+class ParallelTweetGenerator(object):
+    """
+    Class that generates tweets in "num_workers" processes
+    (default: the number of cores). Each worker has a
+    NumpyTweetGenerator with the weights exported in "export_path"
+    (default: "checkpoints/best_validation_numpy") memory-mapped,
+    so the workers share the weights (and the data of
+    the DataHolder cache) instead of copying them. The DataHolder
+    cache is built before the workers start, so they only read it.
+    It has the same methods "generate_tweet_list" and
+    "generate_tweet_lists" as TweetGenerator: the tweets sampled
+    by "sample" and "best_of" are split in one chunk for each worker
+    (the beam search runs in one worker), and the requests of a list
+    are split among the workers.
+
+    :type text_path: srt
+    :type export_path: None or str
+    :type num_workers: None or int
+    :type debug: boolean
+    :type black_list: list
+    """
+    def __init__(self,
+                 text_path,
+                 export_path=None,
+                 num_workers=None,
+                 debug=False,
+                 black_list=[]):
+        if export_path is None:
+            export_path = os.path.join(os.getcwd(),
+                                       "checkpoints",
+                                       "best_validation_numpy")
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        self.num_workers = num_workers
+        # the workers are daemons (they can not start processes)
+        DataHolder(text_path=text_path, debug=debug)
+        self.pool = pool_context().Pool(num_workers,
+                                        init_worker,
+                                        (text_path,
+                                         os.path.abspath(export_path),
+                                         debug,
+                                         black_list))
+
+    def tweet_size(self, starting_text='<eos>', hashtag_list=[]):
+        """
+        Same as the method "tweet_size" of BaseGenerator.
+
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :rtype: int
+        """
+        return tweet_size(starting_text, hashtag_list)
+
+    def generate_tweet_list(self,
+                            number_of_tweets=1,
+                            starting_text='<eos>',
+                            hashtag_list=[],
+                            decoding="sample",
+                            num_candidates=10):
+        """
+        Same as the method "generate_tweet_list" of
+        the generators (see BaseGenerator).
+
+        :type number_of_tweets: int
+        :type starting_text: str
+        :type hashtag_list: list of str
+        :type decoding: str
+        :type num_candidates: int
+        :rtype: list of str
+        """
+        assert decoding in ["sample", "best_of", "beam"]
+        if decoding == "beam":
+            request = {"number_of_tweets": number_of_tweets,
+                       "starting_text": starting_text,
+                       "hashtag_list": hashtag_list,
+                       "decoding": decoding,
+                       "num_candidates": num_candidates}
+            return self.pool.apply(generate_list, (request,))
+        with_scores = decoding == "best_of"
+        rows = number_of_tweets
+        if with_scores:
+            rows *= num_candidates
+        sizes = [len(chunk) for chunk in np.array_split(np.arange(rows),
+                                                        self.num_workers)]
+        sizes = [size for size in sizes if size > 0]
+        seeds = np.random.randint(2 ** 31 - 1, size=len(sizes))
+        tasks = [(size, starting_text, hashtag_list, with_scores, seed)
+                 for size, seed in zip(sizes, seeds)]
+        if tasks == []:
+            return []
+        tweets = []
+        scores = []
+        for chunk_tweets, chunk_scores in self.pool.map(generate_chunk, tasks):
+            tweets += chunk_tweets
+            scores.append(chunk_scores)
+        if with_scores:
+            scores = np.concatenate(scores)
+            order = np.argsort(-scores, kind="mergesort")
+            tweets = [tweets[i] for i in order[:number_of_tweets]]
+        return tweets
+
+    def generate_tweet_lists(self, requests):
+        """
+        Same as the method "generate_tweet_lists" of BaseGenerator:
+        the requests are split among the workers (each worker
+        generates its requests together) and the lists of
+        tweets are returned in the order of "requests".
+
+        :type requests: list of dict
+        :rtype: list of list of str
+        """
+        requests = [dict(TWEET_REQUEST, **request) for request in requests]
+        for request in requests:
+            assert request["decoding"] in ["sample", "best_of", "beam"]
+            self.tweet_size(request["starting_text"], request["hashtag_list"])
+        # the largest requests first, each one to the least loaded worker
+        loads = np.zeros(self.num_workers, dtype=np.int64)
+        shares = [[] for i in range(self.num_workers)]
+        rows = [request_rows(request) for request in requests]
+        for i in np.argsort([-size for size in rows], kind="mergesort"):
+            worker_index = int(np.argmin(loads))
+            shares[worker_index].append(i)
+            loads[worker_index] += rows[i]
+        shares = [share for share in shares if share != []]
+        if shares == []:
+            return []
+        seeds = np.random.randint(2 ** 31 - 1, size=len(shares))
+        tasks = [([requests[i] for i in share], seed)
+                 for share, seed in zip(shares, seeds)]
+        results = [None] * len(requests)
+        for share, lists in zip(shares, self.pool.map(generate_lists, tasks)):
+            for i, tweets in zip(share, lists):
+                results[i] = tweets
+        return results
+
+    def close(self):
+        """
+        Stops the workers.
+        """
+        self.pool.close()
+        self.pool.join()
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def TweetValid(tweet, CharNumber=140):
     """
     Function to check if a string "tweet" is valid,
@@ -13,6 +16,42 @@ def TweetValid(tweet, CharNumber=140):
     return len(tweet) <= CharNumber
 
 
+def tweet_size(starting_text='<eos>', hashtag_list=[]):
+    """
+    Function that returns the number of characters of a tweet
+    that starts with "starting_text" without the hashtags of
+    "hashtag_list" (they are added at the end of the tweet).
+
+    :type starting_text: str
+    :type hashtag_list: list of str
+    :rtype: int
+    """
+    cdr = " ".join(hashtag_list)
+    cdr_size = len(cdr) + 1
+    if starting_text == '<eos>':
+        text_so_far = cdr
+    else:
+        text_so_far = starting_text + " " + cdr
+    assert TweetValid(text_so_far,
+                      CharNumber=140), "Equal or less than 140 characters!"
+    return 140 - cdr_size
+
+
+def cut_tweet(tweet, size):
+    """
+    Function that removes the last words of the string "tweet"
+    until it has at most "size" characters.
+
+    :type tweet: str
+    :type size: int
+    :rtype: str
+    """
+    words = tweet.split(" ")
+    while words != [] and len(" ".join(words)) > size:
+        words.pop()
+    return " ".join(words)
+
+
 def eos2period(word):
     """
     Changing all the '<eos>' for '.'
@@ -24,3 +63,33 @@ def eos2period(word):
         return '.'
     else:
         return word
+
+
+def token_lengths(vocab):
+    """
+    Function that returns the number of characters of each
+    word of "vocab" (an array indexed by the word index).
+
+    :type vocab: Vocab
+    :rtype: np array
+    """
+    return np.array([len(vocab.decode(index)) for index in range(len(vocab))],
+                    dtype=np.int64)
+
+
+def token_mask(vocab, words):
+    """
+    Function that returns the boolean array (indexed by the
+    word index) that is True for the words of the list "words"
+    that are in "vocab" (the other words are ignored).
+
+    :type vocab: Vocab
+    :type words: list of str
+    :rtype: np array
+    """
+    mask = np.zeros(len(vocab), dtype=bool)
+    for word in words:
+        index = vocab.word2index.get(word)
+        if index is not None:
+            mask[index] = True
+    return mask
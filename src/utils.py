@@ -1,6 +1,7 @@
 import numpy as np
 import unittest
 import time
+from tftools.sample_functions import sample_probs
 
 
 def run_test(testClass, header):
@@ -17,14 +18,14 @@ def run_test(testClass, header):
 
 def sample(input_array, temperature=1.0):
     """
-    Function to sample an index from a probability array
+    Function to sample an index from a probability array.
+    It uses the function "sample_probs" (the array can
+    be float32).
 
     :type input_array: np array
     :type header: int
     """
-    input_array = np.log(input_array) / temperature
-    input_array = np.exp(input_array) / np.sum(np.exp(input_array))
-    return np.argmax(np.random.multinomial(1, input_array, 1))
+    return sample_probs(input_array, temperature=temperature)
 
 
 def get_date():